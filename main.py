@@ -10,8 +10,10 @@ from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, fil
 
 from src.handlers.handle_document import handle_document
 from src.handlers.start import start
+from src.handlers.summary import handle_summary
 from src.handlers.error_handler import on_error
 from src.utils.logger import get_logger
+from src.utils.metrics import configure_from_env as configure_metrics
 
 load_dotenv()
 logger = get_logger(__name__)
@@ -23,13 +25,15 @@ REQUIRED_ENV_VARS = [
 
 missing_env = [name for name in REQUIRED_ENV_VARS if not os.getenv(name)]
 if missing_env:
-    logger.error(f"Variáveis de ambiente ausentes: {', '.join(missing_env)}")
+    logger.error("Variáveis de ambiente ausentes: %s", ', '.join(missing_env))
     raise SystemExit(1)
 
 TOKEN = os.getenv("BOT_TOKEN_TELEGRAM")
 
 
 def main():
+    configure_metrics()
+
     defaults = Defaults(parse_mode=ParseMode.MARKDOWN)
     app = (
         ApplicationBuilder()
@@ -39,6 +43,7 @@ def main():
     )
 
     app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("resumo", handle_summary))
 
     app.add_handler(MessageHandler(filters.Document.ALL, handle_document))
 
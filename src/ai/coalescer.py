@@ -0,0 +1,175 @@
+"""
+Coalescência de trabalho de categorização entre requisições simultâneas
+
+Quando vários usuários enviam extratos ao mesmo tempo, os mesmos comerciantes
+populares aparecem em prompts paralelos. O coalescedor agrupa as transações
+pendentes (não resolvidas por regras) de todas as requisições em andamento
+dentro de uma janela curta, envia um único representante por comerciante e
+sinal ao modelo e distribui o resultado de volta via futures. Cada
+representante leva o usuário da requisição que o incluiu (`user_id`), para
+que o custo do lote seja dividido nos limites de taxa por usuário.
+
+Variáveis de ambiente (lidas por `get_default_coalescer`):
+- GEMINI_COALESCE_WINDOW_MS: janela de agrupamento em milissegundos (padrão: 20; 0 desliga).
+- GEMINI_COALESCE_MAX_BATCH: máximo de representantes por chamada agrupada (padrão: 500).
+"""
+
+import os
+import threading
+from concurrent.futures import Future, as_completed
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+from src.utils.metrics import REGISTRY
+from src.domain.merchants import canonical_merchant
+
+logger = get_logger(__name__)
+
+
+DEFAULT_WINDOW_MS = 20
+DEFAULT_MAX_BATCH = 500
+
+CATEGORY_FIELDS = ("category", "categorization_confidence", "categorization_reasoning")
+
+CoalesceKey = Tuple[str, str]
+ClassifyBatch = Callable[[List[Dict[str, Any]]], Iterable[Dict[str, Any]]]
+
+
+def coalesce_key(transaction: Dict[str, Any]) -> CoalesceKey:
+    """Chave de coalescência: comerciante canônico e sinal do valor."""
+    merchant = transaction.get("merchant") or canonical_merchant(str(transaction.get("name", "")))
+    sign = "credit" if (transaction.get("value") or 0.0) > 0 else "debit"
+    return merchant, sign
+
+
+def _failed_result() -> Dict[str, Any]:
+    return {
+        "category": "Outros",
+        "categorization_confidence": 0.0,
+        "categorization_reasoning": "Categorização automática falhou",
+    }
+
+
+class _Batch:
+    """Lote aberto: representantes e futures por chave"""
+
+    def __init__(self, classify: ClassifyBatch):
+        self.classify = classify
+        self.representatives: List[Dict[str, Any]] = []
+        self.keys: List[CoalesceKey] = []
+        self.futures: Dict[CoalesceKey, Future] = {}
+
+
+class ClassificationCoalescer:
+    """Agrupa transações pendentes de requisições simultâneas em chamadas compartilhadas"""
+
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_MS / 1000,
+                 max_batch_size: int = DEFAULT_MAX_BATCH):
+        self.window_seconds: float = window_seconds
+        self.max_batch_size: int = max_batch_size
+        self._lock = threading.Lock()
+        self._open: Optional[_Batch] = None
+        # Chaves já enviadas (ou aguardando envio) e ainda sem resultado
+        self._in_flight: Dict[CoalesceKey, Future] = {}
+
+    def categorize(self, transactions: List[Dict[str, Any]],
+                   classify: ClassifyBatch, user_id: Hashable = None) -> Iterator[Dict[str, Any]]:
+        """
+        Categoriza as transações, compartilhando chamadas com outras requisições
+
+        Bloqueia até os resultados chegarem; cada transação é entregue assim
+        que o resultado do seu representante fica pronto.
+
+        Args:
+            transactions: Transações pendentes desta requisição
+            classify: Função que categoriza um lote de representantes (usada
+                      se esta requisição abrir um novo lote)
+            user_id: Usuário da requisição, anotado nos representantes que ela incluir
+        """
+        waiting: Dict[Future, List[Dict[str, Any]]] = {}
+        coalesced = 0
+        to_dispatch: Optional[_Batch] = None
+
+        with self._lock:
+            for tx in transactions:
+                key = coalesce_key(tx)
+                future = self._in_flight.get(key)
+                if future is None:
+                    if self._open is None:
+                        self._open = _Batch(classify)
+                        timer = threading.Timer(self.window_seconds, self._flush_open, args=(self._open,))
+                        timer.daemon = True
+                        timer.start()
+                    future = Future()
+                    self._open.futures[key] = future
+                    self._open.keys.append(key)
+                    self._open.representatives.append({
+                        "id": len(self._open.representatives),
+                        "name": tx.get("name", ""),
+                        "merchant": tx.get("merchant"),
+                        "value": tx.get("value", 0.0),
+                        "date": tx.get("date", ""),
+                        "user_id": user_id,
+                    })
+                    self._in_flight[key] = future
+                    if len(self._open.representatives) >= self.max_batch_size:
+                        to_dispatch, self._open = self._open, None
+                else:
+                    coalesced += 1
+                waiting.setdefault(future, []).append(tx)
+
+        if to_dispatch is not None:
+            threading.Thread(target=self._run_batch, args=(to_dispatch,), name="coalescer-batch", daemon=True).start()
+
+        REGISTRY.inc("coalescer_transactions_total", len(transactions) - coalesced, labels={"result": "dispatched"})
+        REGISTRY.inc("coalescer_transactions_total", coalesced, labels={"result": "coalesced"})
+
+        for future in as_completed(waiting):
+            result = future.result()
+            for tx in waiting[future]:
+                tx_copy = tx.copy()
+                tx_copy.update(result)
+                yield tx_copy
+
+    def _flush_open(self, batch: _Batch) -> None:
+        with self._lock:
+            if self._open is not batch:
+                # Já despachado por tamanho
+                return
+            self._open = None
+        self._run_batch(batch)
+
+    def _run_batch(self, batch: _Batch) -> None:
+        logger.info("Coalescedor: despachando lote | representantes=%s", len(batch.representatives))
+        REGISTRY.inc("coalescer_batches_total")
+        try:
+            for result in batch.classify(batch.representatives):
+                index = result.get("id")
+                if not isinstance(index, int) or not 0 <= index < len(batch.keys):
+                    continue
+                self._resolve(batch, batch.keys[index], {field: result.get(field) for field in CATEGORY_FIELDS})
+        except Exception as e:
+            logger.error("Coalescedor: erro ao categorizar lote: %s", e)
+        finally:
+            for key in batch.keys:
+                self._resolve(batch, key, _failed_result())
+
+    def _resolve(self, batch: _Batch, key: CoalesceKey, result: Dict[str, Any]) -> None:
+        future = batch.futures[key]
+        if future.done():
+            return
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        future.set_result(result)
+
+
+@lru_cache(maxsize=1)
+def get_default_coalescer() -> Optional[ClassificationCoalescer]:
+    """Coalescedor compartilhado pelo processo, ou None se desligado."""
+    window_ms = float(os.getenv("GEMINI_COALESCE_WINDOW_MS", DEFAULT_WINDOW_MS))
+    if window_ms <= 0:
+        return None
+    max_batch = int(os.getenv("GEMINI_COALESCE_MAX_BATCH", DEFAULT_MAX_BATCH))
+    return ClassificationCoalescer(window_seconds=window_ms / 1000, max_batch_size=max_batch)
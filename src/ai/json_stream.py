@@ -0,0 +1,114 @@
+"""
+Parser JSON incremental para respostas de categorização
+
+Recebe o texto da resposta em pedaços (`feed`) e devolve cada item da lista
+de resultados (`{"r": [ {...}, {...} ]}`) assim que o objeto correspondente
+fecha, sem esperar o restante da resposta. Texto antes do primeiro `{` (ex.:
+cercas de markdown) e depois do fechamento do objeto raiz é ignorado; um
+item malformado é descartado sem invalidar os demais.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_ITEM_KEYS = ("r", "categorizations")
+
+
+class JsonItemStream:
+    """Extrai incrementalmente os objetos de `{"<chave>": [ ... ]}`"""
+
+    def __init__(self, item_keys: Iterable[str] = DEFAULT_ITEM_KEYS):
+        self.item_keys = tuple(item_keys)
+        self.items_parsed: int = 0
+        self.items_invalid: int = 0
+        self.started: bool = False
+        self.finished: bool = False
+
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._item_buffer: List[str] = []
+        self._item_start = -1
+        self._pending = ""
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consome um pedaço de texto e retorna os itens completados nele."""
+        if not chunk or self.finished:
+            return []
+
+        completed: List[Dict[str, Any]] = []
+        text = self._pending + chunk
+        self._pending = ""
+        stack = self._stack
+
+        for pos, ch in enumerate(text):
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    stack.append("{")
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(stack) == 1:
+                        self._last_string = text[self._string_start:pos]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos + 1
+            elif ch == ":" and len(stack) == 1:
+                self._current_key = self._last_string
+            elif ch in "{[":
+                if ch == "{" and stack == ["{", "["] and self._current_key in self.item_keys:
+                    self._item_start = pos
+                stack.append(ch)
+            elif ch in "}]":
+                if stack:
+                    stack.pop()
+                if ch == "}" and self._item_start != -1 and stack == ["{", "["]:
+                    item = self._finish_item(text[self._item_start:pos + 1])
+                    if item is not None:
+                        completed.append(item)
+                elif not stack:
+                    self.finished = True
+                    break
+
+        # Guarda o trecho do item ainda aberto para o próximo pedaço
+        if self._item_start != -1 and not self.finished:
+            self._item_buffer.append(text[self._item_start:])
+            self._item_start = 0
+        elif self._in_string and len(stack) == 1:
+            self._pending = text[self._string_start - 1:]
+            self._in_string = False
+        return completed
+
+    def _finish_item(self, tail: str) -> Optional[Dict[str, Any]]:
+        raw = "".join(self._item_buffer) + tail
+        self._item_buffer = []
+        self._item_start = -1
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError:
+            self.items_invalid += 1
+            return None
+        if not isinstance(item, dict):
+            self.items_invalid += 1
+            return None
+        self.items_parsed += 1
+        return item
+
+
+def iter_json_items(chunks: Iterable[str], item_keys: Iterable[str] = DEFAULT_ITEM_KEYS):
+    """Itera os itens de uma resposta recebida em pedaços."""
+    stream = JsonItemStream(item_keys)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
@@ -0,0 +1,265 @@
+"""
+Construção compacta de prompts de categorização e estimativa de tokens
+
+As transações são enviadas em formato tabular (`id|descrição|valor`) com ids
+curtos (posição no lote), descrições normalizadas e truncadas e, por padrão,
+sem data. A resposta pedida ao modelo é enxuta: apenas a categoria por id;
+confiança e justificativa são opcionais (`reasoning=True`). `response_schema`
+descreve esse formato como JSON schema (categoria restrita ao enum de
+categorias) para uso com a saída estruturada do Gemini.
+
+A estimativa de tokens é heurística (dígitos contam como um token cada, o
+restante ~4 caracteres por token), suficiente para dimensionar os lotes
+dentro dos limites de entrada e saída do modelo.
+
+Variáveis de ambiente (lidas por `prompt_builder_from_env`):
+- GEMINI_PROMPT_REASONING: pede confiança e justificativa por item (1/true/yes/on).
+- GEMINI_PROMPT_INCLUDE_DATE: inclui a data de cada transação no prompt.
+- GEMINI_PROMPT_MAX_NAME_CHARS: tamanho máximo da descrição enviada (padrão: 48).
+- GEMINI_MAX_INPUT_TOKENS: orçamento de tokens de entrada por chamada (padrão: 24000).
+- GEMINI_MAX_OUTPUT_TOKENS: orçamento de tokens de saída por chamada (padrão: 6000).
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_NAME_CHARS = 48
+DEFAULT_MAX_INPUT_TOKENS = 24000
+DEFAULT_MAX_OUTPUT_TOKENS = 6000
+
+CHARS_PER_TOKEN = 4
+# Custo aproximado de cada item da resposta, além dos dígitos do id
+LEAN_ITEM_OUTPUT_TOKENS = 14
+REASONING_ITEM_OUTPUT_TOKENS = 32
+# Envelope da resposta: {"r":[...]}
+ENVELOPE_OUTPUT_TOKENS = 8
+# Confiança atribuída quando o modelo não informa (mesmo padrão do parser legado)
+DEFAULT_CONFIDENCE = 0.5
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estima o número de tokens de um texto (dígitos valem um token cada)."""
+    if not text:
+        return 0
+    digits = sum(1 for ch in text if ch.isdigit())
+    return digits + math.ceil((len(text) - digits) / CHARS_PER_TOKEN)
+
+
+def _compact_name(name: Any, max_chars: int) -> str:
+    text = _WHITESPACE_RE.sub(" ", str(name or "")).replace("|", "/").strip()
+    return text[:max_chars].rstrip()
+
+
+def _compact_value(value: Any) -> str:
+    text = f"{float(value or 0.0):.2f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+class EncodedPrompt:
+    """Prompt pronto para envio, com o mapa de ids curtos e as estimativas"""
+
+    def __init__(self, text: str, id_map: Dict[str, Any], categories: Sequence[str],
+                 estimated_input_tokens: int, estimated_output_tokens: int):
+        self.text: str = text
+        self.id_map: Dict[str, Any] = id_map
+        self.categories: List[str] = list(categories)
+        self.estimated_input_tokens: int = estimated_input_tokens
+        self.estimated_output_tokens: int = estimated_output_tokens
+        self._known_ids = set(id_map.values())
+
+    def _resolve_category(self, raw: Any) -> Optional[str]:
+        if isinstance(raw, bool):
+            return None
+        if isinstance(raw, int) or (isinstance(raw, str) and raw.isdigit()):
+            index = int(raw)
+            return self.categories[index] if 0 <= index < len(self.categories) else None
+        if isinstance(raw, str) and raw in self.categories:
+            return raw
+        return None
+
+    def decode_item(self, item: Any) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """
+        Converte um item da resposta em (id original, categorização)
+
+        Aceita o formato enxuto (`{"i": 0, "c": "Saúde"}`, id curto) e o
+        formato legado (`{"id": ..., "category": ...}`, id original).
+        Retorna None para itens com id ou categoria desconhecidos.
+        """
+        if not isinstance(item, dict):
+            return None
+        if "i" in item:
+            original_id = self.id_map.get(str(item.get("i")))
+            category = self._resolve_category(item.get("c"))
+            confidence, reasoning = item.get("p", DEFAULT_CONFIDENCE), item.get("m", "")
+        else:
+            original_id = item.get("id")
+            if original_id not in self._known_ids:
+                return None
+            category = self._resolve_category(item.get("category"))
+            confidence, reasoning = item.get("confidence", DEFAULT_CONFIDENCE), item.get("reasoning", "")
+        if original_id is None or category is None:
+            return None
+        return original_id, {"category": category, "confidence": confidence, "reasoning": reasoning}
+
+    def decode(self, result: Dict[str, Any]) -> Dict[Any, Dict[str, Any]]:
+        """Converte uma resposta completa (`{"r": [...]}` ou `{"categorizations": [...]}`) em {id original: categorização}."""
+        decoded: Dict[Any, Dict[str, Any]] = {}
+        for item in list(result.get("r") or []) + list(result.get("categorizations") or []):
+            entry = self.decode_item(item)
+            if entry is not None:
+                decoded[entry[0]] = entry[1]
+        return decoded
+
+
+class PromptBuilder:
+    """Monta prompts compactos e dimensiona lotes por orçamento de tokens"""
+
+    def __init__(self, categories: Sequence[str], reasoning: bool = False,
+                 include_date: bool = False, max_name_chars: int = DEFAULT_MAX_NAME_CHARS):
+        self.categories: List[str] = list(categories)
+        self.reasoning: bool = reasoning
+        self.include_date: bool = include_date
+        self.max_name_chars: int = max_name_chars
+        self._header: str = self._build_header()
+        self._header_tokens: int = estimate_tokens(self._header) + estimate_tokens(self._build_footer())
+
+    def _build_header(self) -> str:
+        columns = "id|descricao|valor|data" if self.include_date else "id|descricao|valor"
+        category_list = ", ".join(self.categories)
+        return (
+            "Categorize transações financeiras pessoais por finalidade "
+            "(alimentação, transporte, saúde etc.), não por tipo de transação.\n"
+            f"Categorias: {category_list}\n"
+            "Regras: use apenas as categorias acima; na dúvida use Outros; "
+            "débitos (valor negativo) nunca são Renda; créditos podem ser Renda (ex.: salário).\n"
+            f"Transações ({columns}):\n"
+        )
+
+    def _build_footer(self) -> str:
+        if self.reasoning:
+            item = '{"i":0,"c":"Transporte","p":0.9,"m":"motivo curto"}'
+            fields = "i=id, c=categoria, p=confiança 0-1, m=justificativa curta"
+        else:
+            item = '{"i":0,"c":"Transporte"}'
+            fields = "i=id, c=categoria"
+        return (
+            f'Responda apenas com JSON válido, um item por transação: {{"r":[{item}]}} ({fields})'
+        )
+
+    def response_schema(self) -> Dict[str, Any]:
+        """JSON schema da resposta, com a categoria restrita às categorias conhecidas."""
+        properties: Dict[str, Any] = {
+            "i": {"type": "integer"},
+            "c": {"type": "string", "format": "enum", "enum": list(self.categories)},
+        }
+        required = ["i", "c"]
+        if self.reasoning:
+            properties["p"] = {"type": "number"}
+            properties["m"] = {"type": "string"}
+            required += ["p", "m"]
+        return {
+            "type": "object",
+            "properties": {
+                "r": {
+                    "type": "array",
+                    "items": {"type": "object", "properties": properties, "required": required},
+                },
+            },
+            "required": ["r"],
+        }
+
+    def _encode_line(self, short_id: str, tx: Dict[str, Any]) -> str:
+        fields = [short_id, _compact_name(tx.get("name"), self.max_name_chars), _compact_value(tx.get("value"))]
+        if self.include_date:
+            fields.append(str(tx.get("date", ""))[:10])
+        return "|".join(fields)
+
+    def _item_output_tokens(self, short_id: str) -> int:
+        per_item = REASONING_ITEM_OUTPUT_TOKENS if self.reasoning else LEAN_ITEM_OUTPUT_TOKENS
+        return per_item + len(short_id)
+
+    def estimate_transaction_tokens(self, tx: Dict[str, Any], position: int = 0) -> Dict[str, int]:
+        """Estima tokens de entrada e saída de uma transação na posição dada do lote."""
+        short_id = str(position)
+        return {
+            "input": estimate_tokens(self._encode_line(short_id, tx)) + 1,
+            "output": self._item_output_tokens(short_id),
+        }
+
+    def build(self, transactions: Sequence[Dict[str, Any]]) -> EncodedPrompt:
+        """Gera o prompt de um lote; os ids curtos são as posições no lote."""
+        lines = []
+        id_map: Dict[str, Any] = {}
+        output_tokens = ENVELOPE_OUTPUT_TOKENS
+        for position, tx in enumerate(transactions):
+            short_id = str(position)
+            id_map[short_id] = tx.get("id")
+            lines.append(self._encode_line(short_id, tx))
+            output_tokens += self._item_output_tokens(short_id)
+
+        body = "\n".join(lines)
+        text = f"{self._header}{body}\n{self._build_footer()}"
+        return EncodedPrompt(
+            text=text,
+            id_map=id_map,
+            categories=self.categories,
+            estimated_input_tokens=self._header_tokens + estimate_tokens(body) + len(lines),
+            estimated_output_tokens=output_tokens,
+        )
+
+    def chunk(self, transactions: Sequence[Dict[str, Any]],
+              max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+              max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS,
+              max_items: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Divide as transações em lotes que caibam nos orçamentos de tokens
+
+        Cada lote tem ao menos uma transação, mesmo que ela sozinha exceda o
+        orçamento.
+        """
+        chunks: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        input_used = self._header_tokens
+        output_used = ENVELOPE_OUTPUT_TOKENS
+        for tx in transactions:
+            cost = self.estimate_transaction_tokens(tx, len(current))
+            full = (
+                input_used + cost["input"] > max_input_tokens
+                or output_used + cost["output"] > max_output_tokens
+                or (max_items is not None and len(current) >= max_items)
+            )
+            if current and full:
+                chunks.append(current)
+                current = []
+                input_used = self._header_tokens
+                output_used = ENVELOPE_OUTPUT_TOKENS
+                cost = self.estimate_transaction_tokens(tx, 0)
+            current.append(tx)
+            input_used += cost["input"]
+            output_used += cost["output"]
+        if current:
+            chunks.append(current)
+        return chunks
+
+
+def prompt_builder_from_env(categories: Sequence[str]) -> PromptBuilder:
+    """Cria um PromptBuilder conforme as variáveis de ambiente."""
+    return PromptBuilder(
+        categories,
+        reasoning=os.getenv("GEMINI_PROMPT_REASONING", "").strip().lower() in _TRUE_VALUES,
+        include_date=os.getenv("GEMINI_PROMPT_INCLUDE_DATE", "").strip().lower() in _TRUE_VALUES,
+        max_name_chars=int(os.getenv("GEMINI_PROMPT_MAX_NAME_CHARS", DEFAULT_MAX_NAME_CHARS)),
+    )
+
+
+def token_budgets_from_env() -> Dict[str, int]:
+    """Retorna os orçamentos de tokens por chamada (entrada e saída)."""
+    return {
+        "max_input_tokens": int(os.getenv("GEMINI_MAX_INPUT_TOKENS", DEFAULT_MAX_INPUT_TOKENS)),
+        "max_output_tokens": int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", DEFAULT_MAX_OUTPUT_TOKENS)),
+    }
@@ -0,0 +1,273 @@
+"""
+Motor de regras determinísticas para categorização de transações
+
+Casos óbvios (ex.: "UBER", "IFOOD", "FARMACIA", "SALARIO") são resolvidos
+localmente, sem custo de chamada ao Gemini. Todas as palavras-chave são
+compiladas em um único autômato Aho-Corasick e os padrões regex em uma única
+expressão combinada, de forma que avaliar um extrato inteiro é linear no
+tamanho do texto.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import Counter, deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+from src.domain.categories import Category
+from src.domain.merchants import fold_text
+
+logger = get_logger(__name__)
+
+
+SUPPORTED_RULES_SCHEMA = 1
+DEFAULT_RULES_PATH = Path(__file__).resolve().parents[1] / "config" / "categorization_rules.json"
+
+SIGN_ANY = "any"
+SIGN_DEBIT = "debit"
+SIGN_CREDIT = "credit"
+_VALID_SIGNS = (SIGN_ANY, SIGN_DEBIT, SIGN_CREDIT)
+
+
+class Rule:
+    """Regra que associa palavras-chave/padrões a uma categoria"""
+
+    def __init__(self, id: str, category: Category, keywords: Optional[List[str]] = None,
+                 patterns: Optional[List[str]] = None, sign: str = SIGN_ANY,
+                 priority: int = 0, whole_word: bool = True, exclude: Optional[List[str]] = None):
+        if sign not in _VALID_SIGNS:
+            raise ValueError(f"Regra '{id}': sinal inválido '{sign}'")
+        if not keywords and not patterns:
+            raise ValueError(f"Regra '{id}': informe 'keywords' ou 'patterns'")
+        self.id: str = id
+        self.category: Category = category
+        self.keywords: List[str] = [fold_text(k) for k in (keywords or []) if k.strip()]
+        self.patterns: List[str] = list(patterns or [])
+        self.sign: str = sign
+        self.priority: int = priority
+        self.whole_word: bool = whole_word
+        # Palavras-chave que, presentes na descrição, anulam a regra (ex.: "UBER EATS" em transporte)
+        self.exclude: List[str] = [fold_text(k) for k in (exclude or []) if k.strip()]
+
+    def accepts_value(self, value: float) -> bool:
+        """Verifica se o sinal do valor é compatível com a regra."""
+        if self.sign == SIGN_DEBIT:
+            return value < 0
+        if self.sign == SIGN_CREDIT:
+            return value > 0
+        return True
+
+
+class KeywordAutomaton:
+    """Autômato Aho-Corasick para busca simultânea de várias palavras-chave"""
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+
+        for keyword, payload in keywords:
+            if not keyword:
+                continue
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((len(keyword), payload))
+
+        # Constrói os links de falha em largura (BFS)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """Itera (início, fim, payload) de todas as ocorrências no texto."""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = pos + 1
+                for length, payload in out[state]:
+                    yield end - length, end, payload
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    before_ok = start == 0 or not text[start - 1].isalnum()
+    after_ok = end == len(text) or not text[end].isalnum()
+    return before_ok and after_ok
+
+
+class RuleEngine:
+    """Avalia regras determinísticas antes da chamada ao modelo"""
+
+    def __init__(self, rules: List[Rule], version: str = ""):
+        self.rules: List[Rule] = list(rules)
+        self.version: str = version
+        self._hits: Counter = Counter()
+        self._lock = threading.Lock()
+
+        # Payload (índice da regra, é exclusão?): inclusões e exclusões saem da mesma varredura
+        self._automaton = KeywordAutomaton(
+            [(keyword, (index, False)) for index, rule in enumerate(self.rules) for keyword in rule.keywords]
+            + [(keyword, (index, True)) for index, rule in enumerate(self.rules) for keyword in rule.exclude]
+        )
+
+        alternatives = []
+        for index, rule in enumerate(self.rules):
+            for pattern in rule.patterns:
+                alternatives.append(f"(?P<r{index}_{len(alternatives)}>{pattern})")
+        self._combined_regex = re.compile("|".join(alternatives)) if alternatives else None
+
+    def match(self, name: str, value: float = 0.0) -> Optional[Rule]:
+        """
+        Retorna a regra vencedora para a descrição/valor, ou None
+
+        Vence a maior prioridade e, depois, a palavra-chave mais longa. Um
+        empate entre regras de categorias diferentes não é decidido pela
+        ordem do arquivo: a transação fica para o modelo.
+        """
+        text = fold_text(name)
+        if not text:
+            return None
+
+        # (prioridade, tamanho, -ordem)
+        candidates: List[Tuple[int, int, int]] = []
+        excluded = set()
+        for start, end, (index, is_exclusion) in self._automaton.iter_matches(text):
+            rule = self.rules[index]
+            if rule.whole_word and not _is_word_boundary(text, start, end):
+                continue
+            if is_exclusion:
+                excluded.add(index)
+            elif rule.accepts_value(value):
+                candidates.append((rule.priority, end - start, -index))
+
+        if self._combined_regex is not None:
+            for found in self._combined_regex.finditer(text):
+                index = int(found.lastgroup[1:].split("_", 1)[0])
+                if self.rules[index].accepts_value(value):
+                    candidates.append((self.rules[index].priority, found.end() - found.start(), -index))
+
+        candidates = [c for c in candidates if -c[2] not in excluded]
+        if not candidates:
+            return None
+        best = max(candidates)
+        tied = {self.rules[-c[2]].category for c in candidates if c[:2] == best[:2]}
+        if len(tied) > 1:
+            return None
+        return self.rules[-best[2]]
+
+    def apply(self, transactions: List[Dict[str, Any]]) -> Tuple[Dict[Any, Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Aplica as regras a uma lista de transações
+
+        Returns:
+            (categorizadas por id, transações pendentes para o modelo)
+        """
+        categorized: Dict[Any, Dict[str, Any]] = {}
+        pending: List[Dict[str, Any]] = []
+        hits: Counter = Counter()
+
+        for tx in transactions:
+            rule = self.match(str(tx.get("name", "")), tx.get("value", 0.0) or 0.0)
+            if rule is None:
+                pending.append(tx)
+                continue
+            hits[rule.id] += 1
+            tx_copy = tx.copy()
+            tx_copy["category"] = rule.category.value
+            tx_copy["categorization_confidence"] = 1.0
+            tx_copy["categorization_reasoning"] = f"Regra: {rule.id}"
+            categorized[tx.get("id")] = tx_copy
+
+        if hits:
+            with self._lock:
+                self._hits.update(hits)
+        return categorized, pending
+
+    def hit_counts(self) -> Dict[str, int]:
+        """Retorna uma cópia dos contadores de acerto por regra."""
+        with self._lock:
+            return dict(self._hits)
+
+    def reset_hit_counts(self) -> None:
+        with self._lock:
+            self._hits.clear()
+
+
+def _rule_from_dict(raw: Dict[str, Any]) -> Rule:
+    rule_id = str(raw.get("id") or "").strip()
+    if not rule_id:
+        raise ValueError("Regra sem 'id'")
+    try:
+        category = Category(raw.get("category"))
+    except ValueError:
+        raise ValueError(f"Regra '{rule_id}': categoria desconhecida '{raw.get('category')}'")
+    return Rule(
+        id=rule_id,
+        category=category,
+        keywords=raw.get("keywords"),
+        patterns=raw.get("patterns"),
+        sign=raw.get("sign", SIGN_ANY),
+        priority=int(raw.get("priority", 0)),
+        whole_word=bool(raw.get("whole_word", True)),
+        exclude=raw.get("exclude"),
+    )
+
+
+def load_rules(path: Optional[str] = None) -> RuleEngine:
+    """
+    Carrega regras de um arquivo JSON versionado
+
+    Args:
+        path: Caminho do arquivo. Se não fornecido, usa CATEGORIZATION_RULES_FILE
+              ou o arquivo padrão em src/config/categorization_rules.json
+
+    Raises:
+        ValueError: Se o arquivo tiver esquema não suportado ou regras inválidas
+    """
+    rules_path = Path(path or os.getenv("CATEGORIZATION_RULES_FILE") or DEFAULT_RULES_PATH)
+    with open(rules_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    schema = data.get("schema")
+    if schema != SUPPORTED_RULES_SCHEMA:
+        raise ValueError(f"Esquema de regras não suportado: {schema}")
+
+    rules = [_rule_from_dict(raw) for raw in data.get("rules", [])]
+    ids = [rule.id for rule in rules]
+    if len(ids) != len(set(ids)):
+        raise ValueError("Arquivo de regras contém ids duplicados")
+
+    engine = RuleEngine(rules, version=str(data.get("version", "")))
+    logger.info("Regras carregadas | versão=%s | regras=%s | arquivo=%s", engine.version, len(rules), rules_path)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_default_rule_engine() -> RuleEngine:
+    """Retorna o motor de regras padrão (carregado uma única vez por processo)."""
+    return load_rules()
@@ -3,13 +3,18 @@ Classificador de transações usando Google Gemini
 
 """
 
-import json
-import re
+import logging
 import os
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
-from src.utils.logger import get_logger
+from src.utils.logger import get_logger, log_payload
+from src.utils.rate_limit import acquire_gemini_call
 from src.domain.categories import Category
+from src.ai.rules import RuleEngine, get_default_rule_engine
+from src.ai.coalescer import ClassificationCoalescer, get_default_coalescer
+from src.ai.json_stream import JsonItemStream
+from src.ai.prompt import EncodedPrompt, PromptBuilder, prompt_builder_from_env, token_budgets_from_env
 
 logger = get_logger(__name__)
 
@@ -17,12 +22,17 @@ logger = get_logger(__name__)
 class TransactionClassifier:
     """Classificador de transações usando Google Gemini"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, rule_engine: Optional[RuleEngine] = None,
+                 prompt_builder: Optional[PromptBuilder] = None,
+                 coalescer: Optional[ClassificationCoalescer] = None):
         """
         Inicializa o classificador
         
         Args:
             api_key: Chave da API Google. Se não fornecida, usa GOOGLE_API_KEY do ambiente
+            rule_engine: Motor de regras determinísticas. Se não fornecido, usa as regras padrão
+            prompt_builder: Construtor de prompts. Se não fornecido, usa a configuração do ambiente
+            coalescer: Agrupa o trabalho pendente com outras requisições simultâneas (opcional)
         """
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
         if not self.api_key:
@@ -30,6 +40,14 @@ class TransactionClassifier:
         
         # Categorias padrão
         self.default_categories = [c.value for c in Category]
+
+        # Regras avaliadas antes de qualquer chamada ao modelo
+        self.rule_engine = rule_engine if rule_engine is not None else get_default_rule_engine()
+
+        # Prompt compacto e orçamento de tokens por chamada
+        self.prompt_builder = prompt_builder or prompt_builder_from_env(self.default_categories)
+        self.token_budgets = token_budgets_from_env()
+        self.coalescer = coalescer
         
         self.client = None
         self._initialize_client()
@@ -44,175 +62,204 @@ class TransactionClassifier:
         except ImportError:
             raise ImportError("Biblioteca 'google-generativeai' não instalada. Execute: pip install google-generativeai")
         except Exception as e:
-            logger.error(f"Erro ao inicializar cliente Gemini: {e}")
+            logger.error("Erro ao inicializar cliente Gemini: %s", e)
             raise
     
-    def categorize_transactions(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def categorize_transactions(self, transactions: List[Dict[str, Any]],
+                                user_id: Any = None) -> List[Dict[str, Any]]:
         """
         Categoriza uma lista de transações usando Gemini
         
         Args:
             transactions: Lista de transações no formato JSON
+            user_id: Usuário dono das transações (limites de taxa por usuário)
         
         Returns:
-            Lista de transações com categorias atribuídas
+            Lista de transações com categorias atribuídas, na ordem original
         """
         if not transactions:
             return []
+
+        by_id = {tx.get('id'): tx for tx in self.iter_categorize_transactions(transactions, user_id=user_id)}
+        return [by_id.get(tx.get('id')) or self._add_default_category(tx) for tx in transactions]
+
+    def iter_categorize_transactions(self, transactions: List[Dict[str, Any]],
+                                     stream: bool = False, user_id: Any = None) -> Iterator[Dict[str, Any]]:
+        """
+        Categoriza transações entregando cada resultado assim que fica pronto
+
+        Resultados por regra saem primeiro; os do modelo saem na ordem em que
+        chegam. Com `stream=True` a resposta do Gemini é gerada em streaming e
+        cada transação é entregue quando seu objeto JSON termina.
+
+        Args:
+            transactions: Lista de transações no formato JSON
+            stream: Usa geração em streaming na chamada ao modelo
+            user_id: Usuário dono das transações (limites de taxa por usuário)
+
+        Yields:
+            Transações categorizadas (uma vez cada), fora da ordem original
+        """
+        if not transactions:
+            return
         
         categories = self.default_categories
-        logger.info(f"AI: iniciando categorização | transações={len(transactions)} | categorias={len(categories)}")
-        
+        logger.info("AI: iniciando categorização | transações=%s | categorias=%s", len(transactions), len(categories))
+
+        # Casos óbvios resolvidos por regras, sem custo de chamada ao modelo
+        rule_categorized, pending = self.rule_engine.apply(transactions)
+        logger.info("AI: regras aplicadas | por_regra=%s | pendentes=%s", len(rule_categorized), len(pending))
+        yield from rule_categorized.values()
+        if not pending:
+            return
+        if self.coalescer is not None:
+            yield from self.coalescer.categorize(pending, lambda batch: self._categorize_with_model(batch, stream),
+                                                 user_id=user_id)
+        else:
+            yield from self._categorize_with_model(pending, stream, user_id)
+
+    def _categorize_with_model(self, transactions: List[Dict[str, Any]],
+                               stream: bool = False, user_id: Any = None) -> Iterator[Dict[str, Any]]:
+        """Categoriza via Gemini as transações não resolvidas pelas regras, em lotes por orçamento de tokens"""
+        chunks = self.prompt_builder.chunk(transactions, **self.token_budgets)
+        logger.info("AI: lotes planejados | transações=%s | lotes=%s", len(transactions), len(chunks))
+
+        num_outros = 0
+        for chunk in chunks:
+            for tx in self._categorize_chunk(chunk, stream, user_id):
+                if tx.get('category') == 'Outros':
+                    num_outros += 1
+                yield tx
+
+        # Estatísticas de saída
+        logger.info("AI: categorização concluída | total=%s | outros=%s", len(transactions), num_outros)
+
+    def _categorize_chunk(self, transactions: List[Dict[str, Any]],
+                          stream: bool = False, user_id: Any = None) -> Iterator[Dict[str, Any]]:
+        """Categoriza um lote com uma única chamada ao modelo"""
+        remaining = {tx.get('id'): tx for tx in transactions}
         try:
-            # Prepara o prompt para o Gemini
-            prompt = self._build_categorization_prompt(transactions, categories)
-            logger.info(f"AI: prompt construído | tamanho={len(prompt)}")
+            # Prepara o prompt compacto para o Gemini
+            encoded = self.prompt_builder.build(transactions)
+            logger.info(
+                "AI: prompt construído | transações=%s | tamanho=%s | tokens_entrada~%s | tokens_saida~%s",
+                len(transactions), len(encoded.text), encoded.estimated_input_tokens, encoded.estimated_output_tokens,
+            )
             
+            # Respeita os limites de requisições/tokens por minuto, globais e por
+            # usuário (espera em vez de falhar). Lotes do coalescedor trazem o
+            # usuário de cada representante e o custo é dividido entre eles
+            shares = Counter(tx['user_id'] for tx in transactions if tx.get('user_id') is not None)
+            waited = acquire_gemini_call(encoded.estimated_input_tokens + encoded.estimated_output_tokens,
+                                         user_id, user_shares=shares or None)
+            if waited:
+                logger.info("AI: chamada adiada pelo limite de taxa | espera=%.2fs", waited)
+
             # Chama a API do Gemini
-            response = self._call_gemini_api(prompt)
-            logger.info(f"AI: resposta recebida da API | tamanho={len(response) if response else 0}")
+            if stream:
+                pieces = self._stream_gemini_api(encoded.text)
+            else:
+                pieces = [self._call_gemini_api(encoded.text)]
             
-            # Processa a resposta
-            categorized_transactions = self._process_categorization_response(
-                response, transactions
-            )
-            # Estatísticas de saída
-            num_outros = sum(1 for tx in categorized_transactions if tx.get('category') == 'Outros')
-            logger.info(f"AI: categorização concluída | total={len(transactions)} | outros={num_outros}")
-            return categorized_transactions
+            # Aplica as categorizações conforme os itens da resposta completam
+            for tx in self._process_categorization_response(pieces, transactions, encoded):
+                remaining.pop(tx.get('id'), None)
+                yield tx
             
         except Exception as e:
-            logger.error(f"AI: erro na categorização: {e}")
-            # Retorna transações sem categorização em caso de erro
-            return [self._add_default_category(tx) for tx in transactions]
-    
-    def _build_categorization_prompt(self, transactions: List[Dict[str, Any]], 
-                                   categories: List[str]) -> str:
-        """Constrói o prompt para o Gemini"""
-        
-        # Formata as transações para o prompt
-        transactions_text = ""
-        for tx in transactions:
-            transactions_text += f"ID: {tx['id']} | {tx['name']} - R$ {tx['value']:.2f} ({tx['date']})\n"
-        
-        prompt = f"""
-Você é um especialista em categorização de transações financeiras pessoais. 
-Analise as seguintes transações e categorize cada uma usando APENAS as categorias fornecidas.
-
-Categorias disponíveis: {', '.join(categories)}
-
-Transações para categorizar:
-{transactions_text}
-
-IMPORTANTE:
-- Responda APENAS no formato JSON válido
-- Use apenas as categorias fornecidas
-- Para cada transação, forneça a categoria mais adequada
-- Utilize o campo 'id' de cada transação para identificar no resultado
-- Se uma transação não se encaixar bem em nenhuma categoria, use "Outros"
-- NÃO use categorias de tipo de transação (ex.: "Transferências", "Receita")
-- Classifique por finalidade/tema (ex.: alimentação, transporte, saúde etc.)
-- Créditos (valor positivo) podem ser "Renda" (ex.: salário). Débitos (valor negativo) não podem ser "Renda"
-
-Formato da resposta:
-{{
-    "categorizations": [
-        {{"id": 123, "category": "Alimentação", "confidence": 0.9, "reasoning": "Restaurante identificado no nome"}},
-        {{"id": 456, "category": "Transporte", "confidence": 0.8, "reasoning": "Uber identificado"}}
-    ]
-}}
-
-Responda apenas com o JSON, sem texto adicional:
-"""
-        
-        return prompt
+            logger.error("AI: erro na categorização: %s", e)
+            # Transações ainda sem resultado ficam com a categoria padrão
+            for tx in remaining.values():
+                yield self._add_default_category(tx)
     
+    def _generation_config(self) -> Optional[Dict[str, Any]]:
+        """Saída estruturada: JSON restrito ao schema do PromptBuilder (desligável via GEMINI_STRUCTURED_OUTPUT=0)"""
+        if os.getenv("GEMINI_STRUCTURED_OUTPUT", "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        return {
+            "response_mime_type": "application/json",
+            "response_schema": self.prompt_builder.response_schema(),
+        }
+
+    def _get_model(self):
+        """Instancia o modelo configurado"""
+        # Usa um único modelo: override via GEMINI_MODEL_ID, senão padrão free-tier amigável
+        model_name = os.getenv("GEMINI_MODEL_ID", "gemini-1.5-flash-8b").strip() or "gemini-1.5-flash-8b"
+        logger.info("AI: usando modelo '%s'", model_name)
+        generation_config = self._generation_config()
+        if generation_config:
+            return model_name, self.client.GenerativeModel(model_name, generation_config=generation_config)
+        return model_name, self.client.GenerativeModel(model_name)
+
     def _call_gemini_api(self, prompt: str) -> str:
         """Chama a API do Gemini"""
         try:
-            # Usa um único modelo: override via GEMINI_MODEL_ID, senão padrão free-tier amigável
-            model_name = os.getenv("GEMINI_MODEL_ID", "gemini-1.5-flash-8b").strip() or "gemini-1.5-flash-8b"
-            logger.info(f"AI: usando modelo '{model_name}'")
-            model = self.client.GenerativeModel(model_name)
+            model_name, model = self._get_model()
             response = model.generate_content(prompt)
             text = (response.text or "").strip()
-            logger.info(f"AI: resposta do modelo '{model_name}' (completa):\n{text}")
+            logger.info("AI: resposta recebida da API | tamanho=%s", len(text))
+            log_payload(logger, f"AI: resposta do modelo '{model_name}'", text)
             return text
             
         except Exception as e:
-            logger.error(f"AI: erro ao chamar API do Gemini: {e}")
+            logger.error("AI: erro ao chamar API do Gemini: %s", e)
             raise
-    
-    def _process_categorization_response(self, response: str, 
-                                       original_transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Processa a resposta do Gemini e aplica as categorizações"""
+
+    def _stream_gemini_api(self, prompt: str) -> Iterator[str]:
+        """Chama a API do Gemini em streaming, entregando os pedaços de texto conforme chegam"""
         try:
-            # Remove cercas de código markdown e extrai apenas o JSON
-            logger.info(f"AI: iniciando parse da resposta | tamanho={len(response) if response else 0}")
-            cleaned = self._extract_json_from_text(response)
-            logger.info(f"AI: JSON extraído (completo):\n{cleaned}")
-            # Parse da resposta JSON
-            result = json.loads(cleaned)
-            categorizations = result.get('categorizations', [])
-            logger.info(f"AI: itens em 'categorizations' = {len(categorizations)}")
-            
-            # Cria um mapa de categorizações por id
-            categorization_map = {}
-            for cat in categorizations:
-                tx_id = cat.get('id')
-                if tx_id is not None:
-                    categorization_map[tx_id] = cat
-            
-            # Aplica as categorizações
-            categorized_transactions = []
-            for tx in original_transactions:
-                tx_copy = tx.copy()
-                tx_id = tx.get('id')
-                if tx_id in categorization_map:
-                    cat_info = categorization_map[tx_id]
-                    tx_copy['category'] = cat_info['category']
-                    tx_copy['categorization_confidence'] = cat_info.get('confidence', 0.5)
-                    tx_copy['categorization_reasoning'] = cat_info.get('reasoning', '')
-                else:
-                    tx_copy['category'] = 'Outros'
-                    tx_copy['categorization_confidence'] = 0.0
-                    tx_copy['categorization_reasoning'] = 'Não foi possível categorizar'
-                categorized_transactions.append(tx_copy)
-            
-            logger.info(f"AI: mapeamento aplicado | categorizadas={len(categorized_transactions)}")
-            return categorized_transactions
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"AI: erro JSONDecode ao processar resposta: {e}")
-            logger.error(f"AI: resposta recebida (completa): {str(response)}")
-            # Retorna transações sem categorização em caso de erro de parsing
-            return [self._add_default_category(tx) for tx in original_transactions]
+            model_name, model = self._get_model()
+            received = []
+            for chunk in model.generate_content(prompt, stream=True):
+                try:
+                    text = chunk.text or ""
+                except ValueError:
+                    # Pedaços sem partes de texto (ex.: apenas finish_reason)
+                    continue
+                received.append(text)
+                yield text
+            response = "".join(received)
+            logger.info("AI: resposta recebida da API (streaming) | pedaços=%s | tamanho=%s", len(received), len(response))
+            log_payload(logger, f"AI: resposta do modelo '{model_name}'", response)
+
         except Exception as e:
-            logger.error(f"AI: erro ao processar categorizações: {e}")
-            return [self._add_default_category(tx) for tx in original_transactions]
+            logger.error("AI: erro ao chamar API do Gemini: %s", e)
+            raise
+    
+    def _process_categorization_response(self, response_pieces: Iterable[str],
+                                       original_transactions: List[Dict[str, Any]],
+                                       encoded: EncodedPrompt) -> Iterator[Dict[str, Any]]:
+        """Processa a resposta do Gemini e aplica as categorizações conforme os itens chegam"""
+        # Cada item é aplicado assim que seu objeto JSON fecha; itens
+        # malformados ou uma resposta truncada não descartam os demais
+        stream = JsonItemStream()
+        remaining = {tx.get('id'): tx for tx in original_transactions}
+        received = []
+        for piece in response_pieces:
+            received.append(piece)
+            for item in stream.feed(piece):
+                entry = encoded.decode_item(item)
+                if entry is None or entry[0] not in remaining:
+                    continue
+                tx_copy = remaining.pop(entry[0]).copy()
+                tx_copy['category'] = entry[1]['category']
+                tx_copy['categorization_confidence'] = entry[1]['confidence']
+                tx_copy['categorization_reasoning'] = entry[1]['reasoning']
+                yield tx_copy
 
-    def _extract_json_from_text(self, text: str) -> str:
-        """Extrai o bloco JSON de uma string possivelmente cercada por markdown.
+        categorized = len(original_transactions) - len(remaining)
+        logger.info("AI: itens categorizados na resposta = %s | inválidos=%s", categorized, stream.items_invalid)
+        if not categorized:
+            log_payload(logger, "AI: resposta sem categorizações válidas", "".join(received),
+                        level=logging.ERROR, sample=False)
 
-        Aceita formatos como:
-        ```json
-        { ... }
-        ```
-        ou texto com JSON embutido. Se não encontrar, retorna o texto original.
-        """
-        if not text:
-            return text
-        text = text.strip()
-        fence_pattern = re.compile(r"```(?:json)?\s*([\s\S]*?)```", re.IGNORECASE)
-        match = fence_pattern.search(text)
-        if match:
-            return match.group(1).strip()
-        # fallback: tenta recortar do primeiro '{' até o último '}'
-        start = text.find('{')
-        end = text.rfind('}')
-        if start != -1 and end != -1 and end > start:
-            return text[start:end+1].strip()
-        return text
+        # Transações ausentes na resposta
+        for tx in remaining.values():
+            tx_copy = tx.copy()
+            tx_copy['category'] = 'Outros'
+            tx_copy['categorization_confidence'] = 0.0
+            tx_copy['categorization_reasoning'] = 'Não foi possível categorizar'
+            yield tx_copy
     
     def _add_default_category(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
         """Adiciona categoria padrão a uma transação"""
@@ -224,16 +271,29 @@ Responda apenas com o JSON, sem texto adicional:
 
 
 def categorize_with_gemini(transactions: List[Dict[str, Any]], 
-                          api_key: Optional[str] = None) -> List[Dict[str, Any]]:
+                          api_key: Optional[str] = None,
+                          on_progress: Optional[Callable[[int, int], None]] = None,
+                          user_id: Any = None) -> List[Dict[str, Any]]:
     """
     Função de conveniência para categorizar transações com Gemini
     
     Args:
         transactions: Lista de transações no formato JSON
         api_key: Chave da API Google (opcional)
+        on_progress: Callback (categorizadas, total) chamado a cada resultado.
+                     Quando fornecido, a resposta do modelo é lida em streaming
+        user_id: Usuário dono das transações (limites de taxa por usuário)
     
     Returns:
         Lista de transações categorizadas
     """
-    classifier = TransactionClassifier(api_key)
-    return classifier.categorize_transactions(transactions)
+    classifier = TransactionClassifier(api_key, coalescer=get_default_coalescer())
+    if on_progress is None:
+        return classifier.categorize_transactions(transactions, user_id=user_id)
+
+    total = len({tx.get('id') for tx in transactions})
+    by_id: Dict[Any, Dict[str, Any]] = {}
+    for tx in classifier.iter_categorize_transactions(transactions, stream=True, user_id=user_id):
+        by_id[tx.get('id')] = tx
+        on_progress(len(by_id), total)
+    return [by_id.get(tx.get('id')) or classifier._add_default_category(tx) for tx in transactions]
@@ -26,6 +26,27 @@ class TelegramMessages:
 
     DETECTED_TYPE = "📂 Tipo de arquivo detectado: **{file_type}**."
 
+    # Progresso da categorização (anexado à mensagem de recebimento)
+    CATEGORIZATION_PROGRESS = "\n\n🤖 {done}/{total} categorizadas"
+
+    # Linhas do arquivo ignoradas ou corrigidas no parse (legenda do resultado)
+    PARSE_DIAGNOSTICS = "⚠️ Linhas com problemas no arquivo: {count} ({reasons})"
+
+    # Resumo mensal (/resumo)
+    SUMMARY_HEADER = "📊 *Resumo de {month}*"
+    SUMMARY_CATEGORY_LINE = "- {category}: {spent} ({count})"
+    SUMMARY_TOTAL = "💸 Total de gastos: {spent}\n💰 Entradas: {received}"
+    SUMMARY_EMPTY = (
+        "📭 Ainda não há transações salvas para {period}.\n"
+        "Envie um extrato **CSV** ou **OFX** para começar."
+    )
+    SUMMARY_CATEGORY_EMPTY = "📭 Nenhum gasto com *{category}* em {month}."
+    SUMMARY_USAGE = (
+        "ℹ️ Uso: /resumo [categoria] [mês] [ano]\n"
+        "Exemplos: /resumo · /resumo setembro · /resumo Alimentação 09/2024"
+    )
+    SUMMARY_UNAVAILABLE = "⚠️ O resumo mensal não está disponível no momento."
+
     # Avisos de tipo não suportado
     UNSUPPORTED_FILE = (
         "❌ Não consegui processar o arquivo **{file_name}**.\n\n"
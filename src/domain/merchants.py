@@ -0,0 +1,184 @@
+"""
+Normalização e canonicalização de nomes de comerciantes
+
+Descritores bancários variam muito ("PAG*IFOOD 1234", "IFOOD *SAO PAULO",
+"IFD*IFOOD.COM"). Este módulo reduz cada descritor a um nome normalizado e a
+um id compacto e estável de comerciante, usado como chave por regras, caches
+e armazenamento.
+"""
+
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+DEFAULT_MERCHANTS_PATH = Path(__file__).resolve().parents[1] / "config" / "merchants.json"
+
+MAX_MERCHANT_ID_LENGTH = 48
+
+# Prefixos de adquirentes/intermediadores que antecedem o nome real ("PAG*IFOOD")
+_ACQUIRER_PREFIXES = frozenset({
+    "PAG", "PG", "PAGSEGURO", "MP", "MERCADOPAGO", "MERCPAGO", "PAYPAL", "PP", "SUMUP",
+    "EC", "EBANX", "EBN", "DL", "HTM", "PICPAY", "STONE", "CIELO", "GETNET", "IFD",
+    "IZ", "SQ", "ZP", "PAGAR ME", "PAGARME",
+})
+
+# Frases de tipo de operação no início do descritor
+_OPERATION_PREFIX_RE = re.compile(
+    r"^(?:(?:PIX|TED|DOC|TRANSF(?:ERENCIA)?)(?:\s+(?:ENVIADO|ENVIADA|RECEBIDO|RECEBIDA|QRS|QR|PIX))*"
+    r"|COMPRA(?:\s+(?:NO|COM|CARTAO|DEBITO|CREDITO|ELO|VISA|MASTER|INTERNACIONAL))*"
+    r"|PAG(?:AMENTO|TO)?\s+(?:DE\s+)?BOLETO|PAGTO|PGTO|DEB(?:ITO)?\s+AUT(?:OM(?:ATICO)?)?"
+    r"|DEBITO|CREDITO)\b[\s\-:]*"
+)
+_DATE_RE = re.compile(r"\b\d{1,2}[/\-.]\d{1,2}(?:[/\-.]\d{2,4})?\b")
+_TIME_RE = re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\b")
+_DOMAIN_SUFFIX_RE = re.compile(r"\.(?:COM|NET|ORG)(?:\.BR)?\b")
+_STORE_NUMBER_RE = re.compile(r"\b(?:LJ|LOJA|FILIAL|UNID|UN)\s*\d+\b")
+_NON_ALNUM_RE = re.compile(r"[^A-Z0-9 ]+")
+_SPACES_RE = re.compile(r"\s+")
+_TRAILING_NOISE_RE = re.compile(
+    r"(?:\s+(?:#?\d+|LTDA|ME|EPP|EIRELI|SA|S A|CIA|BR|BRA|BRASIL"
+    r"|AC|AL|AP|AM|BA|CE|DF|ES|GO|MA|MT|MS|MG|PA|PB|PR|PE|PI|RJ|RN|RS|RO|RR|SC|SP|SE|TO))+$"
+)
+_CITY_SUFFIXES = (
+    "SAO PAULO", "RIO DE JANEIRO", "BELO HORIZONTE", "CURITIBA", "PORTO ALEGRE", "BRASILIA",
+    "SALVADOR", "RECIFE", "FORTALEZA", "CAMPINAS", "OSASCO", "BARUERI", "GOIANIA", "MANAUS",
+    "BELEM", "FLORIANOPOLIS", "SANTOS", "NITEROI", "GUARULHOS", "SAO BERNARDO DO CAMPO",
+    "SANTO ANDRE", "VITORIA", "NATAL", "JOAO PESSOA", "MACEIO", "CUIABA", "CAMPO GRANDE",
+    "TERESINA", "ARACAJU", "SAO LUIS", "RIBEIRAO PRETO", "UBERLANDIA", "JOINVILLE", "LONDRINA",
+)
+_CITY_SUFFIX_RE = re.compile(r"\s+(?:" + "|".join(_CITY_SUFFIXES) + r")$")
+
+
+def fold_text(text: str) -> str:
+    """Remove acentos e converte para maiúsculas."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.upper()
+
+
+def _strip_acquirer(text: str) -> str:
+    """Remove prefixos de adquirentes e descarta o complemento após '*'."""
+    segments = [seg.strip() for seg in text.split("*")]
+    while len(segments) > 1 and segments[0] in _ACQUIRER_PREFIXES:
+        segments.pop(0)
+    for segment in segments:
+        if segment:
+            return segment
+    return text
+
+
+@lru_cache(maxsize=65536)
+def normalize_merchant_name(name: str) -> str:
+    """
+    Normaliza um descritor bancário para o nome do comerciante
+
+    Remove acentos, caixa, prefixos de cartão/PIX, datas, horários, números
+    de loja, sufixos societários e de cidade/UF.
+
+    Example:
+        >>> normalize_merchant_name("PAG*IFOOD 1234")
+        'IFOOD'
+    """
+    text = fold_text(name).strip()
+    if not text:
+        return ""
+
+    text = _strip_acquirer(text)
+    text = _OPERATION_PREFIX_RE.sub("", text, count=1)
+    text = _DOMAIN_SUFFIX_RE.sub("", text)
+    text = _DATE_RE.sub(" ", text)
+    text = _TIME_RE.sub(" ", text)
+    text = _STORE_NUMBER_RE.sub(" ", text)
+    text = _NON_ALNUM_RE.sub(" ", text)
+    text = _SPACES_RE.sub(" ", text).strip()
+
+    cleaned = _TRAILING_NOISE_RE.sub("", text)
+    cleaned = _CITY_SUFFIX_RE.sub("", cleaned)
+    cleaned = _TRAILING_NOISE_RE.sub("", cleaned).strip()
+    if cleaned:
+        return cleaned
+    if text:
+        return text
+    # Descritor só com ruído: mantém a forma dobrada, apenas alfanumérica
+    return _SPACES_RE.sub(" ", _NON_ALNUM_RE.sub(" ", fold_text(name))).strip()
+
+
+def _slugify(normalized: str) -> str:
+    slug = normalized.lower().replace(" ", "-")
+    return slug[:MAX_MERCHANT_ID_LENGTH].rstrip("-")
+
+
+class MerchantIndex:
+    """Índice pré-computado de aliases normalizados para ids canônicos"""
+
+    # Número máximo de palavras iniciais consideradas na busca por alias
+    MAX_ALIAS_TOKENS = 4
+
+    def __init__(self, merchants: Dict[str, Iterable[str]], version: str = ""):
+        self.version: str = version
+        self._aliases: Dict[str, str] = {}
+        for merchant_id, aliases in merchants.items():
+            for alias in list(aliases) + [merchant_id]:
+                normalized = normalize_merchant_name(alias)
+                if normalized:
+                    self._aliases.setdefault(normalized, merchant_id)
+                    self._aliases.setdefault(normalized.replace(" ", ""), merchant_id)
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def lookup(self, normalized: str) -> Optional[str]:
+        """Busca o id canônico pelo maior prefixo de palavras conhecido."""
+        if not normalized:
+            return None
+        found = self._aliases.get(normalized)
+        if found:
+            return found
+        tokens = normalized.split(" ")
+        for size in range(min(len(tokens) - 1, self.MAX_ALIAS_TOKENS), 0, -1):
+            found = self._aliases.get(" ".join(tokens[:size]))
+            if found:
+                return found
+        return None
+
+    def resolve(self, name: str) -> str:
+        """Retorna o id compacto do comerciante para um descritor bruto."""
+        normalized = normalize_merchant_name(name)
+        return self.lookup(normalized) or _slugify(normalized)
+
+
+def load_merchant_index(path: Optional[str] = None) -> MerchantIndex:
+    """Carrega o índice de comerciantes canônicos de um arquivo JSON."""
+    index_path = Path(path or DEFAULT_MERCHANTS_PATH)
+    with open(index_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    index = MerchantIndex(data.get("merchants", {}), version=str(data.get("version", "")))
+    logger.info("Índice de comerciantes carregado | versão=%s | aliases=%s", index.version, len(index))
+    return index
+
+
+@lru_cache(maxsize=1)
+def get_default_merchant_index() -> MerchantIndex:
+    """Retorna o índice padrão (carregado uma única vez por processo)."""
+    return load_merchant_index()
+
+
+@lru_cache(maxsize=65536)
+def canonical_merchant(name: str) -> str:
+    """Função de conveniência: id canônico do comerciante usando o índice padrão."""
+    return get_default_merchant_index().resolve(name)
+
+
+def canonical_merchants(names: Iterable[str]) -> List[str]:
+    """Resolve vários descritores de uma vez."""
+    return [canonical_merchant(name) for name in names]
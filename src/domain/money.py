@@ -0,0 +1,67 @@
+"""
+Valores monetários em centavos inteiros
+
+Valores entram no pipeline como texto (CSV) ou `Decimal` (OFX) e são
+convertidos uma única vez para centavos inteiros, sem passar por `float`.
+Somas e agregações sobre centavos são exatas; o `float` em reais só existe
+como visão de compatibilidade (`Expense.value`, campo "value" das
+transações). A moeda (`currency`, código ISO) acompanha os centavos em todo
+o pipeline: valores de moedas diferentes nunca são somados.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+DEFAULT_CURRENCY = "BRL"
+CENTS_FIELD = "value_cents"
+CURRENCY_FIELD = "currency"
+
+_CENT = Decimal("0.01")
+
+
+def cents_from_decimal(amount: Decimal) -> int:
+    """Centavos de um Decimal, arredondando meio centavo para longe do zero."""
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def cents_from_float(amount: float) -> int:
+    """Centavos de um float em reais (entrada legada: valores já em float)."""
+    return int(round(amount * 100))
+
+
+def cents_from_str(text: str) -> Optional[int]:
+    """
+    Centavos de um número decimal normalizado ("-1234.5", "10", ".99")
+
+    O caminho comum (até duas casas decimais) usa só aritmética de inteiros;
+    notação científica e casas extras passam por `Decimal`. Retorna None se o
+    texto não for um número.
+    """
+    negative = text.startswith("-")
+    digits = text[1:] if negative or text.startswith("+") else text
+    units, _, fraction = digits.partition(".")
+    if (units.isdecimal() or (not units and fraction)) and (not fraction or fraction.isdecimal()) and len(fraction) <= 2:
+        cents = int(units or "0") * 100 + int(fraction.ljust(2, "0") or "0")
+        return -cents if negative else cents
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        return None
+    if not amount.is_finite():
+        return None
+    return cents_from_decimal(amount)
+
+
+def cents_to_str(cents: int) -> str:
+    """Texto decimal com duas casas ("-45.90"), sem passar por float."""
+    units, fraction = divmod(abs(cents), 100)
+    return f"{'-' if cents < 0 else ''}{units}.{fraction:02d}"
+
+
+def transaction_cents(transaction: Dict[str, Any]) -> int:
+    """Centavos de uma transação (dict): usa `value_cents` e, na falta dele, o float legado."""
+    cents = transaction.get(CENTS_FIELD)
+    if cents is not None:
+        return int(cents)
+    return cents_from_float(float(transaction.get("value") or 0.0))
+
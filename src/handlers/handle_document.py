@@ -6,17 +6,24 @@ from src.config.messages import TelegramMessages
 from telegram.helpers import escape_markdown
 
 import os
-import json
+import time
+import asyncio
 import tempfile
 from pathlib import Path
 from datetime import datetime
 import shutil
-import csv
 
 from src.parsers.csv import parse_csv_bank_statement
 from src.parsers.ofx import parse_ofx_file
 from src.ai.transaction_classifier import categorize_with_gemini
-from src.utils import format_currency
+from src.utils import currency_symbol, format_cents_column
+from src.domain.money import CENTS_FIELD, CURRENCY_FIELD, transaction_cents
+from src.utils.metrics import REGISTRY, span, timed
+from src.utils.rate_limit import telegram_throttle
+from src.storage.fingerprint import FINGERPRINT_FIELD, assign_fingerprints
+from src.storage.store import get_default_store, incremental_processing_enabled, partition_known
+from src.reports.statistics import format_report_lines, report_from_transactions
+from src.reports.writers import ARTIFACT_CSV, ARTIFACT_JSON, resolve_artifact_formats, write_artifacts
 
 import boto3
 import hashlib
@@ -25,6 +32,10 @@ logger = get_logger(__name__)
 
 
 MAX_FILE_SIZE_MB = 10
+# Limite do Telegram para legendas de documentos
+MAX_CAPTION_CHARS = 1024
+# Intervalo mínimo entre edições da mensagem de progresso (limites de flood do Telegram)
+PROGRESS_UPDATE_INTERVAL_SECONDS = 1.5
 
 
 def _detect_file_type(file_name: str):
@@ -45,6 +56,7 @@ def _sanitize_filename(name: str) -> str:
   return base or "arquivo"
 
 
+@timed("hash")
 def _compute_file_sha256(file_path: str) -> str:
   """Calcula o SHA-256 do arquivo para uso como chave de cache."""
   hasher = hashlib.sha256()
@@ -54,6 +66,7 @@ def _compute_file_sha256(file_path: str) -> str:
   return hasher.hexdigest()
 
 
+@timed("download")
 async def _download_document_to_temp(context: ContextTypes.DEFAULT_TYPE, document, dest_dir: str) -> str:
   """Baixa o arquivo do Telegram para um diretório temporário e retorna o caminho local."""
   # Verifica tamanho
@@ -68,10 +81,11 @@ async def _download_document_to_temp(context: ContextTypes.DEFAULT_TYPE, documen
   local_path = Path(dest_dir) / safe_name
   tg_file = await context.bot.get_file(document.file_id)
   await tg_file.download_to_drive(local_path)
-  logger.info(f"Arquivo baixado para {local_path}")
+  logger.info("Arquivo baixado para %s", local_path)
   return local_path
 
 
+@timed("parse")
 def _parse_file_to_statement(file_path: str, file_type: str):
   """Parseia o arquivo (CSV/OFX) e retorna um ParsedBankStatement."""
   if file_type == "csv":
@@ -87,20 +101,69 @@ def _statement_to_transactions(statement) -> list:
     {
       "id": expense.id,
       "name": expense.name,
-      "value": float(expense.value),
+      "merchant": expense.merchant,
+      # Centavos exatos; o float em reais fica para consumidores legados (prompt, regras)
+      "value": expense.cents / 100,
+      CENTS_FIELD: expense.cents,
+      CURRENCY_FIELD: expense.currency,
       "date": expense.date.isoformat(),
     }
     for expense in statement.expenses
   ]
 
 
-def _categorize_with_ai(transactions: list) -> tuple:
-  """Tenta categorizar via Gemini. Retorna (transactions, ai_ok)."""
+@timed("history_lookup")
+def _split_known_transactions(user_id: int, transactions: list) -> tuple:
+  """Separa transações já categorizadas em envios anteriores. Retorna (reaproveitadas por fingerprint, novas)."""
+  assign_fingerprints(transactions)
+  if not incremental_processing_enabled():
+    return {}, transactions
   try:
-    categorized = categorize_with_gemini(transactions)
+    return partition_known(get_default_store(), user_id, transactions)
+  except Exception as e:
+    logger.warning("Falha ao consultar histórico de transações: %s", e)
+    return {}, transactions
+
+
+@timed("history_save")
+def _remember_statement(user_id: int, file_name: str, file_type: str, file_hash: str,
+                        categorized_transactions: list) -> None:
+  """Registra o extrato processado e suas categorizações para envios e consultas futuras (best effort)."""
+  if not categorized_transactions:
+    return
+  try:
+    statement_id = get_default_store().record_statement(user_id, file_name, file_type, file_hash, categorized_transactions)
+    logger.info("Histórico atualizado | usuário=%s | extrato=%s | transações=%s",
+                user_id, statement_id, len(categorized_transactions))
+  except Exception as e:
+    logger.warning("Falha ao gravar histórico de transações: %s", e)
+
+
+def _merge_categorized(transactions: list, reused: dict, new_categorized: list) -> list:
+  """Junta reaproveitadas e novas na ordem original do extrato."""
+  new_by_fingerprint = {tx.get(FINGERPRINT_FIELD): tx for tx in new_categorized}
+  return [
+    reused.get(tx[FINGERPRINT_FIELD]) or new_by_fingerprint.get(tx[FINGERPRINT_FIELD]) or tx
+    for tx in transactions
+  ]
+
+
+@timed("classify")
+def _categorize_with_ai(transactions: list, on_progress=None, user_id=None) -> tuple:
+  """Tenta categorizar via Gemini. Retorna (transactions, ai_ok).
+
+  Com `on_progress(categorizadas, total)`, a resposta do modelo é lida em
+  streaming e o callback é chamado a cada transação categorizada. `user_id`
+  seleciona os limites de requisições/tokens por usuário.
+  """
+  try:
+    if on_progress is None:
+      categorized = categorize_with_gemini(transactions, user_id=user_id)
+    else:
+      categorized = categorize_with_gemini(transactions, on_progress=on_progress, user_id=user_id)
     return categorized, True
   except Exception as e:
-    logger.error(f"Falha ao categorizar com Gemini: {e}")
+    logger.error("Falha ao categorizar com Gemini: %s", e)
     fallback = [
       {
         **tx,
@@ -113,51 +176,133 @@ def _categorize_with_ai(transactions: list) -> tuple:
     return fallback, False
 
 
-def _build_result_payload(file_name: str, file_type: str, categorized_transactions: list) -> dict:
-  """Monta o payload final de resultado para persistência/envio."""
-  return {
+async def _wait_send_slot(chat_id) -> None:
+  """Aguarda vaga nos limites de envio do Telegram (global e por chat)."""
+  await telegram_throttle().wait_async(chat_id)
+
+
+def _progress_interval() -> float:
+  """Intervalo entre edições de progresso (PROGRESS_UPDATE_INTERVAL, em segundos)."""
+  try:
+    return max(0.1, float(os.getenv("PROGRESS_UPDATE_INTERVAL", PROGRESS_UPDATE_INTERVAL_SECONDS)))
+  except ValueError:
+    return PROGRESS_UPDATE_INTERVAL_SECONDS
+
+
+class _ProgressMessage:
+  """Edita uma única mensagem com "N/M categorizadas", no máximo uma vez por intervalo."""
+
+  def __init__(self, message, base_text: str, total: int, interval: float):
+    self.message = message
+    self.base_text = base_text
+    self.total = total
+    self.interval = interval
+    self.done = 0
+    self._shown = 0
+    self._last_edit = 0.0
+
+  def advance(self, done: int, total: int) -> None:
+    """Chamado pela thread de categorização; apenas registra o contador."""
+    self.done = done
+    self.total = total
+
+  async def _render(self, force: bool = False) -> None:
+    if self.message is None or self.done == self._shown:
+      return
+    if not force and time.monotonic() - self._last_edit < self.interval:
+      return
+    self._shown = self.done
+    self._last_edit = time.monotonic()
+    text = self.base_text + TelegramMessages.CATEGORIZATION_PROGRESS.format(done=self.done, total=self.total)
+    try:
+      await _wait_send_slot(getattr(self.message, "chat_id", None))
+      await self.message.edit_text(text)
+    except Exception as e:
+      logger.debug("Falha ao atualizar mensagem de progresso: %s", e)
+
+  async def run(self) -> None:
+    while True:
+      await asyncio.sleep(self.interval)
+      await self._render()
+
+  async def finish(self) -> None:
+    await self._render(force=True)
+
+
+async def _categorize_with_progress(transactions: list, progress: _ProgressMessage, user_id=None) -> tuple:
+  """Categoriza em uma thread (fora do event loop) atualizando a mensagem de progresso."""
+  task = asyncio.create_task(progress.run())
+  try:
+    return await asyncio.to_thread(_categorize_with_ai, transactions, progress.advance, user_id)
+  finally:
+    task.cancel()
+    try:
+      await task
+    except asyncio.CancelledError:
+      pass
+    await progress.finish()
+
+
+def _build_result_payload(file_name: str, file_type: str, report=None, diagnostics=None) -> dict:
+  """Monta os metadados do JSON de resultado; as transações são gravadas em fluxo por `_write_results`."""
+  payload = {
     "original_file": file_name,
     "processed_at": datetime.utcnow().isoformat() + "Z",
     "file_type": file_type,
-    "total_transactions": len(categorized_transactions),
-    "transactions": categorized_transactions,
   }
+  if report is not None:
+    payload["report"] = report.to_dict()
+  if diagnostics is not None and diagnostics.total:
+    payload["parse_diagnostics"] = diagnostics.to_dict()
+  return payload
+
+
+def _diagnostics_caption_line(diagnostics, max_reasons: int = 3):
+  """Linha da legenda com as linhas ignoradas/corrigidas no parse. Retorna None se não houve problemas."""
+  if diagnostics is None or not diagnostics.total:
+    return None
+  reasons = ", ".join(f"{reason}: {count}" for reason, count in diagnostics.counts.most_common(max_reasons))
+  return escape_markdown(
+    TelegramMessages.PARSE_DIAGNOSTICS.format(count=diagnostics.total, reasons=reasons), version=1
+  )
+
+
+@timed("report")
+def _build_report(categorized_transactions: list):
+  """Calcula o relatório estatístico do extrato (best effort). Retorna None se falhar."""
+  if not categorized_transactions:
+    return None
+  try:
+    return report_from_transactions(categorized_transactions)
+  except Exception as e:
+    logger.warning("Falha ao gerar relatório estatístico: %s", e)
+    return None
 
 
-def _write_result_json(dest_dir: str, file_stem: str, result: dict) -> str:
-  """Escreve o JSON de resultado e retorna o caminho gerado."""
-  result_path = Path(dest_dir) / f"{file_stem}_categorized.json"
-  with open(result_path, "w", encoding="utf-8") as f:
-    json.dump(result, f, ensure_ascii=False, indent=2)
-  return result_path
-
-
-def _write_result_csv(dest_dir: str, file_stem: str, categorized_transactions: list) -> str:
-  """Escreve um CSV com as transações categorizadas e retorna o caminho gerado."""
-  csv_path = Path(dest_dir) / f"{file_stem}_categorized.csv"
-  headers = [
-    "id",
-    "name",
-    "value",
-    "date",
-    "category",
-    "categorization_confidence",
-    "categorization_reasoning",
-  ]
-  with open(csv_path, "w", encoding="utf-8", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=headers)
-    writer.writeheader()
-    for tx in categorized_transactions:
-      writer.writerow({
-        "id": tx.get("id"),
-        "name": tx.get("name", ""),
-        "value": tx.get("value", 0.0),
-        "date": tx.get("date", ""),
-        "category": tx.get("category", ""),
-        "categorization_confidence": tx.get("categorization_confidence", ""),
-        "categorization_reasoning": tx.get("categorization_reasoning", ""),
-      })
-  return str(csv_path)
+def _fit_caption(lines: list, report=None) -> str:
+  """Anexa o resumo do relatório à legenda, respeitando o limite de tamanho do Telegram."""
+  caption = "\n".join(lines)
+  if report is None:
+    return caption
+  for line in format_report_lines(report):
+    candidate = caption + "\n" + escape_markdown(line, version=1)
+    if len(candidate) > MAX_CAPTION_CHARS:
+      break
+    caption = candidate
+  return caption
+
+
+def _artifact_formats() -> tuple:
+  """Formatos de resultado deste ambiente (RESULT_ARTIFACTS; padrão: só o CSV fora de debug)."""
+  return resolve_artifact_formats(debug=_is_debug_mode())
+
+
+@timed("write_results")
+def _write_results(dest_dir: str, file_stem: str, categorized_transactions, formats, metadata=None) -> str:
+  """Escreve os arquivos de resultado numa única passada e retorna o caminho do CSV (entregue ao usuário)."""
+  paths = {fmt: str(Path(dest_dir) / f"{file_stem}_categorized.{fmt}") for fmt in formats}
+  write_artifacts(categorized_transactions, paths, metadata)
+  return paths[ARTIFACT_CSV]
 
 
 def _cache_bucket_name() -> str:
@@ -171,6 +316,7 @@ def _cache_key_for_processed(user_id: int, file_hash: str, file_name: str) -> st
   return f"cache/processed/{user_id}/{file_hash}/{stem}_categorized.csv"
 
 
+@timed("cache_lookup")
 def _s3_object_exists(bucket: str, key: str) -> bool:
   if not bucket or not key:
     return False
@@ -182,6 +328,7 @@ def _s3_object_exists(bucket: str, key: str) -> bool:
     return False
 
 
+@timed("cache_download")
 def _download_from_s3(bucket: str, key: str, dest_path: str) -> str:
   s3 = boto3.client("s3")
   s3.download_file(bucket, key, dest_path)
@@ -191,12 +338,13 @@ def _download_from_s3(bucket: str, key: str, dest_path: str) -> str:
 def _build_summary_messages(categorized_transactions: list) -> list[str]:
   """Gera mensagens com lista de transações categorizadas em blocos seguros."""
   lines = []
-  for tx in categorized_transactions:
+  # Um extrato tem uma única moeda
+  currency = categorized_transactions[0].get(CURRENCY_FIELD) if categorized_transactions else None
+  values = format_cents_column(map(transaction_cents, categorized_transactions), currency_symbol(currency))
+  for tx, value_str in zip(categorized_transactions, values):
     name = escape_markdown(str(tx.get("name", "")), version=1)
     category = escape_markdown(str(tx.get("category", "")), version=1)
     date_str = escape_markdown(str(tx.get("date", "")), version=1)
-    value = tx.get("value", 0.0)
-    value_str = format_currency(value)
     lines.append(f"- {date_str} | {name} | {value_str} | {category}")
 
   messages = []
@@ -237,6 +385,7 @@ def _should_cleanup_tmp() -> bool:
   return not _is_debug_mode()
 
 
+@timed("upload_original")
 def _upload_to_s3(local_path: Path, user_id: int, file_name: str) -> str:
   bucket = os.getenv("S3_BUCKET_UPLOADS")
   if not bucket:
@@ -248,6 +397,7 @@ def _upload_to_s3(local_path: Path, user_id: int, file_name: str) -> str:
   return f"s3://{bucket}/{key}"
 
 
+@timed("upload_processed")
 def _upload_processed_to_s3(local_csv_path: Path, user_id: int, file_hash: str, file_name: str) -> str:
   bucket = _cache_bucket_name()
   if not bucket:
@@ -262,22 +412,25 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
   document = update.message.document
 
   if not document:
+    await _wait_send_slot(update.message.chat_id)
     await update.message.reply_text(TelegramMessages.INVALID_INPUT)
     return
   
   file_name = _sanitize_filename(document.file_name)
   user_id = update.message.from_user.id
 
-  logger.info(f"Usuário {user_id} enviou o arquivo {file_name}")
+  logger.info("Usuário %s enviou o arquivo %s", user_id, file_name)
 
   file_type = _detect_file_type(file_name)
   safe_display_name = escape_markdown(file_name, version=1)
 
   if file_type in ("csv", "ofx"):
-    await update.message.reply_text(
+    status_text = (
       TelegramMessages.RECEIVED_FILE.format(file_name=safe_display_name)
       + TelegramMessages.DETECTED_TYPE.format(file_type=file_type.upper())
     )
+    await _wait_send_slot(update.message.chat_id)
+    status_message = await update.message.reply_text(status_text)
 
     # Cria diretório temporário e caminho local do arquivo
     tmp_dir = tempfile.mkdtemp(prefix="fin-cat-")
@@ -301,28 +454,41 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
           "✅ Processamento concluído (cache)!",
           "Arquivo já processado anteriormente. CSV anexado do cache.",
         ]
-        with open(cached_local, "rb") as f:
+        with span("reply"), open(cached_local, "rb") as f:
+          await _wait_send_slot(update.message.chat_id)
           await update.message.reply_document(
             document=f,
             filename=Path(cached_local).name,
             caption="\n".join(caption_lines),
           )
+        REGISTRY.inc("documents_total", labels={"file_type": file_type, "outcome": "cache_hit"})
         return
 
-      # Faz o parse de acordo com o tipo
-      statement = _parse_file_to_statement(local_path, file_type)
+      # Faz o parse de acordo com o tipo, fora do event loop (arquivos grandes levam segundos)
+      statement = await asyncio.to_thread(_parse_file_to_statement, local_path, file_type)
 
       # Converte para o formato esperado pelo AI
       transactions = _statement_to_transactions(statement)
 
-      # Chama o classificador (Gemini)
-      categorized_transactions, ai_ok = _categorize_with_ai(transactions)
-
-      # Monta resultado
-      result = _build_result_payload(file_name, file_type, categorized_transactions)
-      # Persistência (JSON para debug e CSV para usuário)
-      _ = _write_result_json(tmp_dir, Path(file_name).stem, result)
-      csv_path = _write_result_csv(tmp_dir, Path(file_name).stem, categorized_transactions)
+      # Reaproveita categorizações de envios anteriores; só as transações novas vão ao modelo
+      reused, new_transactions = await asyncio.to_thread(_split_known_transactions, user_id, transactions)
+      new_categorized, ai_ok = [], True
+      if new_transactions:
+        # Chama o classificador (Gemini), atualizando o progresso na mensagem de status.
+        # Cada chamada ao modelo respeita os limites globais e os do usuário
+        progress = _ProgressMessage(status_message, status_text, len(new_transactions), _progress_interval())
+        new_categorized, ai_ok = await _categorize_with_progress(new_transactions, progress, user_id)
+      categorized_transactions = _merge_categorized(transactions, reused, new_categorized)
+      await asyncio.to_thread(_remember_statement, user_id, file_name, file_type, file_hash, categorized_transactions)
+
+      # Monta resultado e relatório estatístico
+      report = _build_report(categorized_transactions)
+      diagnostics = getattr(statement, "diagnostics", None)
+      # Persistência em fluxo e numa única passada: o CSV (entregue ao usuário) e os formatos de
+      # RESULT_ARTIFACTS; os metadados só são montados quando o JSON é gerado
+      formats = _artifact_formats()
+      result = _build_result_payload(file_name, file_type, report, diagnostics) if ARTIFACT_JSON in formats else None
+      csv_path = _write_results(tmp_dir, Path(file_name).stem, categorized_transactions, formats, result)
 
       # Publica CSV processado no cache determinístico
       _ = _upload_processed_to_s3(Path(csv_path), user_id, file_hash, file_name)
@@ -332,22 +498,36 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"Transações: {len(categorized_transactions)}",
         "CSV anexado com os resultados.",
       ]
+      if reused:
+        caption_lines.insert(2, f"Já categorizadas em envios anteriores: {len(reused)}")
+      diagnostics_line = _diagnostics_caption_line(diagnostics)
+      if diagnostics_line:
+        caption_lines.append(diagnostics_line)
       if not ai_ok:
         caption_lines.append("⚠️ Categorização por AI não disponível no momento.")
 
-      with open(csv_path, "rb") as f:
-        await update.message.reply_document(
-          document=f,
-          filename=Path(csv_path).name,
-          caption="\n".join(caption_lines),
-        )
+      with span("reply"):
+        with open(csv_path, "rb") as f:
+          await _wait_send_slot(update.message.chat_id)
+          await update.message.reply_document(
+            document=f,
+            filename=Path(csv_path).name,
+            caption=_fit_caption(caption_lines, report),
+          )
+
+        # Envia resumo em texto em blocos
+        for chunk in _build_summary_messages(categorized_transactions):
+          await _wait_send_slot(update.message.chat_id)
+          await update.message.reply_text(chunk)
 
-      # Envia resumo em texto em blocos
-      for chunk in _build_summary_messages(categorized_transactions):
-        await update.message.reply_text(chunk)
+      REGISTRY.inc("documents_total", labels={"file_type": file_type, "outcome": "processed"})
+      REGISTRY.inc("transactions_total", len(categorized_transactions), labels={"file_type": file_type})
+      REGISTRY.inc("transactions_reused_total", len(reused), labels={"file_type": file_type})
 
     except Exception as e:
-      logger.error(f"Erro ao processar arquivo '{file_name}': {e}")
+      REGISTRY.inc("documents_total", labels={"file_type": file_type, "outcome": "error"})
+      logger.error("Erro ao processar arquivo '%s': %s", file_name, e)
+      await _wait_send_slot(update.message.chat_id)
       await update.message.reply_text(
         f"❌ Ocorreu um erro ao processar o arquivo: {str(e)}"
       )
@@ -355,13 +535,15 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
       if _should_cleanup_tmp():
         try:
           shutil.rmtree(tmp_dir, ignore_errors=True)
-          logger.info(f"Diretório temporário removido: {tmp_dir}")
+          logger.info("Diretório temporário removido: %s", tmp_dir)
         except Exception as cleanup_err:
-          logger.warning(f"Falha ao remover diretório temporário {tmp_dir}: {cleanup_err}")
+          logger.warning("Falha ao remover diretório temporário %s: %s", tmp_dir, cleanup_err)
       else:
-        logger.info(f"Mantendo arquivos temporários para debug em: {tmp_dir}")
+        logger.info("Mantendo arquivos temporários para debug em: %s", tmp_dir)
 
   else:
+    REGISTRY.inc("documents_total", labels={"file_type": "unsupported", "outcome": "rejected"})
+    await _wait_send_slot(update.message.chat_id)
     await update.message.reply_text(
       TelegramMessages.UNSUPPORTED_FILE.format(file_name=safe_display_name)
     )
\ No newline at end of file
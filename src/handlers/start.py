@@ -7,6 +7,6 @@ from telegram.ext import ContextTypes
 logger = get_logger(__name__)
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-  logger.info(f"Usuário {update.message.from_user.id} iniciou o bot.")
+  logger.info("Usuário %s iniciou o bot.", update.message.from_user.id)
   
   await update.message.reply_text(TelegramMessages.WELCOME)
\ No newline at end of file
@@ -0,0 +1,151 @@
+from src.utils.logger import get_logger
+
+from telegram import Update
+from telegram.ext import ContextTypes
+from src.config.messages import TelegramMessages
+from telegram.helpers import escape_markdown
+
+import re
+import asyncio
+from datetime import date
+from typing import Dict, Optional
+
+from src.domain.categories import Category
+from src.domain.money import DEFAULT_CURRENCY
+from src.domain.merchants import fold_text
+from src.utils import format_cents
+from src.utils.metrics import timed
+from src.utils.rate_limit import telegram_throttle
+from src.storage.store import get_default_store
+
+logger = get_logger(__name__)
+
+
+MONTH_NAMES = (
+  "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+  "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+)
+# Nome completo ou abreviação de 3 letras, sem acento (MARCO, SET, ...)
+_MONTHS_BY_NAME = {
+  **{fold_text(name): index for index, name in enumerate(MONTH_NAMES, start=1)},
+  **{fold_text(name)[:3]: index for index, name in enumerate(MONTH_NAMES, start=1)},
+}
+_CATEGORIES_BY_NAME = {fold_text(category.value): category.value for category in Category}
+_NUMERIC_MONTH_RE = re.compile(r"^(?:(\d{1,2})[/-](\d{4})|(\d{4})-(\d{1,2}))$")
+
+
+class SummaryQuery:
+  """Pedido do /resumo: mês (AAAA-MM ou None para o mais recente) e categoria opcional"""
+
+  def __init__(self, month: Optional[str] = None, category: Optional[str] = None):
+    self.month: Optional[str] = month
+    self.category: Optional[str] = category
+
+
+def _infer_year(month: int, today: date) -> int:
+  """Mês sem ano: a ocorrência mais recente que não esteja no futuro."""
+  return today.year if month <= today.month else today.year - 1
+
+
+def _parse_summary_args(args: list, today: Optional[date] = None) -> Optional[SummaryQuery]:
+  """Interpreta os argumentos do /resumo. Retorna None se não forem reconhecidos."""
+  today = today or date.today()
+  month = year = None
+  category_words = []
+  for arg in args:
+    folded = fold_text(arg.strip().rstrip(".,"))
+    numeric = _NUMERIC_MONTH_RE.match(folded)
+    if numeric:
+      month = int(numeric.group(1) or numeric.group(4))
+      year = int(numeric.group(2) or numeric.group(3))
+    elif folded in _MONTHS_BY_NAME and month is None:
+      month = _MONTHS_BY_NAME[folded]
+    elif folded.isdigit() and len(folded) == 4:
+      year = int(folded)
+    elif folded in ("DE", "EM", "COM"):
+      continue
+    elif folded:
+      category_words.append(folded)
+
+  query = SummaryQuery()
+  if category_words:
+    query.category = _CATEGORIES_BY_NAME.get(" ".join(category_words))
+    if query.category is None:
+      return None
+  if month is not None:
+    if not 1 <= month <= 12:
+      return None
+    query.month = f"{year or _infer_year(month, today):04d}-{month:02d}"
+  elif year is not None:
+    return None
+  return query
+
+
+def _format_month(month: str) -> str:
+  year, number = month.split("-")
+  return f"{MONTH_NAMES[int(number) - 1]}/{year}"
+
+
+def _build_summary_text(month: str, totals: list, category: Optional[str] = None) -> str:
+  """Monta a resposta do /resumo a partir dos totais do mês."""
+  month_label = _format_month(month)
+  if category is not None:
+    totals = [row for row in totals if row["category"] == category]
+    if not totals:
+      return TelegramMessages.SUMMARY_CATEGORY_EMPTY.format(
+        category=escape_markdown(category, version=1), month=month_label
+      )
+  lines = [TelegramMessages.SUMMARY_HEADER.format(month=month_label), ""]
+  for row in totals:
+    if row["spent_cents"] > 0:
+      lines.append(TelegramMessages.SUMMARY_CATEGORY_LINE.format(
+        category=escape_markdown(str(row["category"]), version=1),
+        spent=format_cents(row["spent_cents"], row.get("currency", DEFAULT_CURRENCY)),
+        count=row["count"],
+      ))
+  lines.append("")
+  # Um total por moeda: valores em moedas diferentes não são somados
+  by_currency: Dict[str, list] = {}
+  for row in totals:
+    by_currency.setdefault(row.get("currency", DEFAULT_CURRENCY), []).append(row)
+  for currency, rows in by_currency.items():
+    lines.append(TelegramMessages.SUMMARY_TOTAL.format(
+      spent=format_cents(sum(row["spent_cents"] for row in rows), currency),
+      received=format_cents(sum(row["received_cents"] for row in rows), currency),
+    ))
+  return "\n".join(lines)
+
+
+@timed("summary_lookup")
+def _load_monthly_totals(user_id: int, month: Optional[str]):
+  """Lê os agregados do mês. Retorna None quando o histórico não pode ser lido."""
+  try:
+    return get_default_store().monthly_totals(user_id, month)
+  except Exception as e:
+    logger.warning("Falha ao ler o histórico para o resumo: %s", e)
+    return None
+
+
+async def handle_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
+  """Responde ao /resumo com os gastos por categoria de um mês."""
+  user_id = update.message.from_user.id
+  chat_id = update.message.chat_id
+  query = _parse_summary_args(list(context.args or []))
+  await telegram_throttle().wait_async(chat_id)
+  if query is None:
+    await update.message.reply_text(TelegramMessages.SUMMARY_USAGE)
+    return
+
+  result = await asyncio.to_thread(_load_monthly_totals, user_id, query.month)
+  if result is None:
+    await update.message.reply_text(TelegramMessages.SUMMARY_UNAVAILABLE)
+    return
+
+  month, totals = result
+  logger.info("Resumo solicitado | usuário=%s | mês=%s | categoria=%s", user_id, month, query.category)
+  if month is None or not totals:
+    period = _format_month(query.month) if query.month else "você"
+    await update.message.reply_text(TelegramMessages.SUMMARY_EMPTY.format(period=period))
+    return
+
+  await update.message.reply_text(_build_summary_text(month, totals, query.category))
@@ -1,23 +1,95 @@
 """
 Parser para arquivos CSV bancários
+
+Arquivos grandes podem ser processados em paralelo (opcional): o conteúdo é
+dividido em blocos que terminam em fronteiras de registro (fora de campos
+entre aspas), cada bloco é interpretado por um processo de um
+`ProcessPoolExecutor` compartilhado e as transações são remontadas na ordem
+original. O pool é criado uma única vez por processo com o método
+"forkserver" (ou "spawn"), nunca com fork: o bot já tem threads rodando
+(logging, coalescer, métricas) e um fork poderia herdar locks presos.
+
+Variáveis de ambiente:
+- CSV_PARALLEL_WORKERS: processos usados no modo paralelo (padrão: 1,
+  desligado; valores maiores ativam o paralelismo).
+- CSV_PARALLEL_MIN_BYTES: tamanho mínimo do arquivo para usar o modo
+  paralelo (padrão: 2097152, 2 MiB).
+
+Layouts de bancos conhecidos são resolvidos pela impressão digital do
+cabeçalho (ver `src/parsers/layouts.py`), sem `csv.Sniffer`. Nos demais, as
+primeiras linhas são pontuadas para achar o cabeçalho real depois de linhas
+de preâmbulo (conta, período) e o fim do arquivo é examinado para excluir o
+rodapé (saldos, totais) antes do parse.
 """
 
 from datetime import datetime, date
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 
+import atexit
+import codecs
 import csv
+import io
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
 
 from src.utils.logger import get_logger
-from src.parsers.models import Expense, ParsedBankStatement
+from src.parsers.models import Expense, ParseDiagnostics, ParsedBankStatement
+from src.parsers.mapped import MappedInput, count_bytes
+from src.parsers.encoding import FALLBACK_ERRORS, detect_encoding
+from src.parsers.layouts import (
+    SIGN_INVERTED,
+    BankLayout,
+    LayoutRegistry,
+    get_default_layout_registry,
+    is_usable_mapping,
+)
+from src.domain.merchants import canonical_merchant, fold_text
+from src.domain.money import cents_from_str
 
 logger = get_logger(__name__)
 
+DEFAULT_PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+# Blocos por processo: blocos menores equilibram melhor a carga entre os núcleos
+CHUNKS_PER_WORKER = 4
+_QUOTE = b'"'
+# Tamanho aproximado dos blocos decodificados por vez no modo sequencial
+SEQUENTIAL_BLOCK_BYTES = 16 * 1024
+# Linhas iniciais pontuadas na busca do cabeçalho (preâmbulo de metadados)
+HEADER_SCAN_LINES = 30
+# Linhas finais examinadas na busca do rodapé
+FOOTER_SCAN_LINES = 20
+_CANDIDATE_DELIMITERS = (",", ";", "\t", "|")
+# Descrições completas que marcam linhas de saldo no rodapé
+_FOOTER_PHRASES = frozenset((
+    "SALDO", "SALDO ANTERIOR", "SALDO FINAL", "SALDO DO DIA", "SALDO ATUAL",
+    "SALDO DISPONIVEL", "SALDO EM CONTA",
+))
+# "Total" como palavra inteira só marca rodapé em linhas sem valor (ex.: TOTALPASS é transação)
+_TOTAL_WORD_RE = re.compile(r"\bTOTAL\b")
+_VALUE_FIELDS = ('value', 'debit', 'credit')
+
+# Motivos agregados em ParseDiagnostics
+REASON_INCOMPLETE_ROW = "Linha incompleta"
+REASON_NO_DATE_COLUMN = "Coluna de data não encontrada"
+REASON_INVALID_DATE = "Data inválida"
+REASON_NO_VALUE_COLUMN = "Coluna de valor não encontrada"
+REASON_INVALID_VALUE = "Valor inválido (considerado 0)"
+REASON_ROW_ERROR = "Erro ao processar linha"
+REASON_FOOTER_ROW = "Rodapé ignorado"
+
 
 class CSVBankParser:
     """Parser para arquivos CSV de extratos bancários"""
 
-    def __init__(self):
+    def __init__(self, layouts: Optional[LayoutRegistry] = None):
+        # Registro de layouts (padrão: get_default_layout_registry)
+        self.layouts = layouts
         self.supported_date_formats = [
             "%d/%m/%Y",
             "%Y-%m-%d",
@@ -26,21 +98,60 @@ class CSVBankParser:
             "%Y/%m/%d"
         ]
 
-    def parse_date(self, date_str: str) -> Optional[date]:
-        """Converte string de data para objeto date"""
+    def __getstate__(self) -> Dict[str, Any]:
+        # O registro só é usado na detecção, no processo principal
+        state = self.__dict__.copy()
+        state['layouts'] = None
+        return state
+
+    def parse_date(self, date_str: str, date_format: Optional[str] = None) -> Optional[date]:
+        """Converte string de data para objeto date (tentando primeiro o formato do layout, se houver)"""
+        parsed = self._try_parse_date(date_str, date_format)
+        if parsed is None:
+            logger.warning("Não foi possível converter a data: %s", date_str.strip())
+        return parsed
+
+    def _try_parse_date(self, date_str: str, date_format: Optional[str] = None) -> Optional[date]:
+        """Como `parse_date`, mas sem aviso: usada para classificar linhas."""
         date_str = date_str.strip()
 
+        if date_format:
+            try:
+                return datetime.strptime(date_str, date_format).date()
+            except ValueError:
+                pass
+
         for date_format in self.supported_date_formats:
             try:
                 return datetime.strptime(date_str, date_format).date()
             except ValueError:
                 continue
 
-        logger.warning(f"Não foi possível converter a data: {date_str}")
         return None
 
-    def parse_value(self, value_str: str) -> float:
-        """Converte string de valor para float"""
+    def parse_value(self, value_str: str, decimal: Optional[str] = None) -> float:
+        """Converte string de valor para float (`decimal`: separador decimal do layout, se conhecido)"""
+        parsed = self._try_parse_value(value_str, decimal)
+        if parsed is None:
+            logger.error("Erro ao converter valor '%s'", value_str)
+            return 0.0
+        return parsed
+
+    def _try_parse_value(self, value_str: str, decimal: Optional[str] = None) -> Optional[float]:
+        """Como `parse_value`, mas sem log: None quando o valor não pode ser convertido."""
+        normalized = self._normalize_amount(value_str, decimal)
+        try:
+            return float(normalized) if normalized is not None else None
+        except ValueError:
+            return None
+
+    def _try_parse_cents(self, value_str: str, decimal: Optional[str] = None) -> Optional[int]:
+        """Valor em centavos inteiros, sem passar por float. None quando não pode ser convertido."""
+        normalized = self._normalize_amount(value_str, decimal)
+        return cents_from_str(normalized) if normalized is not None else None
+
+    def _normalize_amount(self, value_str: str, decimal: Optional[str] = None) -> Optional[str]:
+        """Texto do valor sem moeda/parênteses e com ponto decimal ("-1000.50")."""
         try:
             # Remove caracteres comuns em valores monetários
             value_str = value_str.strip()
@@ -56,10 +167,15 @@ class CSVBankParser:
                 else:
                     value_str = "-" + inner_value
 
+            # Layout conhecido: o separador decimal não precisa ser adivinhado
+            if decimal == ",":
+                value_str = value_str.replace(".", "").replace(",", ".")
+            elif decimal == ".":
+                value_str = value_str.replace(",", "")
             # Detecta formato: se tem vírgula E ponto, assume formato brasileiro (1.000,50)
             # Se tem apenas vírgula, assume vírgula como decimal (100,50)
             # Se tem apenas ponto, assume ponto como decimal (100.50)
-            if "," in value_str and "." in value_str:
+            elif "," in value_str and "." in value_str:
                 # Formato brasileiro: 1.000,50 ou 1,000.50
                 # Verifica qual vem primeiro
                 comma_pos = value_str.find(",")
@@ -76,38 +192,183 @@ class CSVBankParser:
                 value_str = value_str.replace(",", ".")
             # Se apenas ponto, mantém como está (já é decimal americano)
 
-            return float(value_str)
-        except (ValueError, AttributeError) as e:
-            logger.error(f"Erro ao converter valor '{value_str}': {e}")
-            return 0.0
+            return value_str
+        except AttributeError:
+            return None
 
-    def detect_csv_format(self, file_path: str, encoding: str = 'utf-8-sig') -> Dict[str, Any]:
+    def detect_csv_format(self, file_path: str, encoding: Optional[str] = None) -> Dict[str, Any]:
         """Detecta o formato do CSV automaticamente"""
-        with open(file_path, 'r', encoding=encoding, newline='') as file:
-            # Lê as primeiras linhas para detectar o formato
-            sample = file.read(1024)
-            file.seek(0)
-
-            # Detecta o dialeto CSV
-            sniffer = csv.Sniffer()
-            try:
-                dialect = sniffer.sniff(sample)
-                delimiter = dialect.delimiter
-            except:
-                delimiter = ','
+        with MappedInput(file_path) as source:
+            return self._detect_format(source, encoding)
+
+    def _detect_format(self, source: MappedInput, encoding: Optional[str]) -> Dict[str, Any]:
+        """Detecta BOM, codificação, delimitador e colunas a partir do prefixo do arquivo mapeado."""
+        bom_encoding, bom_length = source.bom()
+        if encoding is None:
+            # Detecção automática: bytes inválidos no restante do arquivo são recuperados na decodificação
+            encoding = detect_encoding(source.prefix())
+            errors = FALLBACK_ERRORS
+        else:
+            encoding = bom_encoding or encoding
+            errors = "strict"
+        if not _supports_byte_split(encoding):
+            # UTF-16/32: decodifica o arquivo inteiro (o BOM é tratado pelo codec)
+            text = source.decode(0, len(source), encoding, errors)
+            bom_length = 0
+        else:
+            # Decodificador incremental: ignora um caractere multibyte cortado no fim do prefixo
+            decoder = codecs.getincrementaldecoder(_body_encoding(encoding))(errors)
+            text = decoder.decode(source.prefix()[bom_length:])
+
+        registry = self.layouts if self.layouts is not None else get_default_layout_registry()
+        layout = registry.match(text.split('\n', registry.max_skip_lines + 1)[:registry.max_skip_lines + 1])
+        if layout is not None:
+            # Layout conhecido: dispensa o Sniffer e o mapeamento por palavras-chave
+            delimiter = layout.delimiter
+            header_row = layout.skip_lines
+            reader = csv.reader(io.StringIO(text, newline=''), delimiter=delimiter)
+            for _ in range(header_row):
+                next(reader, None)
+            headers = next(reader, [])
+            column_mapping = layout.column_mapping
+        else:
+            found = self._find_header(text.split('\n', HEADER_SCAN_LINES)[:HEADER_SCAN_LINES])
+            if found is not None:
+                header_row, delimiter = found
+            else:
+                # Nenhuma linha parece um cabeçalho: detecta o dialeto na amostra
+                header_row = 0
+                sample = text[:1024]
+                sniffer = csv.Sniffer()
+                try:
+                    dialect = sniffer.sniff(sample)
+                    delimiter = dialect.delimiter
+                except:
+                    delimiter = ','
 
             # Lê o cabeçalho
-            reader = csv.reader(file, delimiter=delimiter)
+            reader = csv.reader(io.StringIO(text, newline=''), delimiter=delimiter)
+            for _ in range(header_row):
+                next(reader, None)
             headers = next(reader, [])
 
             # Mapeia colunas comuns
             column_mapping = self._map_columns(headers)
-
-            return {
-                'delimiter': delimiter,
-                'headers': headers,
-                'column_mapping': column_mapping
-            }
+            # Próximos envios com o mesmo cabeçalho são resolvidos pelo registro
+            layout = registry.learn(headers, delimiter, column_mapping, header_row)
+
+        csv_format = {
+            'delimiter': delimiter,
+            'headers': headers,
+            'column_mapping': column_mapping,
+            'encoding': encoding,
+            'errors': errors,
+            'layout': layout,
+            'header_row': header_row,
+        }
+        if _supports_byte_split(encoding):
+            # O corpo começa na fronteira de registro seguinte ao cabeçalho
+            body_start = bom_length
+            for _ in range(header_row + 1):
+                body_start = _next_record_start(source.buffer, body_start, body_start)
+            csv_format['body_start'] = body_start
+            csv_format['body_end'], csv_format['footer_rows'] = self._find_body_end(source, csv_format)
+        return csv_format
+
+    def _find_header(self, lines: List[str]) -> Optional[Tuple[int, str]]:
+        """
+        Localiza a linha de cabeçalho entre as primeiras linhas do arquivo
+
+        Cada par (linha, delimitador) é pontuado pelas colunas distintas que
+        `_map_columns` reconhece, com um ponto extra quando a linha seguinte
+        tem o mesmo número de campos. Linhas de preâmbulo (conta, agência,
+        período) não chegam a um mapeamento com data e valor.
+
+        Returns:
+            (índice da linha, delimitador) ou None se nenhuma linha servir
+        """
+        best: Optional[Tuple[int, str]] = None
+        best_score = 0
+        for index, line in enumerate(lines):
+            for delimiter in _CANDIDATE_DELIMITERS:
+                if delimiter not in line:
+                    continue
+                headers = next(csv.reader([line], delimiter=delimiter), [])
+                if len(headers) < 2:
+                    continue
+                mapping = self._map_columns(headers)
+                columns = set(mapping.values())
+                if not is_usable_mapping(mapping) or len(columns) < 2:
+                    continue
+                score = 2 * len(columns)
+                following = lines[index + 1] if index + 1 < len(lines) else ""
+                if following and len(next(csv.reader([following], delimiter=delimiter), [])) == len(headers):
+                    score += 1
+                if score > best_score:
+                    best, best_score = (index, delimiter), score
+        return best
+
+    def _find_body_end(self, source: MappedInput, csv_format: Dict[str, Any]) -> Tuple[int, List[int]]:
+        """
+        Fim dos dados, excluindo o rodapé
+
+        Percorre as últimas linhas de trás para frente enquanto forem vazias
+        ou de rodapé (ver `_is_footer_row`); a primeira linha de dados encerra
+        a busca. Linhas com aspas desbalanceadas não são examinadas (podem ser
+        parte de um campo com quebra de linha).
+
+        Returns:
+            (fim do corpo em bytes, números das linhas não vazias excluídas)
+        """
+        body_start = csv_format['body_start']
+        end = len(source)
+        encoding = _body_encoding(csv_format['encoding'])
+        trimmed: List[int] = []
+        for _ in range(FOOTER_SCAN_LINES):
+            if end <= body_start:
+                break
+            newline = source.buffer.rfind(b"\n", body_start, end - 1)
+            line_start = newline + 1 if newline != -1 else body_start
+            line = source.decode(line_start, end, encoding, csv_format['errors']).strip()
+            if line.count('"') % 2:
+                break
+            if line:
+                row = next(csv.reader([line], delimiter=csv_format['delimiter']), [])
+                if not self._is_footer_row(row, csv_format):
+                    break
+                trimmed.append(line_start)
+            end = line_start
+        if not trimmed:
+            return end, []
+        # Números de linha (base 1) para os diagnósticos, contados só uma vez até o fim do corpo
+        first_line = source.count(b"\n", 0, end) + 1
+        return end, [first_line + source.count(b"\n", end, offset) for offset in reversed(trimmed)]
+
+    def _is_footer_row(self, row: List[str], csv_format: Dict[str, Any]) -> bool:
+        """
+        Linha de rodapé: sem data válida, com descrição de saldo completa
+        ("Saldo anterior", "Saldo do dia", ...) ou com "Total" como palavra e
+        sem valor. Descrições que apenas começam com essas palavras (ex.:
+        "SALDO RESGATE CDB", "TOTALPASS") são transações.
+        """
+        column_mapping = csv_format['column_mapping']
+        layout = csv_format['layout']
+        date_col = column_mapping.get('date')
+        if date_col is None or date_col >= len(row):
+            return True
+        if self._try_parse_date(row[date_col], layout.date_format if layout else None) is None:
+            return True
+        desc_col = column_mapping.get('description')
+        if desc_col is None or desc_col >= len(row):
+            return False
+        description = " ".join(fold_text(row[desc_col]).replace(":", " ").split())
+        if description in _FOOTER_PHRASES:
+            return True
+        has_value = any(
+            column_mapping[field] < len(row) and row[column_mapping[field]].strip()
+            for field in _VALUE_FIELDS if field in column_mapping
+        )
+        return not has_value and _TOTAL_WORD_RE.search(description) is not None
 
     def _map_columns(self, headers: List[str]) -> Dict[str, int]:
         """Mapeia colunas do CSV para campos do modelo"""
@@ -155,63 +416,143 @@ class CSVBankParser:
 
         return mapping
 
-    def parse_file(self, file_path: str, encoding: str = 'utf-8-sig') -> ParsedBankStatement:
-        """Parse do arquivo CSV bancário"""
-        logger.info(f"Iniciando parse do arquivo: {file_path}")
+    def parse_file(self, file_path: str, encoding: Optional[str] = None,
+                   workers: Optional[int] = None) -> ParsedBankStatement:
+        """
+        Parse do arquivo CSV bancário
+
+        Args:
+            file_path: Caminho do arquivo
+            encoding: Codificação do arquivo. Se omitida, é detectada a partir
+                      do prefixo (BOM, UTF-8, CP1252/Latin-1 ou CP850)
+            workers: Processos para o parse paralelo. Se omitido, usa
+                     CSV_PARALLEL_WORKERS para arquivos a partir de
+                     CSV_PARALLEL_MIN_BYTES; 1 força o modo sequencial
+        """
+        logger.info("Iniciando parse do arquivo: %s", file_path)
 
         if not Path(file_path).exists():
             raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
 
         try:
-            # Detecta formato do CSV
-            csv_format = self.detect_csv_format(file_path, encoding)
-            column_mapping = csv_format['column_mapping']
-
-            logger.info(
-                f"Formato detectado - Delimitador: '{csv_format['delimiter']}', Colunas: {csv_format['headers']}")
-
-            expenses = []
-
-            with open(file_path, 'r', encoding=encoding, newline='') as file:
-                reader = csv.reader(file, delimiter=csv_format['delimiter'])
-
-                # Pula cabeçalho
-                next(reader, None)
-
-                for row_num, row in enumerate(reader, start=2):
-                    try:
-                        expense = self._parse_row(row, column_mapping, row_num, len(expenses))
-                        if expense:
-                            expenses.append(expense)
-                    except Exception as e:
-                        logger.warning(f"Erro na linha {row_num}: {e}")
-                        continue
+            with MappedInput(file_path) as source:
+                # Detecta formato do CSV
+                csv_format = self._detect_format(source, encoding)
+
+                layout = csv_format['layout']
+                logger.info(
+                    f"Formato detectado - Layout: {layout.id if layout else 'desconhecido'}, "
+                    f"Codificação: {csv_format['encoding']}, "
+                    f"Delimitador: '{csv_format['delimiter']}', Colunas: {csv_format['headers']}")
+                if csv_format['header_row'] or csv_format.get('body_end', len(source)) < len(source):
+                    logger.info("Preâmbulo: %s linhas | rodapé: %s bytes", csv_format['header_row'],
+                                len(source) - csv_format.get('body_end', len(source)))
+
+                diagnostics = ParseDiagnostics()
+                for row_num in csv_format.get('footer_rows', ()):
+                    diagnostics.add(REASON_FOOTER_ROW, row_num)
+                workers = _parallel_workers(file_path) if workers is None else workers
+                if workers > 1 and 'body_start' in csv_format:
+                    expenses = self._parse_parallel(source, csv_format, workers, diagnostics)
+                else:
+                    expenses = self._parse_sequential(source, csv_format, diagnostics)
 
-            logger.info(f"Parse concluído. {len(expenses)} transações processadas.")
+            logger.info("Parse concluído. %s transações processadas.", len(expenses))
+            if diagnostics.total:
+                # Um único registro por arquivo, em vez de um aviso por linha
+                logger.warning("Linhas com problemas em %s: %s", file_path, diagnostics.summary())
 
             return ParsedBankStatement(
                 expenses=expenses,
-                date=datetime.now()
+                date=datetime.now(),
+                diagnostics=diagnostics
             )
 
         except Exception as e:
-            logger.error(f"Erro ao processar arquivo CSV: {e}")
+            logger.error("Erro ao processar arquivo CSV: %s", e)
             raise
 
-    def _parse_row(self, row: List[str], column_mapping: Dict[str, int], row_num: int, id) -> Optional[Expense]:
-        """Parse de uma linha do CSV"""
-        if not row or len(row) < max(column_mapping.values(), default=0) + 1:
+    def _parse_sequential(self, source: MappedInput, csv_format: Dict[str, Any],
+                          diagnostics: Optional[ParseDiagnostics] = None) -> List[Expense]:
+        """Parse em um único processo, decodificando o arquivo mapeado bloco a bloco."""
+        column_mapping = csv_format['column_mapping']
+        layout = csv_format['layout']
+        if 'body_start' in csv_format:
+            reader = csv.reader(_iter_lines(source, csv_format), delimiter=csv_format['delimiter'])
+            first_line = count_bytes(source.buffer, b"\n", 0, csv_format['body_start']) + 1
+        else:
+            text = source.decode(0, len(source), csv_format['encoding'], csv_format['errors'])
+            reader = csv.reader(io.StringIO(text, newline=''), delimiter=csv_format['delimiter'])
+            # Pula preâmbulo e cabeçalho (line_num já conta as linhas puladas)
+            for _ in range(csv_format['header_row'] + 1):
+                next(reader, None)
+            first_line = 1
+
+        expenses: List[Expense] = []
+        for row_num, row in _numbered_rows(reader, first_line):
+            try:
+                expense = self._parse_row(row, column_mapping, row_num, len(expenses), layout, diagnostics)
+                if expense:
+                    expenses.append(expense)
+            except Exception as e:
+                _reject(diagnostics, REASON_ROW_ERROR, row_num, e)
+                continue
+        return expenses
+
+    def _parse_parallel(self, source: MappedInput, csv_format: Dict[str, Any], workers: int,
+                        diagnostics: Optional[ParseDiagnostics] = None) -> List[Expense]:
+        """Divide o arquivo em blocos de registros completos e faz o parse em vários processos."""
+        chunks = _split_records(source.buffer, csv_format['body_start'], workers * CHUNKS_PER_WORKER,
+                                csv_format['body_end'])
+        logger.info("Parse paralelo: %s blocos em %s processos", len(chunks), workers)
+
+        # Parser, dialeto, mapeamento de colunas e layout acompanham cada bloco (o pool é compartilhado)
+        job = (self, source.file_path, csv_format['encoding'], csv_format['errors'],
+               csv_format['delimiter'], csv_format['column_mapping'], csv_format['layout'])
+        executor = _get_parse_pool(workers)
+        expenses: List[Expense] = []
+        try:
+            for names, cents, categories, ordinals, merchants, chunk_diagnostics in executor.map(
+                    _parse_chunk, chunks, repeat(job)):
+                if diagnostics is not None:
+                    diagnostics.merge(chunk_diagnostics)
+                for name, amount, category, ordinal, merchant in zip(names, cents, categories, ordinals, merchants):
+                    # Ids seguem a ordem global, como no modo sequencial
+                    expenses.append(Expense(id=len(expenses), name=name, value=None, cents=amount, category=category,
+                                            date=date.fromordinal(ordinal), merchant=merchant))
+        except BrokenProcessPool:
+            # Um processo morreu: o próximo parse paralelo cria um pool novo
+            _shutdown_parse_pool()
+            raise
+        return expenses
+
+    def _parse_row(self, row: List[str], column_mapping: Dict[str, int], row_num: int, id,
+                   layout: Optional[BankLayout] = None,
+                   diagnostics: Optional[ParseDiagnostics] = None) -> Optional[Expense]:
+        """
+        Parse de uma linha do CSV
+
+        Linhas rejeitadas e valores inválidos são contados em `diagnostics`;
+        sem coletor, cada problema gera um aviso de log.
+        """
+        date_format = layout.date_format if layout else None
+        decimal = layout.decimal if layout else None
+        if not row:
+            return None
+        if len(row) < max(column_mapping.values(), default=0) + 1:
+            if diagnostics is not None and any(field.strip() for field in row):
+                diagnostics.add(REASON_INCOMPLETE_ROW, row_num)
             return None
 
         # Extrai data
         date_col = column_mapping.get('date')
         if date_col is None or date_col >= len(row):
-            logger.warning(f"Linha {row_num}: Coluna de data não encontrada")
+            _reject(diagnostics, REASON_NO_DATE_COLUMN, row_num)
             return None
 
-        transaction_date = self.parse_date(row[date_col])
+        transaction_date = self._try_parse_date(row[date_col], date_format)
         if not transaction_date:
-            logger.warning(f"Linha {row_num}: Data inválida")
+            _reject(diagnostics, REASON_INVALID_DATE, row_num, row[date_col].strip())
             return None
 
         # Extrai descrição
@@ -225,29 +566,33 @@ class CSVBankParser:
         value_col = column_mapping.get('value')
         if value_col is not None and value_col < len(row):
             # Valor em coluna única
-            value = self.parse_value(row[value_col])
+            cents = self._row_cents(row[value_col], decimal, row_num, diagnostics)
         else:
             # Verifica se tem débito e crédito separados
             debit_col = column_mapping.get('debit')
             credit_col = column_mapping.get('credit')
 
             if debit_col is None and credit_col is None:
-                logger.warning(f"Linha {row_num}: Coluna de valor não encontrada")
+                _reject(diagnostics, REASON_NO_VALUE_COLUMN, row_num)
                 return None
 
-            debit_value = 0.0
-            credit_value = 0.0
+            debit_cents = 0
+            credit_cents = 0
 
             if debit_col is not None and debit_col < len(row) and row[debit_col].strip():
-                debit_value = self.parse_value(row[debit_col])
-                if debit_value > 0:  # Débito deve ser negativo
-                    debit_value = -debit_value
+                debit_cents = self._row_cents(row[debit_col], decimal, row_num, diagnostics)
+                if debit_cents > 0:  # Débito deve ser negativo
+                    debit_cents = -debit_cents
 
             if credit_col is not None and credit_col < len(row) and row[credit_col].strip():
-                credit_value = self.parse_value(row[credit_col])
+                credit_cents = self._row_cents(row[credit_col], decimal, row_num, diagnostics)
 
             # Valor final é crédito - débito (considerando que débito já é negativo)
-            value = credit_value + debit_value
+            cents = credit_cents + debit_cents
+
+        if layout is not None and layout.sign == SIGN_INVERTED:
+            # Faturas de cartão: compras positivas viram gastos (negativos)
+            cents = -cents
 
         # Extrai categoria (opcional)
         category_col = column_mapping.get('category')
@@ -259,13 +604,203 @@ class CSVBankParser:
         return Expense(
             id=id,
             name=name,
-            value=value,
+            value=None,
+            cents=cents,
             category=category,
-            date=transaction_date
+            date=transaction_date,
+            merchant=canonical_merchant(name)
         )
 
-
-def parse_csv_bank_statement(file_path: str, encoding: str = 'utf-8-sig') -> ParsedBankStatement:
+    def _row_cents(self, value_str: str, decimal: Optional[str], row_num: int,
+                   diagnostics: Optional[ParseDiagnostics]) -> int:
+        """Valor de uma célula em centavos; inválidos viram 0 e entram no diagnóstico."""
+        cents = self._try_parse_cents(value_str, decimal)
+        if cents is None:
+            _reject(diagnostics, REASON_INVALID_VALUE, row_num, value_str)
+            return 0
+        return cents
+
+
+def _reject(diagnostics: Optional[ParseDiagnostics], reason: str, row_num: int, detail: Any = None) -> None:
+    """Registra um problema de linha no coletor ou, sem coletor, em um aviso de log."""
+    if diagnostics is not None:
+        diagnostics.add(reason, row_num)
+    elif detail is None:
+        logger.warning("Linha %s: %s", row_num, reason)
+    else:
+        logger.warning("Linha %s: %s (%s)", row_num, reason, detail)
+
+
+def _parallel_workers(file_path: str) -> int:
+    """Quantidade de processos para o arquivo (1 = sequencial, o padrão), conforme o ambiente."""
+    raw_workers = os.getenv("CSV_PARALLEL_WORKERS", "").strip()
+    workers = int(raw_workers) if raw_workers else 1
+    if workers <= 1:
+        return 1
+    raw_min = os.getenv("CSV_PARALLEL_MIN_BYTES", "").strip()
+    min_bytes = int(raw_min) if raw_min else DEFAULT_PARALLEL_MIN_BYTES
+    if os.path.getsize(file_path) < min_bytes:
+        return 1
+    return workers
+
+
+def _supports_byte_split(encoding: str) -> bool:
+    """Só codificações em que o byte de quebra de linha e o de aspas são inequívocos."""
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return False
+    if name == "utf-8-sig":
+        return True
+    return not name.startswith(("utf-16", "utf-32")) and '\n"'.encode(name) == b'\n"'
+
+
+def _body_encoding(encoding: str) -> str:
+    # O BOM só pode estar no início do arquivo, antes do cabeçalho
+    return "utf-8" if codecs.lookup(encoding).name == "utf-8-sig" else encoding
+
+
+def _next_record_start(data, record_start: int, position: int) -> int:
+    """
+    Primeira fronteira de registro a partir de `position`
+
+    Uma quebra de linha encerra um registro quando o número de aspas desde o
+    início do registro é par (fora de um campo entre aspas; aspas escapadas
+    "" não alteram a paridade).
+    """
+    quotes = count_bytes(data, _QUOTE, record_start, position)
+    newline = data.find(b"\n", position)
+    while newline != -1:
+        quotes += count_bytes(data, _QUOTE, position, newline)
+        if quotes % 2 == 0:
+            return newline + 1
+        position = newline
+        newline = data.find(b"\n", newline + 1)
+    return len(data)
+
+
+def _split_records(data, start: int, parts: int, end: Optional[int] = None) -> List[Tuple[int, int, int]]:
+    """Divide data[start:end] em até `parts` blocos de registros completos: (início, fim, linha inicial)."""
+    end = len(data) if end is None else end
+    size = end - start
+    if size <= 0:
+        return []
+    bounds = [start]
+    for index in range(1, parts):
+        target = start + size * index // parts
+        if target <= bounds[-1]:
+            continue
+        boundary = _next_record_start(data, bounds[-1], target)
+        if boundary >= end:
+            break
+        bounds.append(boundary)
+    bounds.append(end)
+
+    chunks = []
+    line = count_bytes(data, b"\n", 0, start) + 1
+    for chunk_start, chunk_end in zip(bounds, bounds[1:]):
+        chunks.append((chunk_start, chunk_end, line))
+        line += count_bytes(data, b"\n", chunk_start, chunk_end)
+    return chunks
+
+
+def _numbered_rows(reader, first_line: int) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Registros com o número da linha física do arquivo em que começam
+
+    Usado pelos modos sequencial e paralelo, para que os diagnósticos apontem
+    as mesmas linhas: `first_line` é a linha física da primeira linha lida
+    pelo `reader`, e campos entre aspas com quebras de linha avançam o número.
+    """
+    while True:
+        row_num = first_line + reader.line_num
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        yield row_num, row
+
+
+def _iter_lines(source: MappedInput, csv_format: Dict[str, Any]) -> Iterator[str]:
+    """Linhas do corpo do arquivo, decodificadas sob demanda em blocos de registros completos."""
+    body_start = csv_format['body_start']
+    body_end = csv_format['body_end']
+    encoding = _body_encoding(csv_format['encoding'])
+    errors = csv_format['errors']
+    parts = max(1, (body_end - body_start) // SEQUENTIAL_BLOCK_BYTES)
+    for start, end, _line in _split_records(source.buffer, body_start, parts, body_end):
+        yield from io.StringIO(source.decode(start, end, encoding, errors), newline='')
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _pool_context():
+    """Contexto sem fork: o processo principal já tem threads (logging, coalescer, métricas)."""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool de processos compartilhado pelos parses paralelos (recriado só se `workers` mudar)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+            _pool_workers = workers
+        return _pool
+
+
+def _shutdown_parse_pool() -> None:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+atexit.register(_shutdown_parse_pool)
+
+
+def _parse_chunk(chunk: Tuple[int, int, int], job: Tuple[Any, ...]) -> Tuple[List[Any], ...]:
+    """
+    Faz o parse de um bloco de registros em um processo do pool
+
+    `job` traz o parser e o formato detectado do arquivo; o bloco é lido do
+    próprio arquivo, mapeado só durante a tarefa. Retorna colunas (nomes,
+    centavos, categorias, datas ordinais, comerciantes) em vez de objetos
+    `Expense`: listas de tipos simples custam bem menos para serializar de
+    volta ao processo principal. O último item são os diagnósticos do bloco,
+    somados pelo processo principal.
+    """
+    start, end, first_line = chunk
+    parser, file_path, encoding, errors, delimiter, column_mapping, layout = job
+    with MappedInput(file_path) as source:
+        text = source.decode(start, end, _body_encoding(encoding), errors)
+
+    names, cents, categories, ordinals, merchants = [], [], [], [], []
+    diagnostics = ParseDiagnostics()
+    reader = csv.reader(io.StringIO(text, newline=''), delimiter=delimiter)
+    for row_num, row in _numbered_rows(reader, first_line):
+        try:
+            expense = parser._parse_row(row, column_mapping, row_num, len(names), layout, diagnostics)
+        except Exception:
+            diagnostics.add(REASON_ROW_ERROR, row_num)
+            continue
+        if expense:
+            names.append(expense.name)
+            cents.append(expense.cents)
+            categories.append(expense.category)
+            ordinals.append(expense.date.toordinal())
+            merchants.append(expense.merchant)
+    return names, cents, categories, ordinals, merchants, diagnostics
+
+
+def parse_csv_bank_statement(file_path: str, encoding: Optional[str] = None) -> ParsedBankStatement:
     """Função de conveniência para fazer parse de extrato bancário CSV"""
     parser = CSVBankParser()
     return parser.parse_file(file_path, encoding)
@@ -0,0 +1,82 @@
+"""
+Detecção de codificação de extratos CSV
+
+Exportações de bancos brasileiros chegam em UTF-8 (com ou sem BOM), em
+Windows-1252/Latin-1 e, em sistemas legados, em CP850. A detecção olha só um
+prefixo limitado do arquivo, em uma passada:
+
+1. BOM, quando presente;
+2. ASCII puro ou UTF-8 válido → UTF-8;
+3. caso contrário, a distribuição dos bytes altos decide entre CP1252 e
+   CP850: vence o codec em que mais bytes viram letras do português
+   (ç, ã, é, õ, ...). Bytes sem definição no CP1252 levam ao Latin-1.
+
+Como o prefixo pode não ser representativo, a decodificação do restante usa
+o tratador de erros `FALLBACK_ERRORS`: um byte inválido no codec escolhido é
+decodificado como CP1252 (ou Latin-1) ali mesmo, sem reler o arquivo.
+"""
+
+import codecs
+from typing import Tuple
+
+from src.parsers.mapped import detect_bom
+
+FALLBACK_ERRORS = "fincat-fallback"
+
+_PORTUGUESE_LETTERS = "áàâãéêíóôõúüçÁÀÂÃÉÊÍÓÔÕÚÜÇ"
+# Bytes sem caractere definido no CP1252
+_CP1252_UNDEFINED = bytes([0x81, 0x8D, 0x8F, 0x90, 0x9D])
+_SINGLE_BYTE_CANDIDATES = ("cp1252", "cp850")
+
+
+def _letter_bytes(encoding: str) -> bytes:
+    """Bytes que representam letras acentuadas do português no codec."""
+    return bytes(sorted({letter.encode(encoding)[0] for letter in _PORTUGUESE_LETTERS}))
+
+
+_LETTER_BYTES = {encoding: _letter_bytes(encoding) for encoding in _SINGLE_BYTE_CANDIDATES}
+
+
+def _count_in(data: bytes, byte_set: bytes) -> int:
+    return len(data) - len(data.translate(None, byte_set))
+
+
+def _fallback_handler(error: UnicodeDecodeError) -> Tuple[str, int]:
+    """Decodifica o trecho inválido como CP1252, byte a byte (Latin-1 para bytes indefinidos)."""
+    invalid = bytes(error.object[error.start:error.end])
+    text = "".join(
+        bytes([byte]).decode("latin-1" if byte in _CP1252_UNDEFINED else "cp1252") for byte in invalid
+    )
+    return text, error.end
+
+
+codecs.register_error(FALLBACK_ERRORS, _fallback_handler)
+
+
+def detect_encoding(prefix: bytes) -> str:
+    """
+    Escolhe a codificação a partir do prefixo do arquivo
+
+    Args:
+        prefix: Primeiros bytes do arquivo (tipicamente 64 KiB)
+
+    Returns:
+        Nome do codec ("utf-8-sig", "utf-8", "cp1252", "latin-1", "cp850", "utf-16", ...)
+    """
+    bom_encoding, _ = detect_bom(prefix)
+    if bom_encoding:
+        return bom_encoding
+    if prefix.isascii():
+        return "utf-8"
+    try:
+        # final=False: um caractere multibyte cortado no fim do prefixo não invalida o UTF-8
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    scores = {encoding: _count_in(prefix, letters) for encoding, letters in _LETTER_BYTES.items()}
+    best = max(_SINGLE_BYTE_CANDIDATES, key=lambda encoding: scores[encoding])
+    if best == "cp1252" and _count_in(prefix, _CP1252_UNDEFINED):
+        return "latin-1"
+    return best
@@ -0,0 +1,226 @@
+"""
+Registro de layouts de extratos CSV por banco
+
+A maioria dos envios vem de poucos layouts de exportação. Cada layout é
+identificado por uma impressão digital do cabeçalho normalizado mais o
+delimitador, e o perfil conhecido traz o mapeamento de colunas, o formato de
+data, o separador decimal, a convenção de sinal e quantas linhas de preâmbulo
+antecedem o cabeçalho. Resolver um envio é uma busca em dicionário; só
+layouts desconhecidos passam pela detecção completa (busca do cabeçalho e
+mapeamento por palavras-chave), e o resultado é aprendido para os próximos
+envios do processo.
+
+Variáveis de ambiente:
+- CSV_LAYOUTS_FILE: arquivo JSON de layouts (padrão:
+  src/config/bank_layouts.json).
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.utils.logger import get_logger
+from src.domain.merchants import fold_text
+
+logger = get_logger(__name__)
+
+
+SUPPORTED_LAYOUTS_SCHEMA = 1
+DEFAULT_LAYOUTS_PATH = Path(__file__).resolve().parents[1] / "config" / "bank_layouts.json"
+# Layouts aprendidos mantidos por processo (os mais antigos são descartados)
+MAX_LEARNED_LAYOUTS = 256
+
+SIGN_SIGNED = "signed"
+# Gastos positivos e pagamentos negativos (ex.: faturas de cartão)
+SIGN_INVERTED = "inverted"
+_VALID_SIGNS = (SIGN_SIGNED, SIGN_INVERTED)
+_VALID_DECIMALS = (None, ",", ".")
+_MAPPED_FIELDS = ("date", "description", "value", "debit", "credit", "category")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_headers(headers: Iterable[str]) -> Tuple[str, ...]:
+    """Cabeçalho sem acentos, em maiúsculas e com espaços colapsados."""
+    return tuple(_WHITESPACE_RE.sub(" ", fold_text(header)).strip() for header in headers)
+
+
+def layout_fingerprint(headers: Iterable[str], delimiter: str) -> str:
+    """Impressão digital de (cabeçalho normalizado, delimitador)."""
+    raw = "\x1f".join(normalize_headers(headers)) + "\x1e" + delimiter
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def is_usable_mapping(column_mapping: Dict[str, int]) -> bool:
+    """O mapeamento identifica a data e o valor (coluna única ou débito/crédito)?"""
+    return "date" in column_mapping and any(field in column_mapping for field in ("value", "debit", "credit"))
+
+
+class BankLayout:
+    """Perfil de um layout de exportação CSV"""
+
+    def __init__(self, id: str, delimiter: str, headers: Sequence[str], column_mapping: Dict[str, int],
+                 date_format: Optional[str] = None, decimal: Optional[str] = None,
+                 sign: str = SIGN_SIGNED, skip_lines: int = 0, learned: bool = False):
+        if len(delimiter) != 1:
+            raise ValueError(f"Layout '{id}': delimitador inválido '{delimiter}'")
+        if sign not in _VALID_SIGNS:
+            raise ValueError(f"Layout '{id}': sinal inválido '{sign}'")
+        if decimal not in _VALID_DECIMALS:
+            raise ValueError(f"Layout '{id}': separador decimal inválido '{decimal}'")
+        if skip_lines < 0:
+            raise ValueError(f"Layout '{id}': skip_lines deve ser >= 0")
+        if not is_usable_mapping(column_mapping):
+            raise ValueError(f"Layout '{id}': informe as colunas de data e de valor")
+        self.id: str = id
+        self.delimiter: str = delimiter
+        self.headers: List[str] = list(headers)
+        self.column_mapping: Dict[str, int] = dict(column_mapping)
+        self.date_format: Optional[str] = date_format
+        self.decimal: Optional[str] = decimal
+        self.sign: str = sign
+        self.skip_lines: int = skip_lines
+        self.learned: bool = learned
+        self.fingerprint: str = layout_fingerprint(self.headers, delimiter)
+
+
+def _layout_from_dict(raw: Dict[str, Any]) -> BankLayout:
+    layout_id = raw.get("id")
+    if not layout_id:
+        raise ValueError("Layout sem 'id'")
+    headers = list(raw.get("headers") or [])
+    positions = {name: index for index, name in enumerate(normalize_headers(headers))}
+    column_mapping = {}
+    for field, header in (raw.get("columns") or {}).items():
+        if field not in _MAPPED_FIELDS:
+            raise ValueError(f"Layout '{layout_id}': campo desconhecido '{field}'")
+        normalized = normalize_headers([header])[0]
+        if normalized not in positions:
+            raise ValueError(f"Layout '{layout_id}': coluna '{header}' não está no cabeçalho")
+        column_mapping[field] = positions[normalized]
+    return BankLayout(
+        id=layout_id,
+        delimiter=raw.get("delimiter", ","),
+        headers=headers,
+        column_mapping=column_mapping,
+        date_format=raw.get("date_format"),
+        decimal=raw.get("decimal"),
+        sign=raw.get("sign", SIGN_SIGNED),
+        skip_lines=int(raw.get("skip_lines", 0)),
+    )
+
+
+class LayoutRegistry:
+    """Layouts conhecidos indexados pela impressão digital do cabeçalho"""
+
+    def __init__(self, layouts: Iterable[BankLayout], version: str = "",
+                 max_learned: int = MAX_LEARNED_LAYOUTS):
+        self.version: str = version
+        self.max_learned: int = max_learned
+        self._layouts: Dict[str, BankLayout] = {}
+        self._learned: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        for layout in layouts:
+            if layout.fingerprint in self._layouts:
+                raise ValueError(f"Layout '{layout.id}' duplica o cabeçalho de '{self._layouts[layout.fingerprint].id}'")
+            self._layouts[layout.fingerprint] = layout
+        self._refresh_index()
+
+    def __len__(self) -> int:
+        return len(self._layouts)
+
+    def _refresh_index(self) -> None:
+        # Tuplas substituídas por inteiro: leituras concorrentes não precisam do lock
+        self.delimiters: Tuple[str, ...] = tuple(dict.fromkeys(
+            layout.delimiter for layout in self._layouts.values()
+        ))
+        self.max_skip_lines: int = max((layout.skip_lines for layout in self._layouts.values()), default=0)
+
+    def get(self, fingerprint: str) -> Optional[BankLayout]:
+        return self._layouts.get(fingerprint)
+
+    def match(self, lines: Sequence[str]) -> Optional[BankLayout]:
+        """
+        Procura um layout conhecido nas primeiras linhas do arquivo
+
+        Cada linha candidata a cabeçalho (até `max_skip_lines` linhas de
+        preâmbulo) é dividida com os delimitadores conhecidos; a primeira
+        impressão digital registrada com o mesmo preâmbulo resolve o layout.
+        """
+        for offset, line in enumerate(lines[:self.max_skip_lines + 1]):
+            for delimiter in self.delimiters:
+                if delimiter not in line:
+                    continue
+                headers = next(csv.reader([line], delimiter=delimiter), [])
+                layout = self._layouts.get(layout_fingerprint(headers, delimiter))
+                if layout is not None and layout.skip_lines == offset:
+                    return layout
+        return None
+
+    def learn(self, headers: Sequence[str], delimiter: str, column_mapping: Dict[str, int],
+              skip_lines: int = 0) -> Optional[BankLayout]:
+        """
+        Registra um layout detectado por completo
+
+        Só aprende cabeçalhos com mais de uma coluna e mapeamento utilizável;
+        layouts já conhecidos não são sobrescritos. Formato de data, separador
+        decimal e sinal ficam a cargo das heurísticas do parser.
+        """
+        if len(headers) < 2 or len(delimiter) != 1 or not is_usable_mapping(column_mapping):
+            return None
+        fingerprint = layout_fingerprint(headers, delimiter)
+        with self._lock:
+            known = self._layouts.get(fingerprint)
+            if known is not None:
+                return known
+            layout = BankLayout(id=f"aprendido-{fingerprint}", delimiter=delimiter, headers=headers,
+                                column_mapping=column_mapping, skip_lines=skip_lines, learned=True)
+            self._layouts[fingerprint] = layout
+            self._learned[fingerprint] = None
+            while len(self._learned) > self.max_learned:
+                oldest, _ = self._learned.popitem(last=False)
+                self._layouts.pop(oldest, None)
+            self._refresh_index()
+        logger.info("Layout CSV aprendido | id=%s | colunas=%s", layout.id, len(headers))
+        return layout
+
+
+def load_layout_registry(path: Optional[str] = None) -> LayoutRegistry:
+    """
+    Carrega os layouts conhecidos de um arquivo JSON versionado
+
+    Args:
+        path: Caminho do arquivo. Se não fornecido, usa CSV_LAYOUTS_FILE ou o
+              arquivo padrão em src/config/bank_layouts.json
+
+    Raises:
+        ValueError: Se o arquivo tiver esquema não suportado ou layouts inválidos
+    """
+    layouts_path = Path(path or os.getenv("CSV_LAYOUTS_FILE") or DEFAULT_LAYOUTS_PATH)
+    with open(layouts_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    schema = data.get("schema")
+    if schema != SUPPORTED_LAYOUTS_SCHEMA:
+        raise ValueError(f"Esquema de layouts não suportado: {schema}")
+
+    registry = LayoutRegistry(
+        [_layout_from_dict(raw) for raw in data.get("layouts", [])],
+        version=str(data.get("version", "")),
+    )
+    logger.info("Layouts CSV carregados | versão=%s | layouts=%s | arquivo=%s",
+                registry.version, len(registry), layouts_path)
+    return registry
+
+
+@lru_cache(maxsize=1)
+def get_default_layout_registry() -> LayoutRegistry:
+    """Retorna o registro padrão (carregado uma única vez por processo)."""
+    return load_layout_registry()
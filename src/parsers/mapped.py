@@ -0,0 +1,101 @@
+"""
+Leitura de arquivos de entrada mapeados em memória
+
+O arquivo é mapeado uma única vez (`mmap`, somente leitura) e os parsers
+trabalham sobre fatias `memoryview` do mapeamento: a detecção de BOM e de
+formato usa só o prefixo, e os blocos de registros são decodificados
+diretamente das páginas mapeadas, sem cópias intermediárias em `bytes` nem
+leituras bufferizadas. Como as páginas vêm do cache do sistema, vários
+processos (ou envios simultâneos do mesmo arquivo) compartilham a memória.
+"""
+
+import codecs
+import io
+import mmap
+from typing import Optional, Tuple
+
+# Prefixo usado para detecção de BOM/codificação e do formato do arquivo
+PREFIX_BYTES = 64 * 1024
+# Janela para contagens de bytes (mmap não oferece count): limita cópias temporárias
+_COUNT_WINDOW = 1024 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def detect_bom(prefix: bytes) -> Tuple[Optional[str], int]:
+    """Retorna (codificação indicada pelo BOM, tamanho do BOM) ou (None, 0)."""
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding, len(bom)
+    return None, 0
+
+
+class MappedInput:
+    """Arquivo mapeado em memória, somente leitura"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            try:
+                self._mmap: Optional[mmap.mmap] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Arquivos vazios não podem ser mapeados
+                self._mmap = None
+        self.buffer = self._mmap if self._mmap is not None else b""
+        self.view = memoryview(self.buffer)
+
+    def __enter__(self) -> "MappedInput":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def close(self) -> None:
+        # O memoryview precisa ser liberado antes de fechar o mapeamento
+        self.view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def stream(self):
+        """Objeto de arquivo binário (read/seek) sobre o mapeamento, para bibliotecas que esperam um arquivo."""
+        if self._mmap is None:
+            return io.BytesIO(b"")
+        self._mmap.seek(0)
+        return self._mmap
+
+    def prefix(self, size: Optional[int] = None) -> bytes:
+        return bytes(self.view[:PREFIX_BYTES if size is None else size])
+
+    def bom(self) -> Tuple[Optional[str], int]:
+        return detect_bom(self.prefix(4))
+
+    def decode(self, start: int, end: int, encoding: str, errors: str = "strict") -> str:
+        """Decodifica uma fatia do arquivo sem copiá-la para `bytes`."""
+        return str(self.view[start:end], encoding, errors)
+
+    def find(self, sub: bytes, start: int = 0) -> int:
+        return self.buffer.find(sub, start)
+
+    def count(self, sub: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        return count_bytes(self.buffer, sub, start, end)
+
+
+def count_bytes(buffer, sub: bytes, start: int = 0, end: Optional[int] = None) -> int:
+    """Conta ocorrências de um único byte em buffer[start:end], em janelas limitadas."""
+    end = len(buffer) if end is None else min(end, len(buffer))
+    if isinstance(buffer, bytes):
+        return buffer.count(sub, start, end)
+    total = 0
+    for window_start in range(start, end, _COUNT_WINDOW):
+        total += buffer[window_start:min(window_start + _COUNT_WINDOW, end)].count(sub)
+    return total
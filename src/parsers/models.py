@@ -1,17 +1,87 @@
+from collections import Counter
 from datetime import datetime, date
-from typing import List
+from typing import Any, Dict, List, Optional
+
+from src.domain.money import DEFAULT_CURRENCY, cents_from_float
 
 
 class Expense:
-    def __init__(self, id: int, name: str, value: float, category: str, date: date):
+    # Sem __dict__ por instância: extratos grandes criam centenas de milhares de Expense
+    __slots__ = ("id", "name", "cents", "currency", "category", "date", "merchant")
+
+    def __init__(self, id: int, name: str, value: Optional[float], category: str, date: date,
+                 merchant: Optional[str] = None, cents: Optional[int] = None,
+                 currency: str = DEFAULT_CURRENCY):
         self.id: int = id
         self.name: str = name
-        self.value: float = value
+        # Valor exato em centavos; `value` (float em reais) é derivado dele
+        self.cents: int = cents if cents is not None else cents_from_float(value or 0.0)
+        self.currency: str = currency
         self.category: str = category
         self.date: date = date
+        # Id canônico do comerciante (ver src/domain/merchants.py)
+        self.merchant: Optional[str] = merchant
+
+    @property
+    def value(self) -> float:
+        return self.cents / 100
+
+    @value.setter
+    def value(self, value: float) -> None:
+        self.cents = cents_from_float(value)
+
+
+class ParseDiagnostics:
+    """
+    Linhas ignoradas ou corrigidas durante o parse, agregadas por motivo
+
+    Substitui um aviso de log por linha: cada motivo guarda a contagem e os
+    números das primeiras linhas afetadas, e o parser emite um único registro
+    de resumo por arquivo.
+    """
+
+    MAX_SAMPLES = 3
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.samples: Dict[str, List[int]] = {}
+
+    def add(self, reason: str, row_num: int) -> None:
+        self.counts[reason] += 1
+        samples = self.samples.setdefault(reason, [])
+        if len(samples) < self.MAX_SAMPLES:
+            samples.append(row_num)
+
+    def merge(self, other: "ParseDiagnostics") -> None:
+        """Acumula os diagnósticos de outro bloco (ex.: processos do parse paralelo)."""
+        self.counts.update(other.counts)
+        for reason, rows in other.samples.items():
+            samples = self.samples.setdefault(reason, [])
+            samples.extend(rows[:self.MAX_SAMPLES - len(samples)])
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def summary(self) -> str:
+        """Texto curto: "Data inválida: 12 (linhas 5, 9, 14)", um motivo por item."""
+        parts = []
+        for reason, count in self.counts.most_common():
+            rows = ", ".join(str(row) for row in sorted(self.samples.get(reason, [])))
+            parts.append(f"{reason}: {count} (linhas {rows})" if rows else f"{reason}: {count}")
+        return "; ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            reason: {"count": count, "sample_rows": sorted(self.samples.get(reason, []))}
+            for reason, count in self.counts.most_common()
+        }
 
 
 class ParsedBankStatement:
-    def __init__(self, expenses: List[Expense], date: datetime):
+    def __init__(self, expenses: List[Expense], date: datetime,
+                 diagnostics: Optional[ParseDiagnostics] = None):
         self.expenses: List[Expense] = expenses
-        self.date: datetime = date
\ No newline at end of file
+        self.date: datetime = date
+        # Linhas ignoradas/corrigidas no parse (vazio para formatos sem diagnóstico)
+        self.diagnostics: ParseDiagnostics = diagnostics if diagnostics is not None else ParseDiagnostics()
\ No newline at end of file
@@ -3,12 +3,16 @@ Parser para arquivos OFX
 """
 
 from datetime import datetime
+from decimal import Decimal
 
 from ofxtools import OFXTree
 from ofxtools.models import STMTTRN
 
 from src.utils.logger import get_logger
 from src.parsers.models import ParsedBankStatement, Expense
+from src.parsers.mapped import MappedInput
+from src.domain.merchants import canonical_merchant
+from src.domain.money import DEFAULT_CURRENCY, cents_from_decimal
 
 logger = get_logger(__name__)
 
@@ -28,12 +32,12 @@ def parse_ofx_file(file_path: str) -> ParsedBankStatement:
         FileNotFoundError: Se o arquivo não for encontrado
     """
     try:
-        logger.info(f"Iniciando parsing do arquivo OFX: {file_path}")
+        logger.info("Iniciando parsing do arquivo OFX: %s", file_path)
         
         # Carrega e faz parsing do arquivo OFX
         parser = OFXTree()
-        with open(file_path, 'rb') as ofx_file:
-            parser.parse(ofx_file)
+        with MappedInput(file_path) as source:
+            parser.parse(source.stream())
         
         ofx = parser.convert()
         
@@ -42,12 +46,13 @@ def parse_ofx_file(file_path: str) -> ParsedBankStatement:
             raise ValueError("Nenhum extrato encontrado no arquivo OFX")
         
         statement = ofx.statements[0]  # Pega o primeiro extrato
+        currency = getattr(statement, "curdef", None) or DEFAULT_CURRENCY
         
         # Extrai as transações
         expenses = []
         if statement.transactions:
             for transaction in statement.transactions:
-                expense = _convert_transaction_to_expense(transaction, len(expenses))
+                expense = _convert_transaction_to_expense(transaction, len(expenses), currency)
                 expenses.append(expense)
         
         # Data do extrato (usa a data da última transação ou data atual se não houver transações)
@@ -57,23 +62,24 @@ def parse_ofx_file(file_path: str) -> ParsedBankStatement:
         
         result = ParsedBankStatement(expenses=expenses, date=statement_date)
         
-        logger.info(f"Parsing concluído. {len(expenses)} transações encontradas")
+        logger.info("Parsing concluído. %s transações encontradas", len(expenses))
         return result
         
     except FileNotFoundError:
-        logger.error(f"Arquivo não encontrado: {file_path}")
+        logger.error("Arquivo não encontrado: %s", file_path)
         raise
     except Exception as e:
-        logger.error(f"Erro ao fazer parsing do arquivo OFX: {str(e)}")
+        logger.error("Erro ao fazer parsing do arquivo OFX: %s", str(e))
         raise ValueError(f"Erro ao processar arquivo OFX: {str(e)}")
 
 
-def _convert_transaction_to_expense(transaction: STMTTRN, id) -> Expense:
+def _convert_transaction_to_expense(transaction: STMTTRN, id, currency: str = DEFAULT_CURRENCY) -> Expense:
     """
     Converte uma transação OFX para o modelo Expense.
     
     Args:
         transaction: Transação do OFX
+        currency: Moeda do extrato (CURDEF)
         
     Returns:
         Expense: Objeto Expense formatado
@@ -81,8 +87,12 @@ def _convert_transaction_to_expense(transaction: STMTTRN, id) -> Expense:
     # Nome da transação (usa memo ou payee, priorizando memo)
     name = transaction.memo or transaction.payee or "Transação sem descrição"
     
-    # Valor da transação (converte Decimal para float)
-    value = float(transaction.trnamt) if transaction.trnamt else 0.0
+    # Valor da transação: Decimal direto para centavos, sem passar por float
+    amount = transaction.trnamt
+    if amount is None:
+        cents = 0
+    else:
+        cents = cents_from_decimal(amount if isinstance(amount, Decimal) else Decimal(str(amount)))
     
     # Categoria padrão (será classificada posteriormente pelo AI)
     category = "Não categorizado"
@@ -93,9 +103,12 @@ def _convert_transaction_to_expense(transaction: STMTTRN, id) -> Expense:
     return Expense(
         id=id,
         name=name,
-        value=value,
+        value=None,
+        cents=cents,
+        currency=currency,
         category=category,
-        date=transaction_date
+        date=transaction_date,
+        merchant=canonical_merchant(name)
     )
 
 
@@ -0,0 +1,198 @@
+"""
+Estatísticas vetorizadas das transações categorizadas
+
+As transações são convertidas uma única vez em arrays NumPy (centavos em
+int64, datas em datetime64[D] e códigos inteiros para categoria e
+comerciante); totais por categoria, tendência mensal, principais
+comerciantes e a divisão entre entradas e gastos saem de `np.bincount`
+sobre esses códigos, sem laços por transação.
+"""
+
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from src.domain.money import CENTS_FIELD, CURRENCY_FIELD, DEFAULT_CURRENCY
+from src.utils import format_cents
+
+DEFAULT_TOP_N = 5
+UNCATEGORIZED = "Outros"
+
+
+def _factorize(values: Iterable[Any], fallback: str) -> Tuple[np.ndarray, List[str]]:
+    """Converte rótulos em códigos inteiros (ordem de primeira ocorrência)."""
+    index: Dict[str, int] = {}
+    codes = [index.setdefault(value or fallback, len(index)) for value in values]
+    return np.asarray(codes, dtype=np.int32), list(index)
+
+
+class TransactionArrays:
+    """Colunas das transações em arrays NumPy"""
+
+    def __init__(self, cents: np.ndarray, dates: np.ndarray,
+                 category_codes: np.ndarray, categories: List[str],
+                 merchant_codes: np.ndarray, merchants: List[str],
+                 currency: str = DEFAULT_CURRENCY):
+        self.cents: np.ndarray = cents
+        # Um extrato tem uma única moeda (CURDEF no OFX; BRL no CSV)
+        self.currency: str = currency
+        self.dates: np.ndarray = dates
+        self.category_codes: np.ndarray = category_codes
+        self.categories: List[str] = categories
+        self.merchant_codes: np.ndarray = merchant_codes
+        self.merchants: List[str] = merchants
+
+    def __len__(self) -> int:
+        return len(self.cents)
+
+    @classmethod
+    def from_transactions(cls, transactions: Sequence[Dict[str, Any]]) -> "TransactionArrays":
+        count = len(transactions)
+        try:
+            # Centavos exatos vindos dos parsers: sem conversão a partir de float
+            cents = np.fromiter(map(itemgetter(CENTS_FIELD), transactions), dtype=np.int64, count=count)
+        except (KeyError, TypeError):
+            # Transações legadas (sem value_cents): arredonda o float em reais
+            values = np.fromiter((tx.get("value") or 0.0 for tx in transactions), dtype=np.float64, count=count)
+            cents = np.rint(values * 100).astype(np.int64)
+        dates = np.array([str(tx.get("date") or "")[:10] or "NaT" for tx in transactions], dtype="datetime64[D]")
+        category_codes, categories = _factorize((tx.get("category") for tx in transactions), UNCATEGORIZED)
+        merchant_codes, merchants = _factorize(
+            (tx.get("merchant") or tx.get("name") for tx in transactions), UNCATEGORIZED
+        )
+        currency = (transactions[0].get(CURRENCY_FIELD) if transactions else None) or DEFAULT_CURRENCY
+        return cls(cents, dates, category_codes, categories, merchant_codes, merchants, currency)
+
+
+class Report:
+    """Resumo estatístico de um conjunto de transações (valores em centavos)"""
+
+    def __init__(self, transaction_count: int, spent_cents: int, income_cents: int,
+                 by_category: List[Dict[str, Any]], monthly: List[Dict[str, Any]],
+                 top_merchants: List[Dict[str, Any]], currency: str = DEFAULT_CURRENCY):
+        self.transaction_count: int = transaction_count
+        self.currency: str = currency
+        self.spent_cents: int = spent_cents
+        self.income_cents: int = income_cents
+        self.by_category: List[Dict[str, Any]] = by_category
+        self.monthly: List[Dict[str, Any]] = monthly
+        self.top_merchants: List[Dict[str, Any]] = top_merchants
+
+    @property
+    def net_cents(self) -> int:
+        return self.income_cents - self.spent_cents
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "transaction_count": self.transaction_count,
+            "currency": self.currency,
+            "spent_cents": self.spent_cents,
+            "income_cents": self.income_cents,
+            "net_cents": self.net_cents,
+            "by_category": self.by_category,
+            "monthly": self.monthly,
+            "top_merchants": self.top_merchants,
+        }
+
+
+def _sums(codes: np.ndarray, weights: np.ndarray, size: int) -> np.ndarray:
+    # bincount acumula em float64: exato para somas de centavos abaixo de 2**53
+    return np.rint(np.bincount(codes, weights=weights, minlength=size)).astype(np.int64)
+
+
+def build_report(arrays: TransactionArrays, top_n: int = DEFAULT_TOP_N) -> Report:
+    """Calcula totais por categoria, tendência mensal, principais comerciantes e entradas/gastos."""
+    cents = arrays.cents
+    spent = np.where(cents < 0, -cents, 0)
+    income = np.where(cents > 0, cents, 0)
+
+    n_categories = len(arrays.categories)
+    category_spent = _sums(arrays.category_codes, spent, n_categories)
+    category_income = _sums(arrays.category_codes, income, n_categories)
+    category_count = np.bincount(arrays.category_codes, minlength=n_categories)
+    by_category = [
+        {
+            "category": arrays.categories[code],
+            "spent_cents": int(category_spent[code]),
+            "income_cents": int(category_income[code]),
+            "count": int(category_count[code]),
+        }
+        for code in np.lexsort((-category_income, -category_spent))
+    ]
+
+    monthly: List[Dict[str, Any]] = []
+    dated = ~np.isnat(arrays.dates)
+    if dated.any():
+        months = arrays.dates[dated].astype("datetime64[M]").astype(np.int64)
+        first = int(months.min())
+        offsets = months - first
+        size = int(offsets.max()) + 1
+        month_spent = _sums(offsets, spent[dated], size)
+        month_income = _sums(offsets, income[dated], size)
+        month_count = np.bincount(offsets, minlength=size)
+        for offset in np.flatnonzero(month_count):
+            monthly.append({
+                "month": str(np.datetime64(first + int(offset), "M")),
+                "spent_cents": int(month_spent[offset]),
+                "income_cents": int(month_income[offset]),
+                "count": int(month_count[offset]),
+            })
+
+    n_merchants = len(arrays.merchants)
+    merchant_spent = _sums(arrays.merchant_codes, spent, n_merchants)
+    merchant_count = np.bincount(arrays.merchant_codes, weights=(spent > 0), minlength=n_merchants)
+    top_codes: np.ndarray = np.array([], dtype=np.int64)
+    if n_merchants and top_n > 0:
+        k = min(top_n, n_merchants)
+        # argpartition: O(n) para selecionar os k maiores antes de ordená-los
+        candidates = np.argpartition(-merchant_spent, k - 1)[:k]
+        top_codes = candidates[np.argsort(-merchant_spent[candidates], kind="stable")]
+    top_merchants = [
+        {
+            "merchant": arrays.merchants[code],
+            "spent_cents": int(merchant_spent[code]),
+            "count": int(merchant_count[code]),
+        }
+        for code in top_codes
+        if merchant_spent[code] > 0
+    ]
+
+    return Report(
+        transaction_count=len(arrays),
+        spent_cents=int(spent.sum()),
+        income_cents=int(income.sum()),
+        by_category=by_category,
+        monthly=monthly,
+        top_merchants=top_merchants,
+        currency=arrays.currency,
+    )
+
+
+def report_from_transactions(transactions: Sequence[Dict[str, Any]], top_n: int = DEFAULT_TOP_N) -> Report:
+    """Atalho: converte as transações em arrays e calcula o relatório."""
+    return build_report(TransactionArrays.from_transactions(transactions), top_n)
+
+
+def format_report_lines(report: Report, max_categories: int = 3, max_merchants: int = 3,
+                        max_months: int = 3) -> List[str]:
+    """Linhas curtas do relatório para a legenda do resultado."""
+    def money(cents: int) -> str:
+        return format_cents(cents, report.currency)
+
+    lines = [f"💸 Gastos: {money(report.spent_cents)} | 💰 Entradas: {money(report.income_cents)}"]
+    categories = [row for row in report.by_category if row["spent_cents"] > 0][:max_categories]
+    if categories:
+        lines.append("Maiores categorias: " + ", ".join(
+            f"{row['category']} {money(row['spent_cents'])}" for row in categories
+        ))
+    if report.top_merchants and max_merchants > 0:
+        lines.append("Maiores gastos: " + ", ".join(
+            f"{row['merchant']} {money(row['spent_cents'])}" for row in report.top_merchants[:max_merchants]
+        ))
+    if len(report.monthly) > 1 and max_months > 0:
+        lines.append("Por mês: " + ", ".join(
+            f"{row['month']} {money(row['spent_cents'])}" for row in report.monthly[-max_months:]
+        ))
+    return lines
+
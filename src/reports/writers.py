@@ -0,0 +1,303 @@
+"""
+Escrita em fluxo dos arquivos de resultado
+
+As transações categorizadas são consumidas de um iterável, em blocos, e
+gravadas à medida que chegam, em todos os formatos pedidos numa única
+passada: a memória não cresce com o número de transações.
+
+Formatos (artefatos):
+- "csv": `csv.writer` com tuplas; é o arquivo entregue ao usuário e
+  publicado no cache, por isso sempre gerado;
+- "json": um único objeto compacto com os metadados, "transactions" e
+  "total_transactions" (as mesmas chaves do payload de resultado);
+- "ndjson": uma transação por linha, sem metadados;
+- "xlsx": planilha gravada em modo write-only (requer `openpyxl`);
+- "parquet": valores em centavos (int64), em row groups de até
+  PARQUET_ROW_GROUP linhas (requer `pyarrow`).
+
+Variáveis de ambiente:
+- RESULT_ARTIFACTS: formatos gerados, separados por vírgula (padrão: só
+  "csv" em produção; "csv,json" em modo de debug).
+"""
+
+import csv
+import importlib.util
+import json
+import os
+from contextlib import ExitStack
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.domain.money import CURRENCY_FIELD, DEFAULT_CURRENCY, transaction_cents
+from src.utils import format_cents_column
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RESULT_COLUMNS = (
+    "id",
+    "name",
+    "merchant",
+    "value",
+    "date",
+    "category",
+    "categorization_confidence",
+    "categorization_reasoning",
+)
+
+ARTIFACT_CSV = "csv"
+ARTIFACT_JSON = "json"
+ARTIFACT_NDJSON = "ndjson"
+ARTIFACT_XLSX = "xlsx"
+ARTIFACT_PARQUET = "parquet"
+ARTIFACT_FORMATS = (ARTIFACT_CSV, ARTIFACT_JSON, ARTIFACT_NDJSON, ARTIFACT_XLSX, ARTIFACT_PARQUET)
+# Entregue ao usuário e publicado no cache
+DELIVERED_ARTIFACTS = (ARTIFACT_CSV,)
+DEBUG_ARTIFACTS = (ARTIFACT_CSV, ARTIFACT_JSON)
+# Formatos que dependem de bibliotecas opcionais
+_OPTIONAL_MODULES = {ARTIFACT_XLSX: "openpyxl", ARTIFACT_PARQUET: "pyarrow"}
+
+# Transações por bloco (formatação dos valores e escrita)
+WRITE_BLOCK = 128
+# Linhas por row group do Parquet (blocos pequenos demais prejudicam a leitura)
+PARQUET_ROW_GROUP = 65536
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def iter_blocks(transactions: Iterable[Dict[str, Any]], size: int = WRITE_BLOCK) -> Iterator[List[Dict[str, Any]]]:
+    """Agrupa as transações em listas de até `size` itens, consumindo o iterável aos poucos."""
+    iterator = iter(transactions)
+    return iter(lambda: list(islice(iterator, size)), [])
+
+
+def csv_rows(block: List[Dict[str, Any]], cents: Optional[List[int]] = None) -> List[Tuple[Any, ...]]:
+    """Linhas do CSV de resultado (na ordem de RESULT_COLUMNS) para um bloco de transações."""
+    if cents is None:
+        cents = list(map(transaction_cents, block))
+    # Valor numérico ("-1234.56"), legível pelo layout fincat-export
+    values = format_cents_column(cents, symbol="", decimal=".", thousands="")
+    return [
+        (
+            tx.get("id"),
+            tx.get("name", ""),
+            tx.get("merchant") or "",
+            value,
+            tx.get("date", ""),
+            tx.get("category", ""),
+            tx.get("categorization_confidence", ""),
+            tx.get("categorization_reasoning", ""),
+        )
+        for tx, value in zip(block, values)
+    ]
+
+
+def parse_artifact_formats(text: str) -> Tuple[str, ...]:
+    """
+    Lê uma lista de formatos separados por vírgula ("csv,json")
+
+    Raises:
+        ValueError: Se algum formato não for suportado
+    """
+    formats = tuple(dict.fromkeys(part.strip().lower() for part in text.split(",") if part.strip()))
+    unknown = [fmt for fmt in formats if fmt not in ARTIFACT_FORMATS]
+    if unknown:
+        raise ValueError(f"Formato de resultado não suportado: {', '.join(unknown)}")
+    return formats
+
+
+def is_artifact_available(fmt: str) -> bool:
+    """A biblioteca opcional do formato (se houver) está instalada?"""
+    module = _OPTIONAL_MODULES.get(fmt)
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def resolve_artifact_formats(value: Optional[str] = None, debug: bool = False) -> Tuple[str, ...]:
+    """
+    Formatos a gerar para um extrato
+
+    Usa `value` ou RESULT_ARTIFACTS; sem configuração, produção gera só o que é
+    entregue (CSV) e debug também o JSON. O CSV é sempre incluído. Uma lista
+    inválida volta ao padrão e formatos sem a biblioteca instalada são
+    ignorados, ambos com aviso no log.
+    """
+    default = DEBUG_ARTIFACTS if debug else DELIVERED_ARTIFACTS
+    text = os.getenv("RESULT_ARTIFACTS", "") if value is None else value
+    if not text.strip():
+        return default
+    try:
+        formats = parse_artifact_formats(text)
+    except ValueError as e:
+        logger.warning("RESULT_ARTIFACTS inválido (%s); usando %s", e, ",".join(default))
+        return default
+    missing = [fmt for fmt in formats if not is_artifact_available(fmt)]
+    if missing:
+        logger.warning("Formatos de resultado ignorados (biblioteca não instalada): %s", ",".join(missing))
+    return tuple(dict.fromkeys(DELIVERED_ARTIFACTS + tuple(fmt for fmt in formats if fmt not in missing)))
+
+
+class _CsvSink:
+    def __init__(self, stack: ExitStack, path: str, metadata: Optional[Dict[str, Any]]):
+        self.writer = csv.writer(stack.enter_context(open(path, "w", encoding="utf-8", newline="")))
+        self.writer.writerow(RESULT_COLUMNS)
+
+    def write(self, block, cents, rows) -> None:
+        self.writer.writerows(rows)
+
+    def finish(self, count: int) -> None:
+        pass
+
+
+class _JsonSink:
+    def __init__(self, stack: ExitStack, path: str, metadata: Optional[Dict[str, Any]]):
+        self.file = stack.enter_context(open(path, "w", encoding="utf-8"))
+        self.file.write(_encode(metadata or {})[:-1] + ("," if metadata else "") + '"transactions":[')
+        self.separator = ""
+
+    def write(self, block, cents, rows) -> None:
+        self.file.write(self.separator + ",".join(map(_encode, block)))
+        self.separator = ","
+
+    def finish(self, count: int) -> None:
+        self.file.write(f'],"total_transactions":{count}}}')
+
+
+class _NdjsonSink:
+    def __init__(self, stack: ExitStack, path: str, metadata: Optional[Dict[str, Any]]):
+        self.file = stack.enter_context(open(path, "w", encoding="utf-8"))
+
+    def write(self, block, cents, rows) -> None:
+        self.file.write("\n".join(map(_encode, block)) + "\n")
+
+    def finish(self, count: int) -> None:
+        pass
+
+
+class _XlsxSink:
+    def __init__(self, stack: ExitStack, path: str, metadata: Optional[Dict[str, Any]]):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ImportError("Biblioteca 'openpyxl' não instalada. Execute: pip install openpyxl")
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Transações")
+        self.sheet.append(RESULT_COLUMNS)
+
+    def write(self, block, cents, rows) -> None:
+        # Valor numérico na planilha, para somas e filtros
+        for row, value in zip(rows, cents):
+            self.sheet.append((*row[:3], value / 100, *row[4:]))
+
+    def finish(self, count: int) -> None:
+        self.workbook.save(self.path)
+
+
+class _ParquetSink:
+    _FIELDS = ("id", "name", "merchant", "value_cents", "currency", "date", "category",
+               "categorization_confidence", "categorization_reasoning")
+
+    def __init__(self, stack: ExitStack, path: str, metadata: Optional[Dict[str, Any]]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Biblioteca 'pyarrow' não instalada. Execute: pip install pyarrow")
+        self.pa = pa
+        self.schema = pa.schema([
+            ("id", pa.int64()), ("name", pa.string()), ("merchant", pa.string()),
+            ("value_cents", pa.int64()), ("currency", pa.string()), ("date", pa.string()),
+            ("category", pa.string()), ("categorization_confidence", pa.float64()),
+            ("categorization_reasoning", pa.string()),
+        ])
+        self.writer = stack.enter_context(pq.ParquetWriter(path, self.schema))
+        self.columns: Dict[str, list] = {field: [] for field in self._FIELDS}
+
+    def write(self, block, cents, rows) -> None:
+        columns = self.columns
+        columns["value_cents"].extend(cents)
+        for tx in block:
+            columns["id"].append(tx.get("id"))
+            columns["name"].append(tx.get("name"))
+            columns["merchant"].append(tx.get("merchant"))
+            columns["currency"].append(tx.get(CURRENCY_FIELD, DEFAULT_CURRENCY))
+            columns["date"].append(tx.get("date"))
+            columns["category"].append(tx.get("category"))
+            columns["categorization_confidence"].append(tx.get("categorization_confidence"))
+            columns["categorization_reasoning"].append(tx.get("categorization_reasoning"))
+        if len(columns["id"]) >= PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self.columns["id"]:
+            self.writer.write_table(self.pa.table(self.columns, schema=self.schema))
+            self.columns = {field: [] for field in self._FIELDS}
+
+    def finish(self, count: int) -> None:
+        self._flush()
+
+
+_SINKS = {
+    ARTIFACT_CSV: _CsvSink,
+    ARTIFACT_JSON: _JsonSink,
+    ARTIFACT_NDJSON: _NdjsonSink,
+    ARTIFACT_XLSX: _XlsxSink,
+    ARTIFACT_PARQUET: _ParquetSink,
+}
+
+
+def write_artifacts(transactions: Iterable[Dict[str, Any]], paths: Dict[str, str],
+                    metadata: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Escreve os arquivos de resultado numa única passada pelas transações
+
+    Os centavos e as linhas tabulares de cada bloco são calculados uma vez e
+    compartilhados por todos os formatos.
+
+    Args:
+        transactions: Transações categorizadas (lista ou gerador)
+        paths: Caminho de saída por formato (ex.: {"csv": ..., "json": ...})
+        metadata: Chaves de topo do JSON, escritas antes de "transactions"
+
+    Returns:
+        Número de transações escritas
+
+    Raises:
+        ValueError: Se algum formato não for suportado
+        ImportError: Se faltar a biblioteca opcional de um formato
+    """
+    unknown = [fmt for fmt in paths if fmt not in _SINKS]
+    if unknown:
+        raise ValueError(f"Formato de resultado não suportado: {', '.join(unknown)}")
+    count = 0
+    with ExitStack() as stack:
+        sinks = [_SINKS[fmt](stack, str(path), metadata) for fmt, path in paths.items()]
+        tabular = any(fmt in paths for fmt in (ARTIFACT_CSV, ARTIFACT_XLSX))
+        for block in iter_blocks(transactions):
+            cents = list(map(transaction_cents, block))
+            rows = csv_rows(block, cents) if tabular else None
+            for sink in sinks:
+                sink.write(block, cents, rows)
+            count += len(block)
+        for sink in sinks:
+            sink.finish(count)
+    return count
+
+
+def write_results(transactions: Iterable[Dict[str, Any]], csv_path: Optional[str] = None,
+                  json_path: Optional[str] = None, json_format: str = ARTIFACT_JSON,
+                  metadata: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Escreve o CSV e/ou o JSON de resultado numa única passada (atalho de `write_artifacts`)
+
+    Raises:
+        ValueError: Se o formato de JSON não for "json" nem "ndjson"
+    """
+    if json_format not in (ARTIFACT_JSON, ARTIFACT_NDJSON):
+        raise ValueError(f"Formato de JSON não suportado: {json_format}")
+    paths = {}
+    if csv_path is not None:
+        paths[ARTIFACT_CSV] = csv_path
+    if json_path is not None:
+        paths[json_format] = json_path
+    return write_artifacts(transactions, paths, metadata)
@@ -0,0 +1,49 @@
+"""
+Impressão digital estável de transações
+
+Identifica a mesma transação em exportações diferentes do mesmo banco (ex.:
+"últimos 90 dias" reenviado todo mês) a partir de data, valor em centavos,
+descrição normalizada e índice de ocorrência (para distinguir transações
+idênticas no mesmo dia, como dois cafés de mesmo valor).
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from src.domain.merchants import fold_text
+from src.domain.money import transaction_cents
+
+FINGERPRINT_FIELD = "fingerprint"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _identity(transaction: Dict[str, Any]) -> Tuple[str, int, str]:
+    date = str(transaction.get("date", ""))[:10]
+    cents = transaction_cents(transaction)
+    name = _WHITESPACE_RE.sub(" ", fold_text(str(transaction.get("name", "")))).strip()
+    return date, cents, name
+
+
+def transaction_fingerprint(date: str, cents: int, name: str, occurrence: int = 0) -> str:
+    """Gera a impressão digital de (data, centavos, descrição normalizada, ocorrência)."""
+    raw = f"{date}|{cents}|{name}|{occurrence}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def assign_fingerprints(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Adiciona o campo `fingerprint` a cada transação (in-place)
+
+    O índice de ocorrência conta repetições de (data, centavos, descrição)
+    na ordem do extrato, então reenvios do mesmo período geram as mesmas
+    impressões digitais.
+    """
+    seen: Counter = Counter()
+    for tx in transactions:
+        identity = _identity(tx)
+        tx[FINGERPRINT_FIELD] = transaction_fingerprint(*identity, occurrence=seen[identity])
+        seen[identity] += 1
+    return transactions
@@ -0,0 +1,491 @@
+"""
+Persistência local em SQLite de extratos, transações e categorizações
+
+Um banco por instância (DATA_DIR/fincat.db) em modo WAL, com uma conexão por
+thread: leituras não bloqueiam a escrita e handlers concorrentes apenas
+serializam o commit. Gravações usam `executemany` com upsert em uma única
+transação por extrato, e as consultas usam índices por usuário/data,
+usuário/comerciante e usuário/categoria. Totais mensais por categoria e
+moeda (`monthly_category_totals`) são mantidos por triggers a cada gravação,
+de modo que o `/resumo` não depende do tamanho do histórico.
+
+Também oferece importação em lote de arquivos `*_categorized.csv` gerados
+anteriormente pelo bot:
+
+    python -m src.storage.sqlite import --user 123 extrato_categorized.csv
+    python -m src.storage.sqlite import cache/processed/123/<hash>/extrato_categorized.csv
+"""
+
+import argparse
+import csv
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+from src.domain.merchants import canonical_merchant
+from src.domain.money import CENTS_FIELD, CURRENCY_FIELD, DEFAULT_CURRENCY, cents_from_str, transaction_cents
+from src.storage.fingerprint import FINGERPRINT_FIELD, assign_fingerprints
+from src.storage.store import TransactionStore
+
+logger = get_logger(__name__)
+
+
+# Limite conservador de parâmetros por consulta (SQLITE_MAX_VARIABLE_NUMBER antigo = 999)
+_LOOKUP_CHUNK = 500
+
+_SCHEMA_V1 = """
+CREATE TABLE IF NOT EXISTS statements (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    file_name TEXT,
+    file_type TEXT,
+    file_hash TEXT,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    processed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_statements_user ON statements (user_id, processed_at);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    user_id INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    statement_id INTEGER REFERENCES statements (id),
+    date TEXT NOT NULL,
+    value_cents INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    merchant TEXT,
+    category TEXT,
+    categorization_confidence REAL NOT NULL DEFAULT 0,
+    categorization_reasoning TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, fingerprint)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions (user_id, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_merchant ON transactions (user_id, merchant);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_category ON transactions (user_id, category, date);
+"""
+
+# Agregados mensais por categoria, mantidos por triggers a cada gravação de
+# transação (sem varrer o histórico nas consultas)
+_SCHEMA_V2 = """
+CREATE TABLE IF NOT EXISTS monthly_category_totals (
+    user_id INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    spent_cents INTEGER NOT NULL DEFAULT 0,
+    received_cents INTEGER NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, month, category)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS transactions_totals_insert AFTER INSERT ON transactions
+BEGIN
+    INSERT INTO monthly_category_totals (user_id, month, category, spent_cents, received_cents, transaction_count)
+    VALUES (NEW.user_id, substr(NEW.date, 1, 7), COALESCE(NEW.category, 'Outros'),
+            MAX(-NEW.value_cents, 0), MAX(NEW.value_cents, 0), 1)
+    ON CONFLICT (user_id, month, category) DO UPDATE SET
+        spent_cents = spent_cents + excluded.spent_cents,
+        received_cents = received_cents + excluded.received_cents,
+        transaction_count = transaction_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS transactions_totals_delete AFTER DELETE ON transactions
+BEGIN
+    UPDATE monthly_category_totals SET
+        spent_cents = spent_cents - MAX(-OLD.value_cents, 0),
+        received_cents = received_cents - MAX(OLD.value_cents, 0),
+        transaction_count = transaction_count - 1
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7) AND category = COALESCE(OLD.category, 'Outros');
+    DELETE FROM monthly_category_totals
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7) AND category = COALESCE(OLD.category, 'Outros')
+      AND transaction_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS transactions_totals_update AFTER UPDATE OF category, value_cents, date ON transactions
+WHEN COALESCE(OLD.category, '') != COALESCE(NEW.category, '')
+  OR OLD.value_cents != NEW.value_cents OR OLD.date != NEW.date
+BEGIN
+    UPDATE monthly_category_totals SET
+        spent_cents = spent_cents - MAX(-OLD.value_cents, 0),
+        received_cents = received_cents - MAX(OLD.value_cents, 0),
+        transaction_count = transaction_count - 1
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7) AND category = COALESCE(OLD.category, 'Outros');
+    DELETE FROM monthly_category_totals
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7) AND category = COALESCE(OLD.category, 'Outros')
+      AND transaction_count <= 0;
+    INSERT INTO monthly_category_totals (user_id, month, category, spent_cents, received_cents, transaction_count)
+    VALUES (NEW.user_id, substr(NEW.date, 1, 7), COALESCE(NEW.category, 'Outros'),
+            MAX(-NEW.value_cents, 0), MAX(NEW.value_cents, 0), 1)
+    ON CONFLICT (user_id, month, category) DO UPDATE SET
+        spent_cents = spent_cents + excluded.spent_cents,
+        received_cents = received_cents + excluded.received_cents,
+        transaction_count = transaction_count + 1;
+END;
+
+-- Bancos criados antes dos agregados: preenchimento único a partir do histórico
+INSERT OR REPLACE INTO monthly_category_totals (user_id, month, category, spent_cents, received_cents, transaction_count)
+SELECT user_id, substr(date, 1, 7), COALESCE(category, 'Outros'),
+       SUM(MAX(-value_cents, 0)), SUM(MAX(value_cents, 0)), COUNT(*)
+FROM transactions
+GROUP BY user_id, substr(date, 1, 7), COALESCE(category, 'Outros');
+"""
+
+# Moeda por transação; os agregados passam a ser por moeda (valores em moedas
+# diferentes nunca são somados). Linhas existentes são BRL
+_SCHEMA_V3 = """
+ALTER TABLE transactions ADD COLUMN currency TEXT NOT NULL DEFAULT 'BRL';
+
+DROP TRIGGER IF EXISTS transactions_totals_insert;
+DROP TRIGGER IF EXISTS transactions_totals_delete;
+DROP TRIGGER IF EXISTS transactions_totals_update;
+DROP TABLE IF EXISTS monthly_category_totals;
+
+CREATE TABLE monthly_category_totals (
+    user_id INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    spent_cents INTEGER NOT NULL DEFAULT 0,
+    received_cents INTEGER NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, month, category, currency)
+) WITHOUT ROWID;
+
+CREATE TRIGGER transactions_totals_insert AFTER INSERT ON transactions
+BEGIN
+    INSERT INTO monthly_category_totals (user_id, month, category, currency, spent_cents, received_cents, transaction_count)
+    VALUES (NEW.user_id, substr(NEW.date, 1, 7), COALESCE(NEW.category, 'Outros'), NEW.currency,
+            MAX(-NEW.value_cents, 0), MAX(NEW.value_cents, 0), 1)
+    ON CONFLICT (user_id, month, category, currency) DO UPDATE SET
+        spent_cents = spent_cents + excluded.spent_cents,
+        received_cents = received_cents + excluded.received_cents,
+        transaction_count = transaction_count + 1;
+END;
+
+CREATE TRIGGER transactions_totals_delete AFTER DELETE ON transactions
+BEGIN
+    UPDATE monthly_category_totals SET
+        spent_cents = spent_cents - MAX(-OLD.value_cents, 0),
+        received_cents = received_cents - MAX(OLD.value_cents, 0),
+        transaction_count = transaction_count - 1
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7)
+      AND category = COALESCE(OLD.category, 'Outros') AND currency = OLD.currency;
+    DELETE FROM monthly_category_totals
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7)
+      AND category = COALESCE(OLD.category, 'Outros') AND currency = OLD.currency
+      AND transaction_count <= 0;
+END;
+
+CREATE TRIGGER transactions_totals_update AFTER UPDATE OF category, value_cents, date, currency ON transactions
+WHEN COALESCE(OLD.category, '') != COALESCE(NEW.category, '')
+  OR OLD.value_cents != NEW.value_cents OR OLD.date != NEW.date OR OLD.currency != NEW.currency
+BEGIN
+    UPDATE monthly_category_totals SET
+        spent_cents = spent_cents - MAX(-OLD.value_cents, 0),
+        received_cents = received_cents - MAX(OLD.value_cents, 0),
+        transaction_count = transaction_count - 1
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7)
+      AND category = COALESCE(OLD.category, 'Outros') AND currency = OLD.currency;
+    DELETE FROM monthly_category_totals
+    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7)
+      AND category = COALESCE(OLD.category, 'Outros') AND currency = OLD.currency
+      AND transaction_count <= 0;
+    INSERT INTO monthly_category_totals (user_id, month, category, currency, spent_cents, received_cents, transaction_count)
+    VALUES (NEW.user_id, substr(NEW.date, 1, 7), COALESCE(NEW.category, 'Outros'), NEW.currency,
+            MAX(-NEW.value_cents, 0), MAX(NEW.value_cents, 0), 1)
+    ON CONFLICT (user_id, month, category, currency) DO UPDATE SET
+        spent_cents = spent_cents + excluded.spent_cents,
+        received_cents = received_cents + excluded.received_cents,
+        transaction_count = transaction_count + 1;
+END;
+
+INSERT INTO monthly_category_totals (user_id, month, category, currency, spent_cents, received_cents, transaction_count)
+SELECT user_id, substr(date, 1, 7), COALESCE(category, 'Outros'), currency,
+       SUM(MAX(-value_cents, 0)), SUM(MAX(value_cents, 0)), COUNT(*)
+FROM transactions
+GROUP BY user_id, substr(date, 1, 7), COALESCE(category, 'Outros'), currency;
+"""
+
+# Migrações em ordem; PRAGMA user_version guarda quantas já foram aplicadas
+_MIGRATIONS = (_SCHEMA_V1, _SCHEMA_V2, _SCHEMA_V3)
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+_UPSERT_TRANSACTION = """
+INSERT INTO transactions (
+    user_id, fingerprint, statement_id, date, value_cents, currency, name, merchant,
+    category, categorization_confidence, categorization_reasoning, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, fingerprint) DO UPDATE SET
+    statement_id = excluded.statement_id,
+    merchant = excluded.merchant,
+    category = excluded.category,
+    categorization_confidence = excluded.categorization_confidence,
+    categorization_reasoning = excluded.categorization_reasoning,
+    updated_at = excluded.updated_at
+WHERE excluded.categorization_confidence > 0 OR transactions.categorization_confidence = 0
+"""
+
+
+def _statements(script: str) -> List[str]:
+    """Divide um script SQL em comandos completos (triggers têm ';' internos)."""
+    statements: List[str] = []
+    buffer = ""
+    for piece in script.split(";"):
+        buffer += piece + ";"
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip(" \n;"):
+                statements.append(buffer.strip())
+            buffer = ""
+    return statements
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class SQLiteTransactionStore(TransactionStore):
+    """Store de transações em SQLite (WAL, uma conexão por thread)"""
+
+    def __init__(self, path: Path, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._migrate()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transações explícitas com BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _migrate(self) -> None:
+        conn = self._connection()
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        # A versão é relida sob o lock de escrita: vários processos podem migrar
+        # ao mesmo tempo e só o primeiro aplica as migrações pendentes (ALTER
+        # TABLE não é idempotente). Os comandos rodam um a um, na mesma transação
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for statement in _statements("".join(_MIGRATIONS[version:])):
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        """Fecha todas as conexões abertas pelo store."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def lookup(self, user_id: Any, fingerprints: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        conn = self._connection()
+        fingerprints = list(fingerprints)
+        found: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(fingerprints), _LOOKUP_CHUNK):
+            chunk = fingerprints[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                "SELECT fingerprint, name, merchant, value_cents, currency, date, category, "
+                "categorization_confidence, categorization_reasoning FROM transactions "
+                f"WHERE user_id = ? AND categorization_confidence > 0 AND fingerprint IN ({placeholders})",
+                [user_id, *chunk],
+            ).fetchall()
+            for fp, name, merchant, cents, currency, date, category, confidence, reasoning in rows:
+                found[fp] = {
+                    "name": name,
+                    "merchant": merchant,
+                    "value": cents / 100,
+                    CENTS_FIELD: cents,
+                    CURRENCY_FIELD: currency,
+                    "date": date,
+                    "category": category,
+                    "categorization_confidence": confidence,
+                    "categorization_reasoning": reasoning,
+                }
+        return found
+
+    def _rows(self, user_id: Any, statement_id: Optional[int],
+              transactions: Iterable[Dict[str, Any]], now: str) -> List[tuple]:
+        return [
+            (
+                user_id,
+                tx[FINGERPRINT_FIELD],
+                statement_id,
+                str(tx.get("date", ""))[:10],
+                transaction_cents(tx),
+                tx.get(CURRENCY_FIELD) or DEFAULT_CURRENCY,
+                str(tx.get("name", "")),
+                tx.get("merchant"),
+                tx.get("category"),
+                _to_float(tx.get("categorization_confidence")),
+                tx.get("categorization_reasoning"),
+                now,
+            )
+            for tx in transactions
+            if tx.get(FINGERPRINT_FIELD)
+        ]
+
+    def save(self, user_id: Any, transactions: Iterable[Dict[str, Any]]) -> int:
+        rows = self._rows(user_id, None, transactions, _now())
+        if not rows:
+            return 0
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_UPSERT_TRANSACTION, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def record_statement(self, user_id: Any, file_name: str, file_type: str, file_hash: str,
+                         transactions: List[Dict[str, Any]]) -> Optional[int]:
+        now = _now()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "INSERT INTO statements (user_id, file_name, file_type, file_hash, transaction_count, processed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, file_name, file_type, file_hash, len(transactions), now),
+            )
+            statement_id = cursor.lastrowid
+            conn.executemany(_UPSERT_TRANSACTION, self._rows(user_id, statement_id, transactions, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return statement_id
+
+    def monthly_totals(self, user_id: Any, month: Optional[str] = None) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        conn = self._connection()
+        if month is None:
+            row = conn.execute(
+                "SELECT MAX(month) FROM monthly_category_totals WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            month = row[0]
+            if month is None:
+                return None, []
+        rows = conn.execute(
+            "SELECT category, currency, spent_cents, received_cents, transaction_count FROM monthly_category_totals "
+            "WHERE user_id = ? AND month = ? ORDER BY currency, spent_cents DESC, category",
+            (user_id, month),
+        ).fetchall()
+        return month, [
+            {"category": category, "currency": currency, "spent_cents": spent, "received_cents": received,
+             "count": count}
+            for category, currency, spent, received, count in rows
+        ]
+
+    def count_transactions(self, user_id: Any) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM transactions WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+
+
+def _read_categorized_csv(csv_path: Path) -> List[Dict[str, Any]]:
+    transactions: List[Dict[str, Any]] = []
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            name = row.get("name") or ""
+            cents = cents_from_str((row.get("value") or "").strip())
+            transactions.append({
+                "id": row.get("id"),
+                "name": name,
+                "merchant": row.get("merchant") or canonical_merchant(name),
+                "value": _to_float(row.get("value")),
+                CENTS_FIELD: cents,
+                "date": row.get("date") or "",
+                "category": row.get("category") or None,
+                "categorization_confidence": _to_float(row.get("categorization_confidence")),
+                "categorization_reasoning": row.get("categorization_reasoning") or "",
+            })
+    return transactions
+
+
+def _user_from_cache_path(csv_path: Path) -> Optional[int]:
+    """Extrai o usuário de caminhos no formato cache/processed/<user_id>/<hash>/<arquivo>."""
+    parts = csv_path.parts
+    if "processed" in parts:
+        index = parts.index("processed")
+        if index + 1 < len(parts) and parts[index + 1].isdigit():
+            return int(parts[index + 1])
+    return None
+
+
+def import_categorized_csv(store: TransactionStore, csv_path: Path, user_id: Optional[int] = None) -> int:
+    """
+    Importa um `*_categorized.csv` gerado pelo bot para o store
+
+    Args:
+        store: Store de destino
+        csv_path: Caminho do CSV
+        user_id: Usuário dono do arquivo. Se omitido, é extraído do caminho
+                 do cache (cache/processed/<user_id>/<hash>/...)
+
+    Returns:
+        Quantidade de transações importadas
+    """
+    csv_path = Path(csv_path)
+    owner = user_id if user_id is not None else _user_from_cache_path(csv_path)
+    if owner is None:
+        raise ValueError(f"Não foi possível determinar o usuário de {csv_path}; informe --user")
+    transactions = assign_fingerprints(_read_categorized_csv(csv_path))
+    file_hash = csv_path.parent.name if _user_from_cache_path(csv_path) is not None else ""
+    store.record_statement(owner, csv_path.name, "csv", file_hash, transactions)
+    logger.info("Importado %s | usuário=%s | transações=%s", csv_path, owner, len(transactions))
+    return len(transactions)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from src.storage.store import data_dir
+
+    parser = argparse.ArgumentParser(description="Ferramentas do banco SQLite de transações")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", help="Importa arquivos *_categorized.csv")
+    importer.add_argument("paths", nargs="+", type=Path, help="Arquivos ou diretórios (busca recursiva)")
+    importer.add_argument("--user", type=int, help="Usuário dono dos arquivos")
+    importer.add_argument("--db", type=Path, help="Caminho do banco (padrão: DATA_DIR/fincat.db)")
+    args = parser.parse_args(argv)
+
+    store = SQLiteTransactionStore(args.db or data_dir() / "fincat.db")
+    files: List[Path] = []
+    for path in args.paths:
+        files.extend(sorted(path.rglob("*_categorized.csv")) if path.is_dir() else [path])
+    total = sum(import_categorized_csv(store, path, args.user) for path in files)
+    store.close()
+    print(f"Arquivos: {len(files)} | transações: {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Armazenamento por usuário de transações já categorizadas
+
+Todo extrato processado é gravado (base do /resumo). Com o processamento
+incremental ligado, ao reenviar um extrato que se sobrepõe a envios
+anteriores, apenas as transações com impressão digital nova vão para o
+classificador; as demais reaproveitam a categorização salva.
+
+Variáveis de ambiente:
+- DATA_DIR: diretório de dados persistentes (padrão: ./data).
+- INCREMENTAL_PROCESSING: 0/false desliga o reaproveitamento; os extratos
+  continuam sendo gravados (padrão: ligado).
+- TRANSACTION_STORE: `sqlite` (padrão, DATA_DIR/fincat.db) ou `json` (um arquivo
+  por usuário em DATA_DIR/transactions).
+"""
+
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+from src.domain.money import CENTS_FIELD, CURRENCY_FIELD, DEFAULT_CURRENCY, transaction_cents
+from src.storage.fingerprint import FINGERPRINT_FIELD
+
+logger = get_logger(__name__)
+
+
+DEFAULT_DATA_DIR = "data"
+
+STORED_FIELDS = (
+    "name",
+    "merchant",
+    "value",
+    "value_cents",
+    "currency",
+    "date",
+    "category",
+    "categorization_confidence",
+    "categorization_reasoning",
+)
+
+
+def data_dir() -> Path:
+    """Diretório de dados persistentes (DATA_DIR)."""
+    return Path(os.getenv("DATA_DIR", "").strip() or DEFAULT_DATA_DIR)
+
+
+class TransactionStore(ABC):
+    """Interface de armazenamento de categorizações por usuário"""
+
+    @abstractmethod
+    def lookup(self, user_id: Any, fingerprints: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Retorna {fingerprint: transação salva} para as impressões com categorização efetiva."""
+
+    @abstractmethod
+    def save(self, user_id: Any, transactions: Iterable[Dict[str, Any]]) -> int:
+        """Guarda transações categorizadas. Retorna quantas foram gravadas."""
+
+    @abstractmethod
+    def record_statement(self, user_id: Any, file_name: str, file_type: str, file_hash: str,
+                         transactions: List[Dict[str, Any]]) -> Optional[int]:
+        """Registra um extrato processado com todas as suas transações. Retorna o id do extrato."""
+
+    @abstractmethod
+    def monthly_totals(self, user_id: Any, month: Optional[str] = None) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """
+        Totais por categoria e moeda de um mês (AAAA-MM; padrão: o mais recente com dados)
+
+        Returns:
+            (mês consultado, [{category, currency, spent_cents, received_cents, count}])
+        """
+
+
+def _replaces(saved: Optional[Dict[str, Any]], entry: Dict[str, Any]) -> bool:
+    """Uma falha (confiança 0) não sobrescreve uma categorização efetiva já salva."""
+    return saved is None or bool(entry.get("categorization_confidence")) or not saved.get("categorization_confidence")
+
+
+class JsonTransactionStore(TransactionStore):
+    """
+    Um arquivo JSON por usuário, com escrita atômica
+
+    O arquivo guarda as transações por fingerprint e a lista de extratos
+    registrados. Os totais mensais são calculados a partir das transações a
+    cada consulta (adequado para históricos pequenos; o SQLite mantém
+    agregados). Arquivos antigos, só com o mapa de transações, continuam
+    sendo lidos.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, user_id: Any) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(str(user_id), threading.Lock())
+
+    def _path(self, user_id: Any) -> Path:
+        return self.root / f"{user_id}.json"
+
+    def _load(self, user_id: Any) -> Dict[str, Any]:
+        path = self._path(user_id)
+        if not path.exists():
+            return {"transactions": {}, "statements": []}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Falha ao ler histórico de transações de %s: %s", user_id, e)
+            return {"transactions": {}, "statements": []}
+        if not isinstance(data.get("transactions"), dict):
+            # Formato anterior: {fingerprint: transação}
+            return {"transactions": data, "statements": []}
+        data.setdefault("statements", [])
+        return data
+
+    def _write(self, user_id: Any, data: Dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(user_id)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _merge(stored: Dict[str, Dict[str, Any]], transactions: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for tx in transactions:
+            fingerprint = tx.get(FINGERPRINT_FIELD)
+            if not fingerprint:
+                continue
+            entry = {field: tx.get(field) for field in STORED_FIELDS}
+            entry[CENTS_FIELD] = transaction_cents(tx)
+            entry[CURRENCY_FIELD] = tx.get(CURRENCY_FIELD) or DEFAULT_CURRENCY
+            entry["date"] = str(tx.get("date", ""))[:10]
+            if _replaces(stored.get(fingerprint), entry):
+                stored[fingerprint] = entry
+            count += 1
+        return count
+
+    def lookup(self, user_id: Any, fingerprints: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock_for(user_id):
+            stored = self._load(user_id)["transactions"]
+        found = {}
+        for fp in fingerprints:
+            entry = stored.get(fp)
+            if entry is not None and entry.get("categorization_confidence"):
+                found[fp] = entry
+        return found
+
+    def save(self, user_id: Any, transactions: Iterable[Dict[str, Any]]) -> int:
+        with self._lock_for(user_id):
+            data = self._load(user_id)
+            count = self._merge(data["transactions"], transactions)
+            if count:
+                self._write(user_id, data)
+        return count
+
+    def record_statement(self, user_id: Any, file_name: str, file_type: str, file_hash: str,
+                         transactions: List[Dict[str, Any]]) -> Optional[int]:
+        with self._lock_for(user_id):
+            data = self._load(user_id)
+            statement_id = max((st["id"] for st in data["statements"]), default=0) + 1
+            data["statements"].append({
+                "id": statement_id,
+                "file_name": file_name,
+                "file_type": file_type,
+                "file_hash": file_hash,
+                "transaction_count": len(transactions),
+                "processed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            })
+            self._merge(data["transactions"], transactions)
+            self._write(user_id, data)
+        return statement_id
+
+    def monthly_totals(self, user_id: Any, month: Optional[str] = None) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        with self._lock_for(user_id):
+            stored = self._load(user_id)["transactions"]
+        if month is None:
+            month = max((str(entry.get("date") or "")[:7] for entry in stored.values()), default="") or None
+            if month is None:
+                return None, []
+        totals: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for entry in stored.values():
+            if str(entry.get("date") or "")[:7] != month:
+                continue
+            category = entry.get("category") or "Outros"
+            currency = entry.get(CURRENCY_FIELD) or DEFAULT_CURRENCY
+            row = totals.setdefault((category, currency), {
+                "category": category, "currency": currency, "spent_cents": 0, "received_cents": 0, "count": 0,
+            })
+            cents = transaction_cents(entry)
+            row["spent_cents"] += max(-cents, 0)
+            row["received_cents"] += max(cents, 0)
+            row["count"] += 1
+        return month, sorted(totals.values(), key=lambda row: (row["currency"], -row["spent_cents"], row["category"]))
+
+
+def partition_known(store: TransactionStore, user_id: Any,
+                    transactions: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Separa transações já categorizadas em envios anteriores das novas
+
+    Returns:
+        (categorizadas reaproveitadas por fingerprint, transações novas)
+    """
+    known = store.lookup(user_id, [tx[FINGERPRINT_FIELD] for tx in transactions])
+    reused: Dict[str, Dict[str, Any]] = {}
+    new: List[Dict[str, Any]] = []
+    for tx in transactions:
+        saved = known.get(tx[FINGERPRINT_FIELD])
+        if saved is None:
+            new.append(tx)
+            continue
+        reused[tx[FINGERPRINT_FIELD]] = {
+            **tx,
+            "category": saved.get("category"),
+            "categorization_confidence": saved.get("categorization_confidence"),
+            "categorization_reasoning": saved.get("categorization_reasoning"),
+        }
+    return reused, new
+
+
+def incremental_processing_enabled() -> bool:
+    """Reaproveita categorizações de envios anteriores (INCREMENTAL_PROCESSING)."""
+    return os.getenv("INCREMENTAL_PROCESSING", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+@lru_cache(maxsize=1)
+def get_default_store() -> TransactionStore:
+    """Store padrão do processo (TRANSACTION_STORE), sempre disponível."""
+    backend = os.getenv("TRANSACTION_STORE", "sqlite").strip().lower()
+    if backend == "json":
+        return JsonTransactionStore(data_dir() / "transactions")
+    from src.storage.sqlite import SQLiteTransactionStore
+
+    return SQLiteTransactionStore(data_dir() / "fincat.db")
@@ -2,7 +2,66 @@
 Utilidades simples para a diversos fins
 """
 
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
 
-def format_currency(amount: float) -> str:
-    """Formata o valor como uma string de moeda."""
-    return f"R${amount:,.2f}"
+from src.domain.money import DEFAULT_CURRENCY, cents_from_float
+
+CURRENCY_SYMBOL = "R$ "
+# Demais moedas aparecem pelo código ISO ("ARS 1.234,56")
+CURRENCY_SYMBOLS = {"BRL": CURRENCY_SYMBOL, "USD": "US$ ", "EUR": "€ ", "GBP": "£ "}
+
+
+def currency_symbol(currency: Optional[str] = None) -> str:
+    """Prefixo de exibição de uma moeda (código ISO; padrão: BRL)."""
+    code = (currency or DEFAULT_CURRENCY).strip().upper()
+    return CURRENCY_SYMBOLS.get(code, f"{code} ")
+
+
+def format_currency(amount: float, currency: str = DEFAULT_CURRENCY) -> str:
+    """Formata o valor como moeda no padrão brasileiro ("R$ 1.234,56")."""
+    return format_cents(cents_from_float(amount), currency)
+
+
+def format_cents(cents: int, currency: str = DEFAULT_CURRENCY) -> str:
+    """Formata centavos inteiros como moeda no padrão brasileiro, sem passar por float."""
+    return format_cents_column((cents,), currency_symbol(currency))[0]
+
+
+@lru_cache(maxsize=None)
+def _fraction_table(decimal: str) -> Tuple[str, ...]:
+    """Sufixos ",00" a ",99" pré-calculados para um separador decimal."""
+    return tuple(f"{decimal}{fraction:02d}" for fraction in range(100))
+
+
+def format_cents_column(values: Iterable[int], symbol: str = CURRENCY_SYMBOL,
+                        decimal: str = ",", thousands: str = ".") -> List[str]:
+    """
+    Formata uma coluna inteira de centavos de uma vez
+
+    Não usa `locale` (estado global do processo) nem float: a parte decimal vem
+    de uma tabela pré-calculada e o separador de milhar só é trocado quando o
+    valor passa de mil. O padrão é pt-BR ("R$ 1.234,56", "-R$ 45,90"); com
+    `symbol=""`, `decimal="."` e `thousands=""` produz o texto numérico do CSV
+    de resultado ("-1234.56").
+    """
+    fractions = _fraction_table(decimal)
+    positive, negative = symbol, "-" + symbol
+    swap = thousands != ","
+    formatted: List[str] = []
+    append = formatted.append
+    for cents in values:
+        if cents < 0:
+            units, fraction = divmod(-cents, 100)
+            sign = negative
+        else:
+            units, fraction = divmod(cents, 100)
+            sign = positive
+        if units < 1000 or not thousands:
+            append(f"{sign}{units}{fractions[fraction]}")
+        else:
+            grouped = f"{units:,}"
+            if swap:
+                grouped = grouped.replace(",", thousands)
+            append(f"{sign}{grouped}{fractions[fraction]}")
+    return formatted
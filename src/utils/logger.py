@@ -1,12 +1,118 @@
+"""
+Configuração de logging não bloqueante
+
+Os loggers da aplicação escrevem em uma fila em memória (QueueHandler); a
+formatação final e o I/O dos handlers acontecem em uma thread separada
+(QueueListener), fora do event loop do bot.
+
+Variáveis de ambiente:
+- LOG_LEVEL: nível do logger raiz (padrão: INFO).
+- LOG_PAYLOAD_MAX_CHARS: tamanho máximo dos trechos de payload no log principal (padrão: 500).
+- LOG_PAYLOAD_SAMPLE_RATE: fração de payloads registrados no log principal (padrão: 1.0).
+- LOG_PAYLOADS_FILE: se definido, grava payloads completos (prompts/respostas) neste arquivo.
+"""
+
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import random
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+PAYLOAD_LOGGER_NAME = "fincat.payloads"
+DEFAULT_PAYLOAD_MAX_CHARS = 500
+
+_listeners: list = []
+
+
+def _start_queue_listener(target: logging.Logger, *handlers: logging.Handler) -> None:
+    """Conecta o logger a uma fila e inicia um listener com os handlers reais."""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    target.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+
+def _configure_root() -> None:
+    root = logging.getLogger()
+    if root.handlers:
+        # Já configurado (ex.: pelo pytest ou pela aplicação hospedeira)
+        return
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    _start_queue_listener(root, stream)
+
+
+def enable_payload_capture(path: str) -> None:
+    """Grava payloads completos (ver `log_payload`) no arquivo indicado."""
+    payload_logger = logging.getLogger(PAYLOAD_LOGGER_NAME)
+    file_handler = logging.FileHandler(path, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _start_queue_listener(payload_logger, file_handler)
+    payload_logger.setLevel(logging.DEBUG)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+
+def _configure_payload_logger() -> logging.Logger:
+    payload_logger = logging.getLogger(PAYLOAD_LOGGER_NAME)
+    payload_logger.propagate = False
+    payload_logger.setLevel(logging.CRITICAL + 1)
+    payload_file = os.getenv("LOG_PAYLOADS_FILE", "").strip()
+    if payload_file:
+        enable_payload_capture(payload_file)
+    return payload_logger
+
+
+def stop_logging() -> None:
+    """Esvazia as filas e encerra as threads de logging."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+_configure_root()
+_payload_logger = _configure_payload_logger()
+atexit.register(stop_logging)
 
 
 def get_logger(name: str) -> logging.Logger:
     """Obtém um logger com o nome fornecido."""
     logger = logging.getLogger(name)
-    return logger
\ No newline at end of file
+    return logger
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Optional[str],
+                level: int = logging.DEBUG, sample: bool = True) -> None:
+    """
+    Registra um payload grande (prompt, resposta do modelo) de forma econômica
+
+    O payload completo vai apenas para o arquivo de LOG_PAYLOADS_FILE, quando
+    configurado. No log principal entra somente um trecho limitado a
+    LOG_PAYLOAD_MAX_CHARS, amostrado por LOG_PAYLOAD_SAMPLE_RATE, e nada é
+    formatado se o nível estiver desabilitado.
+
+    Args:
+        logger: Logger de origem
+        label: Descrição curta do payload
+        payload: Conteúdo a registrar
+        level: Nível usado no log principal (padrão: DEBUG)
+        sample: Se False, ignora a amostragem (ex.: em caminhos de erro)
+    """
+    text = payload or ""
+    if _payload_logger.isEnabledFor(logging.DEBUG):
+        _payload_logger.debug("%s | %s | tamanho=%d\n%s", logger.name, label, len(text), text)
+
+    if not logger.isEnabledFor(level):
+        return
+    if sample:
+        rate = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+        if rate < 1.0 and random.random() >= rate:
+            return
+    max_chars = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", DEFAULT_PAYLOAD_MAX_CHARS))
+    if len(text) > max_chars:
+        logger.log(level, "%s | tamanho=%d | trecho=%s... (+%d caracteres)",
+                   label, len(text), text[:max_chars], len(text) - max_chars)
+    else:
+        logger.log(level, "%s | tamanho=%d | %s", label, len(text), text)
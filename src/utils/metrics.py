@@ -0,0 +1,287 @@
+"""
+Instrumentação leve do pipeline de documentos
+
+Spans (gerenciador de contexto ou decorador) medem cada etapa com relógio
+monotônico e alimentam contadores e histogramas de latência. As métricas
+podem ser expostas no formato de texto do Prometheus por um endpoint HTTP
+local opcional e/ou registradas periodicamente como linhas de log
+estruturadas. Quando desabilitada, a instrumentação custa apenas uma
+verificação de atributo por chamada.
+
+Variáveis de ambiente (lidas por `configure_from_env`):
+- METRICS_ENABLED: habilita a coleta (1/true/yes/on).
+- METRICS_PORT: porta do endpoint HTTP /metrics (habilita a coleta).
+- METRICS_LOG_INTERVAL: intervalo em segundos do log periódico (habilita a coleta).
+"""
+
+import bisect
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+METRIC_PREFIX = "fincat_"
+STAGE_DURATION = "stage_duration_seconds"
+STAGE_TOTAL = "stage_total"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """Histograma cumulativo com buckets fixos"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets: Tuple[float, ...] = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            running += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return result
+
+
+class MetricsRegistry:
+    """Registro de contadores e histogramas (thread-safe)"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled: bool = enabled
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._listeners: List[Callable[[str, float, Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1.0, labels: Optional[Dict[str, Any]] = None) -> None:
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(name, value, labels or {})
+
+    def add_listener(self, listener: Callable[[str, float, Dict[str, Any]], None]) -> None:
+        """Registra um callback chamado a cada observação de histograma."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, float, Dict[str, Any]], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Retorna um resumo serializável (contadores e count/sum dos histogramas)."""
+        with self._lock:
+            counters = {
+                name: {_format_labels(key) or "{}": value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: {
+                    _format_labels(key) or "{}": {"count": h.count, "sum": round(h.sum, 6)}
+                    for key, h in series.items()
+                }
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        """Exporta as métricas no formato de texto do Prometheus."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                full = METRIC_PREFIX + name
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{full}{_format_labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                full = METRIC_PREFIX + name
+                lines.append(f"# TYPE {full} histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{full}_bucket{_format_labels(key, ('le', bound))} {count}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{full}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Span:
+    """Mede uma etapa; usado via `span()`"""
+
+    __slots__ = ("stage", "registry", "_started")
+
+    def __init__(self, stage: str, registry: MetricsRegistry):
+        self.stage = stage
+        self.registry = registry
+        self._started = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.monotonic() - self._started
+        labels = {"stage": self.stage}
+        self.registry.observe(STAGE_DURATION, elapsed, labels)
+        self.registry.inc(STAGE_TOTAL, labels={"stage": self.stage, "outcome": "error" if exc_type else "ok"})
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str, registry: Optional[MetricsRegistry] = None):
+    """
+    Gerenciador de contexto que mede a duração de uma etapa
+
+    Example:
+        with span("parse"):
+            statement = parse(...)
+    """
+    registry = registry or REGISTRY
+    if not registry.enabled:
+        return _NOOP_SPAN
+    return _Span(stage, registry)
+
+
+def timed(stage: str, registry: Optional[MetricsRegistry] = None):
+    """Decorador equivalente a `span()`, para funções síncronas ou assíncronas."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage, registry):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, registry):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_http_server(port: int, host: str = "127.0.0.1",
+                      registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Inicia um endpoint HTTP local que serve /metrics em uma thread daemon."""
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Métricas disponíveis em http://%s:%s/metrics", host, server.server_address[1])
+    return server
+
+
+def start_periodic_logging(interval_seconds: float,
+                           registry: Optional[MetricsRegistry] = None) -> threading.Event:
+    """Registra um snapshot das métricas em JSON a cada intervalo. Retorna o evento de parada."""
+    registry = registry or REGISTRY
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval_seconds):
+            logger.info("metrics %s", json.dumps(registry.snapshot(), ensure_ascii=False, sort_keys=True))
+
+    threading.Thread(target=loop, name="metrics-log", daemon=True).start()
+    return stop
+
+
+def configure_from_env(registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+    """Habilita a coleta e os exportadores conforme as variáveis de ambiente."""
+    registry = registry or REGISTRY
+    port = os.getenv("METRICS_PORT", "").strip()
+    interval = os.getenv("METRICS_LOG_INTERVAL", "").strip()
+    enabled = os.getenv("METRICS_ENABLED", "").strip().lower() in _TRUE_VALUES
+
+    registry.enabled = enabled or bool(port) or bool(interval)
+    if port:
+        start_http_server(int(port), host=os.getenv("METRICS_HOST", "127.0.0.1"), registry=registry)
+    if interval:
+        start_periodic_logging(float(interval), registry=registry)
+    return registry
@@ -0,0 +1,228 @@
+"""
+Limitação de taxa por token bucket (global e por usuário/chat)
+
+Cada `Throttle` combina um bucket global com buckets por chave (usuário ou
+chat). A aquisição é feita por reserva: o custo é debitado imediatamente,
+mesmo que o saldo fique negativo, e o chamador espera o tempo necessário
+para o saldo voltar a zero. Assim o excesso de trabalho é enfileirado (na
+ordem de chegada) em vez de falhar, tanto em threads (`wait`) quanto no
+event loop (`wait_async`). O tempo de espera alimenta o histograma
+`throttle_wait_seconds` e o contador `throttled_total`.
+
+Variáveis de ambiente (0 desliga o limite correspondente):
+- GEMINI_RPM: requisições por minuto ao Gemini, global (padrão: 15).
+- GEMINI_TPM: tokens estimados por minuto ao Gemini, global (padrão: 1000000).
+- GEMINI_USER_RPM: requisições por minuto ao Gemini, por usuário (padrão: 5).
+- GEMINI_USER_TPM: tokens estimados por minuto ao Gemini, por usuário (padrão: 250000).
+- TELEGRAM_GLOBAL_RATE: mensagens por segundo enviadas pelo bot (padrão: 30).
+- TELEGRAM_CHAT_RATE: mensagens por segundo por chat (padrão: 1).
+- TELEGRAM_CHAT_BURST: rajada máxima por chat (padrão: 5).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+
+from src.utils.metrics import REGISTRY
+
+THROTTLE_WAIT = "throttle_wait_seconds"
+THROTTLED_TOTAL = "throttled_total"
+
+DEFAULT_MAX_KEYS = 10000
+
+
+class TokenBucket:
+    """Token bucket com reserva (o saldo pode ficar negativo)"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate e capacity devem ser positivos")
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self._clock = clock
+        self._tokens: float = capacity
+        self._updated: float = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Debita o custo e retorna quantos segundos esperar antes de prosseguir."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def is_idle(self) -> bool:
+        """Verifica se o bucket está cheio (sem uso recente)."""
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens >= self.capacity
+
+
+class Throttle:
+    """Limite composto: bucket global e buckets por chave"""
+
+    def __init__(self, name: str, global_bucket: Optional[TokenBucket] = None,
+                 per_key_rate: float = 0.0, per_key_capacity: float = 0.0,
+                 max_keys: int = DEFAULT_MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.name: str = name
+        self.global_bucket: Optional[TokenBucket] = global_bucket
+        self.per_key_rate: float = per_key_rate
+        self.per_key_capacity: float = per_key_capacity or per_key_rate
+        self.max_keys: int = max_keys
+        self._clock = clock
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.global_bucket is not None or self.per_key_rate > 0
+
+    def _bucket_for(self, key: Hashable) -> Optional[TokenBucket]:
+        if key is None or self.per_key_rate <= 0:
+            return None
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    # Descarta buckets ociosos (cheios): recriá-los é equivalente
+                    for idle_key in [k for k, b in self._buckets.items() if b.is_idle()]:
+                        del self._buckets[idle_key]
+                bucket = self._buckets[key] = TokenBucket(self.per_key_rate, self.per_key_capacity, self._clock)
+            return bucket
+
+    def reserve(self, key: Hashable = None, amount: float = 1.0) -> float:
+        """Reserva o custo nos buckets aplicáveis e retorna a espera necessária."""
+        delay = 0.0
+        if self.global_bucket is not None:
+            delay = self.global_bucket.reserve(amount)
+        bucket = self._bucket_for(key)
+        if bucket is not None:
+            delay = max(delay, bucket.reserve(amount))
+        return delay
+
+    def _record(self, delay: float) -> None:
+        labels = {"limiter": self.name}
+        REGISTRY.observe(THROTTLE_WAIT, delay, labels)
+        if delay > 0:
+            REGISTRY.inc(THROTTLED_TOTAL, labels=labels)
+
+    def wait(self, key: Hashable = None, amount: float = 1.0) -> float:
+        """Reserva e espera (bloqueante). Retorna o tempo esperado em segundos."""
+        if not self.enabled:
+            return 0.0
+        delay = self.reserve(key, amount)
+        self._record(delay)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def wait_async(self, key: Hashable = None, amount: float = 1.0) -> float:
+        """Reserva e espera sem bloquear o event loop. Retorna o tempo esperado."""
+        if not self.enabled:
+            return 0.0
+        delay = self.reserve(key, amount)
+        self._record(delay)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    return float(raw) if raw else default
+
+
+def _per_minute_bucket(per_minute: float) -> Optional[TokenBucket]:
+    if per_minute <= 0:
+        return None
+    return TokenBucket(rate=per_minute / 60.0, capacity=per_minute)
+
+
+@lru_cache(maxsize=1)
+def gemini_request_throttle() -> Throttle:
+    """Requisições por minuto ao Gemini (global)."""
+    return Throttle("gemini_requests", _per_minute_bucket(_env_float("GEMINI_RPM", 15)))
+
+
+@lru_cache(maxsize=1)
+def gemini_token_throttle() -> Throttle:
+    """Tokens estimados por minuto ao Gemini (global)."""
+    return Throttle("gemini_tokens", _per_minute_bucket(_env_float("GEMINI_TPM", 1_000_000)))
+
+
+def _per_minute_per_key(name: str, per_minute: float) -> Throttle:
+    return Throttle(name, per_key_rate=max(per_minute, 0.0) / 60.0, per_key_capacity=max(per_minute, 0.0))
+
+
+@lru_cache(maxsize=1)
+def gemini_user_throttle() -> Throttle:
+    """Requisições por minuto ao Gemini, por usuário."""
+    return _per_minute_per_key("gemini_user", _env_float("GEMINI_USER_RPM", 5))
+
+
+@lru_cache(maxsize=1)
+def gemini_user_token_throttle() -> Throttle:
+    """Tokens estimados por minuto ao Gemini, por usuário."""
+    return _per_minute_per_key("gemini_user_tokens", _env_float("GEMINI_USER_TPM", 250_000))
+
+
+@lru_cache(maxsize=1)
+def telegram_throttle() -> Throttle:
+    """Mensagens enviadas ao Telegram: global e por chat."""
+    global_rate = _env_float("TELEGRAM_GLOBAL_RATE", 30)
+    global_bucket = TokenBucket(global_rate, global_rate) if global_rate > 0 else None
+    return Throttle(
+        "telegram",
+        global_bucket,
+        per_key_rate=_env_float("TELEGRAM_CHAT_RATE", 1),
+        per_key_capacity=_env_float("TELEGRAM_CHAT_BURST", 5),
+    )
+
+
+def acquire_gemini_call(estimated_tokens: int, user_id: Hashable = None,
+                        user_shares: Optional[Mapping[Hashable, float]] = None) -> float:
+    """
+    Aguarda vaga para uma chamada ao Gemini (requisição + tokens). Retorna a espera.
+
+    O custo é debitado nos buckets globais e nos buckets do usuário. Em lotes
+    compartilhados entre usuários (coalescedor), `user_shares` informa a
+    participação de cada um (ex.: transações por usuário) e a requisição e os
+    tokens são divididos na mesma proporção.
+
+    Args:
+        estimated_tokens: Tokens estimados da chamada (entrada + saída)
+        user_id: Usuário que paga a chamada inteira (ignorado com `user_shares`)
+        user_shares: Participação de cada usuário em um lote compartilhado
+    """
+    delay = max(gemini_request_throttle().reserve(), gemini_token_throttle().reserve(amount=estimated_tokens))
+    shares = user_shares or ({user_id: 1} if user_id is not None else {})
+    total = sum(shares.values())
+    for user, share in shares.items():
+        fraction = share / total
+        delay = max(
+            delay,
+            gemini_user_throttle().reserve(user, fraction),
+            gemini_user_token_throttle().reserve(user, estimated_tokens * fraction),
+        )
+    labels: Dict[str, Any] = {"limiter": "gemini"}
+    REGISTRY.observe(THROTTLE_WAIT, delay, labels)
+    if delay > 0:
+        REGISTRY.inc(THROTTLED_TOTAL, labels=labels)
+        time.sleep(delay)
+    return delay
+
+
+def reset_throttles() -> None:
+    """Descarta os limitadores do processo (recriados a partir do ambiente no próximo uso)."""
+    for factory in (gemini_request_throttle, gemini_token_throttle, gemini_user_throttle,
+                    gemini_user_token_throttle, telegram_throttle):
+        factory.cache_clear()
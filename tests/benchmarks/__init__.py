@@ -0,0 +1,3 @@
+"""
+Suíte de benchmarks de desempenho (geradores sintéticos e medições)
+"""
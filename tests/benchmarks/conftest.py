@@ -0,0 +1,142 @@
+"""
+Configuração da suíte de benchmarks
+
+Variáveis de ambiente:
+- BENCH_SIZES: tamanhos a medir, separados por vírgula (ex.: "1k,100k,1m"). Padrão: "1k".
+- BENCH_ENFORCE: "1" falha o teste se houver regressão acima do limite; "memory"
+  falha só por pico de memória por linha (portável entre máquinas) e apenas
+  avisa sobre linhas/s (usado no CI).
+- BENCH_REGRESSION_THRESHOLD: fração de queda de desempenho tolerada (padrão: 0.30).
+- BENCH_UPDATE_BASELINES: quando "1", regrava baselines.json com as medições atuais.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import pytest
+
+from tests.benchmarks.synthetic import SIZES
+
+pytest.importorskip("pytest_benchmark")
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+DEFAULT_REGRESSION_THRESHOLD = 0.30
+
+
+def bench_sizes() -> list:
+    raw = os.getenv("BENCH_SIZES", "1k")
+    return [label.strip().lower() for label in raw.split(",") if label.strip().lower() in SIZES]
+
+
+def pytest_generate_tests(metafunc):
+    if "bench_size" in metafunc.fixturenames:
+        metafunc.parametrize("bench_size", bench_sizes())
+
+
+def _load_baselines() -> dict:
+    if not BASELINES_PATH.exists():
+        return {}
+    with open(BASELINES_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class BaselineRecorder:
+    """Compara medições com os baselines gravados e acumula atualizações"""
+
+    def __init__(self):
+        self.baselines = _load_baselines()
+        self.updates = {}
+        self.threshold = float(os.getenv("BENCH_REGRESSION_THRESHOLD", DEFAULT_REGRESSION_THRESHOLD))
+        enforce = os.getenv("BENCH_ENFORCE", "").strip().lower()
+        self.enforce_memory = enforce in ("1", "memory")
+        self.enforce_throughput = enforce == "1"
+
+    def check(self, key: str, rows_per_sec: float, peak_bytes_per_row: float):
+        self.updates[key] = {
+            "rows_per_sec": round(rows_per_sec, 1),
+            "peak_bytes_per_row": round(peak_bytes_per_row, 1),
+        }
+        baseline = self.baselines.get(key)
+        if not baseline:
+            return
+
+        min_rate = baseline["rows_per_sec"] * (1 - self.threshold)
+        if rows_per_sec < min_rate:
+            self._report(key, f"{rows_per_sec:.0f} linhas/s < {min_rate:.0f} (baseline {baseline['rows_per_sec']:.0f})",
+                         self.enforce_throughput)
+        max_mem = baseline["peak_bytes_per_row"] * (1 + self.threshold)
+        if peak_bytes_per_row > max_mem:
+            self._report(key, f"{peak_bytes_per_row:.0f} B/linha > {max_mem:.0f} "
+                              f"(baseline {baseline['peak_bytes_per_row']:.0f})", self.enforce_memory)
+
+    def _report(self, key: str, problem: str, enforce: bool):
+        message = f"Regressão em {key}: {problem}"
+        if enforce:
+            pytest.fail(message)
+        warnings.warn(message)
+
+    def save(self):
+        merged = dict(self.baselines)
+        merged.update(self.updates)
+        with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(merged.items())), f, indent=2)
+            f.write("\n")
+
+
+@pytest.fixture(scope="session")
+def baselines():
+    recorder = BaselineRecorder()
+    yield recorder
+    if os.getenv("BENCH_UPDATE_BASELINES", "") == "1":
+        recorder.save()
+
+
+@pytest.fixture(scope="session")
+def synthetic_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("synthetic")
+
+
+def measure_peak_memory(func, *args, **kwargs) -> int:
+    """Executa a função uma vez sob tracemalloc e retorna o pico em bytes."""
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+@pytest.fixture
+def run_benchmark(benchmark, baselines):
+    """
+    Mede uma função: tempo via pytest-benchmark, linhas/s e pico de memória
+
+    Uso: run_benchmark("chave", rows, func, *args)
+    """
+    def runner(key: str, rows: int, func, *args, **kwargs):
+        rounds = 3 if rows <= SIZES["100k"] else 1
+        result = benchmark.pedantic(func, args=args, kwargs=kwargs, rounds=rounds, iterations=1)
+
+        started = time.perf_counter()
+        peak = measure_peak_memory(func, *args, **kwargs)
+        traced_seconds = time.perf_counter() - started
+
+        seconds = benchmark.stats.stats.min
+        rows_per_sec = rows / seconds if seconds else float("inf")
+        peak_per_row = peak / max(rows, 1)
+        benchmark.extra_info.update({
+            "rows": rows,
+            "rows_per_sec": round(rows_per_sec, 1),
+            "peak_memory_bytes": peak,
+            "peak_bytes_per_row": round(peak_per_row, 1),
+            "traced_seconds": round(traced_seconds, 3),
+        })
+        baselines.check(f"{key}@{rows}", rows_per_sec, peak_per_row)
+        return result
+
+    return runner
@@ -0,0 +1,217 @@
+"""
+Gerador determinístico de extratos bancários sintéticos (CSV e OFX)
+
+Os arquivos são escritos em streaming, linha a linha, para permitir gerar
+extratos com milhões de transações sem materializá-los em memória.
+
+Uso:
+    python -m tests.benchmarks.synthetic --format csv --rows 100000 --out /tmp/extrato.csv
+    python -m tests.benchmarks.synthetic --format ofx --ofx-version 2 --rows 1000 --out /tmp/extrato.ofx
+"""
+
+import argparse
+import csv
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, Tuple
+
+DEFAULT_SEED = 42
+
+# Tamanhos de referência usados pelos benchmarks
+SIZES = {
+    "1k": 1_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y", "%Y/%m/%d"]
+DELIMITERS = [",", ";", "\t"]
+NUMBER_FORMATS = ["br", "us"]
+
+_DEBIT_MERCHANTS = [
+    "PAG*IFOOD {n}",
+    "IFOOD *SAO PAULO",
+    "UBER *TRIP HELP.UBER.COM",
+    "99APP *99APP {n}",
+    "SUPERMERCADO BOM PRECO LTDA",
+    "POSTO IPIRANGA {n}",
+    "DROGASIL {n} SAO PAULO SP",
+    "FARMÁCIA SÃO JOÃO",
+    "NETFLIX.COM",
+    "SPOTIFY BRASIL",
+    "ALUGUEL APARTAMENTO",
+    "CONDOMINIO EDIFICIO, BLOCO {n}",
+    "MP*LOJA DO ZE {n} CURITIBA PR",
+    "PIX ENVIADO - JOAO DA SILVA",
+    "COMPRA CARTAO {d} PADARIA PAO QUENTE",
+    "AMAZON MARKETPLACE",
+    "ESTACIONAMENTO \"CENTRO\"",
+    "LIVRARIA CULTURA",
+]
+_CREDIT_MERCHANTS = [
+    "SALARIO EMPRESA XYZ",
+    "PIX RECEBIDO - MARIA SOUZA",
+    "TED RECEBIDA {n}",
+    "REEMBOLSO {n}",
+]
+
+
+def _format_amount(cents: int, number_format: str) -> str:
+    """Formata centavos como texto no padrão BR (1.234,56) ou US (1,234.56)."""
+    sign = "-" if cents < 0 else ""
+    units, frac = divmod(abs(cents), 100)
+    grouped = f"{units:,}"
+    if number_format == "br":
+        return f"{sign}{grouped.replace(',', '.')},{frac:02d}"
+    return f"{sign}{grouped}.{frac:02d}"
+
+
+def iter_transactions(rows: int, seed: int = DEFAULT_SEED,
+                      start: date = date(2023, 1, 1)) -> Iterator[Tuple[date, str, int]]:
+    """Gera (data, descrição, centavos) de forma determinística."""
+    rng = random.Random(seed)
+    for i in range(rows):
+        tx_date = start + timedelta(days=(i * 365) // max(rows, 1))
+        if rng.random() < 0.08:
+            template = rng.choice(_CREDIT_MERCHANTS)
+            cents = rng.randint(5_000, 1_500_000)
+        else:
+            template = rng.choice(_DEBIT_MERCHANTS)
+            cents = -rng.randint(100, 350_000)
+        name = template.format(n=rng.randint(1, 9999), d=tx_date.strftime("%d/%m"))
+        yield tx_date, name, cents
+
+
+def generate_csv(path: str, rows: int, delimiter: str = ",", date_format: str = "%d/%m/%Y",
+                 number_format: str = "br", split_columns: bool = False,
+                 seed: int = DEFAULT_SEED, encoding: str = "utf-8") -> str:
+    """
+    Escreve um extrato CSV sintético
+
+    Args:
+        path: Caminho do arquivo de saída
+        rows: Número de transações
+        delimiter: Delimitador (',', ';' ou tabulação)
+        date_format: Formato de data (um dos suportados por CSVBankParser)
+        number_format: 'br' (1.234,56) ou 'us' (1,234.56)
+        split_columns: Se True, usa colunas separadas de débito e crédito
+        seed: Semente do gerador pseudoaleatório
+        encoding: Codificação do arquivo
+
+    Returns:
+        Caminho do arquivo gerado
+    """
+    with open(path, "w", encoding=encoding, newline="") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        if split_columns:
+            writer.writerow(["Data", "Histórico", "Débito", "Crédito"])
+        else:
+            writer.writerow(["Data", "Descrição", "Valor"])
+        for tx_date, name, cents in iter_transactions(rows, seed):
+            date_str = tx_date.strftime(date_format)
+            if split_columns:
+                amount = _format_amount(abs(cents), number_format)
+                if cents < 0:
+                    writer.writerow([date_str, name, amount, ""])
+                else:
+                    writer.writerow([date_str, name, "", amount])
+            else:
+                writer.writerow([date_str, name, _format_amount(cents, number_format)])
+    return path
+
+
+_OFX_V1_HEADER = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+SECURITY:NONE
+ENCODING:USASCII
+CHARSET:1252
+COMPRESSION:NONE
+OLDFILEUID:NONE
+NEWFILEUID:NONE
+
+"""
+
+_OFX_V2_HEADER = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<?OFX OFXHEADER="200" VERSION="220" SECURITY="NONE" OLDFILEUID="NONE" NEWFILEUID="NONE"?>
+"""
+
+
+def _ofx_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def generate_ofx(path: str, rows: int, version: int = 1, seed: int = DEFAULT_SEED) -> str:
+    """
+    Escreve um extrato OFX sintético (1.x SGML ou 2.x XML)
+
+    Args:
+        path: Caminho do arquivo de saída
+        rows: Número de transações
+        version: 1 para OFX 1.x (SGML) ou 2 para OFX 2.x (XML)
+        seed: Semente do gerador pseudoaleatório
+
+    Returns:
+        Caminho do arquivo gerado
+    """
+    if version not in (1, 2):
+        raise ValueError(f"Versão OFX não suportada: {version}")
+
+    # Em SGML (1.x) os elementos folha não são fechados
+    def leaf(tag: str, value: str) -> str:
+        return f"<{tag}>{value}</{tag}>\n" if version == 2 else f"<{tag}>{value}\n"
+
+    encoding = "utf-8" if version == 2 else "cp1252"
+    with open(path, "w", encoding=encoding, newline="\n") as f:
+        f.write(_OFX_V2_HEADER if version == 2 else _OFX_V1_HEADER)
+        f.write("<OFX>\n<SIGNONMSGSRSV1>\n<SONRS>\n<STATUS>\n")
+        f.write(leaf("CODE", "0") + leaf("SEVERITY", "INFO"))
+        f.write("</STATUS>\n")
+        f.write(leaf("DTSERVER", "20240315120000") + leaf("LANGUAGE", "POR"))
+        f.write("</SONRS>\n</SIGNONMSGSRSV1>\n<BANKMSGSRSV1>\n<STMTTRNRS>\n")
+        f.write(leaf("TRNUID", "1") + "<STATUS>\n" + leaf("CODE", "0") + leaf("SEVERITY", "INFO") + "</STATUS>\n")
+        f.write("<STMTRS>\n" + leaf("CURDEF", "BRL"))
+        f.write("<BANKACCTFROM>\n" + leaf("BANKID", "123") + leaf("ACCTID", "123456789")
+                + leaf("ACCTTYPE", "CHECKING") + "</BANKACCTFROM>\n")
+        f.write("<BANKTRANLIST>\n" + leaf("DTSTART", "20230101000000") + leaf("DTEND", "20241231000000"))
+        for i, (tx_date, name, cents) in enumerate(iter_transactions(rows, seed)):
+            amount = _format_amount(cents, "us").replace(",", "")
+            f.write("<STMTTRN>\n")
+            f.write(leaf("TRNTYPE", "DEBIT" if cents < 0 else "CREDIT"))
+            f.write(leaf("DTPOSTED", tx_date.strftime("%Y%m%d") + "120000"))
+            f.write(leaf("TRNAMT", amount))
+            f.write(leaf("FITID", f"TRN{i:08d}"))
+            f.write(leaf("MEMO", _ofx_escape(name)))
+            f.write("</STMTTRN>\n")
+        f.write("</BANKTRANLIST>\n")
+        f.write("<LEDGERBAL>\n" + leaf("BALAMT", "1000.00") + leaf("DTASOF", "20241231120000") + "</LEDGERBAL>\n")
+        f.write("</STMTRS>\n</STMTTRNRS>\n</BANKMSGSRSV1>\n</OFX>\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera extratos bancários sintéticos")
+    parser.add_argument("--format", choices=["csv", "ofx"], default="csv")
+    parser.add_argument("--rows", type=int, default=SIZES["1k"])
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--delimiter", default=",", help="Use '\\t' para tabulação")
+    parser.add_argument("--date-format", default="%d/%m/%Y", choices=DATE_FORMATS)
+    parser.add_argument("--number-format", default="br", choices=NUMBER_FORMATS)
+    parser.add_argument("--split-columns", action="store_true")
+    parser.add_argument("--ofx-version", type=int, default=1, choices=[1, 2])
+    args = parser.parse_args()
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    if args.format == "csv":
+        delimiter = "\t" if args.delimiter in ("\\t", "tab") else args.delimiter
+        generate_csv(args.out, args.rows, delimiter=delimiter, date_format=args.date_format,
+                     number_format=args.number_format, split_columns=args.split_columns, seed=args.seed)
+    else:
+        generate_ofx(args.out, args.rows, version=args.ofx_version, seed=args.seed)
+    print(f"Gerado: {args.out} ({args.rows} transações)")
+
+
+if __name__ == "__main__":
+    main()
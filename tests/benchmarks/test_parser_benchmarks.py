@@ -0,0 +1,179 @@
+"""
+Benchmarks dos parsers e da etapa de escrita do resultado
+
+Fora da suíte padrão (marcador `benchmark`). Executar:
+    python -m pytest tests/benchmarks -q -m benchmark
+    BENCH_SIZES=1k,100k,1m python -m pytest tests/benchmarks -q -m benchmark
+"""
+
+import json
+
+import pytest
+
+from src.handlers.handle_document import _statement_to_transactions
+from src.parsers.csv import CSVBankParser
+from src.parsers.ofx import parse_ofx_file
+from src.reports.statistics import TransactionArrays, build_report, report_from_transactions
+from src.reports.writers import write_results
+from src.utils import format_cents_column, format_currency
+from tests.benchmarks.synthetic import SIZES, generate_csv, generate_ofx
+
+pytestmark = pytest.mark.benchmark
+
+
+# (id, delimitador, formato de data, formato numérico, débito/crédito separados)
+CSV_PROFILES = [
+    ("comma-br-date", ",", "%d/%m/%Y", "br", False),
+    ("semicolon-br-split", ";", "%d/%m/%Y", "br", True),
+    ("tab-iso-us", "\t", "%Y-%m-%d", "us", False),
+    ("comma-dash-date-us-split", ",", "%d-%m-%Y", "us", True),
+    ("semicolon-us-date", ";", "%m/%d/%Y", "us", False),
+    ("comma-slash-iso-br", ",", "%Y/%m/%d", "br", False),
+]
+
+_generated = {}
+
+
+def _synthetic_csv(directory, size, profile):
+    key = ("csv", size, profile[0])
+    if key not in _generated:
+        name, delimiter, date_format, number_format, split = profile
+        path = directory / f"{name}-{size}.csv"
+        _generated[key] = generate_csv(str(path), SIZES[size], delimiter=delimiter, date_format=date_format,
+                                       number_format=number_format, split_columns=split)
+    return _generated[key]
+
+
+def _synthetic_ofx(directory, size, version):
+    key = ("ofx", size, version)
+    if key not in _generated:
+        path = directory / f"ofx{version}-{size}.ofx"
+        _generated[key] = generate_ofx(str(path), SIZES[size], version=version)
+    return _generated[key]
+
+
+@pytest.mark.parametrize("profile", CSV_PROFILES, ids=[p[0] for p in CSV_PROFILES])
+def test_bench_csv_parse_file(run_benchmark, synthetic_dir, bench_size, profile):
+    path = _synthetic_csv(synthetic_dir, bench_size, profile)
+    parser = CSVBankParser()
+
+    statement = run_benchmark(f"csv_parse_file[{profile[0]}]", SIZES[bench_size], parser.parse_file, path)
+
+    assert len(statement.expenses) == SIZES[bench_size]
+
+
+@pytest.mark.parametrize("version", [1, 2], ids=["ofx1", "ofx2"])
+def test_bench_parse_ofx_file(run_benchmark, synthetic_dir, bench_size, version):
+    path = _synthetic_ofx(synthetic_dir, bench_size, version)
+
+    statement = run_benchmark(f"parse_ofx_file[ofx{version}]", SIZES[bench_size], parse_ofx_file, path)
+
+    assert len(statement.expenses) == SIZES[bench_size]
+
+
+def test_bench_statement_to_transactions(run_benchmark, synthetic_dir, bench_size):
+    path = _synthetic_csv(synthetic_dir, bench_size, CSV_PROFILES[0])
+    statement = CSVBankParser().parse_file(path)
+
+    transactions = run_benchmark("statement_to_transactions", SIZES[bench_size],
+                                 _statement_to_transactions, statement)
+
+    assert len(transactions) == SIZES[bench_size]
+
+
+def _categorized_transactions(directory, size):
+    path = _synthetic_csv(directory, size, CSV_PROFILES[0])
+    transactions = _statement_to_transactions(CSVBankParser().parse_file(path))
+    for tx in transactions:
+        tx.update(category="Outros", categorization_confidence=0.0, categorization_reasoning="")
+    return transactions
+
+
+def test_bench_write_result_csv(run_benchmark, synthetic_dir, tmp_path, bench_size):
+    transactions = _categorized_transactions(synthetic_dir, bench_size)
+    out = str(tmp_path / "bench_categorized.csv")
+
+    count = run_benchmark("write_result_csv", SIZES[bench_size], write_results, transactions, out)
+
+    assert count == SIZES[bench_size]
+
+
+def _dump_indented(path, transactions):
+    """Escrita anterior: payload completo em memória e `json.dump` com indentação."""
+    payload = {"original_file": "bench.csv", "total_transactions": len(transactions), "transactions": transactions}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return len(transactions)
+
+
+@pytest.mark.parametrize("mode", ["json", "ndjson", "indent"])
+def test_bench_write_result_json(run_benchmark, synthetic_dir, tmp_path, bench_size, mode):
+    """JSON compacto/NDJSON em fluxo vs. o `json.dump` indentado do payload completo."""
+    transactions = _categorized_transactions(synthetic_dir, bench_size)
+    out = str(tmp_path / f"bench_categorized.{mode}")
+    if mode == "indent":
+        fn, args, kwargs = _dump_indented, (out, transactions), {}
+    else:
+        fn, args, kwargs = write_results, (transactions,), {"json_path": out, "json_format": mode}
+
+    count = run_benchmark(f"write_result_json[{mode}]", SIZES[bench_size], fn, *args, **kwargs)
+
+    assert count == SIZES[bench_size]
+
+
+def test_bench_write_results_single_pass(run_benchmark, synthetic_dir, tmp_path, bench_size):
+    transactions = _categorized_transactions(synthetic_dir, bench_size)
+    csv_path, json_path = str(tmp_path / "bench.csv"), str(tmp_path / "bench.json")
+
+    count = run_benchmark("write_results[csv+json]", SIZES[bench_size],
+                          write_results, transactions, csv_path, json_path, metadata={"file_type": "csv"})
+
+    assert count == SIZES[bench_size]
+
+
+def test_bench_build_report(run_benchmark, synthetic_dir, bench_size):
+    path = _synthetic_csv(synthetic_dir, bench_size, CSV_PROFILES[0])
+    transactions = _statement_to_transactions(CSVBankParser().parse_file(path))
+    categories = ["Alimentação", "Transporte", "Saúde", "Moradia", "Outros"]
+    for index, tx in enumerate(transactions):
+        tx["category"] = categories[index % len(categories)]
+    arrays = TransactionArrays.from_transactions(transactions)
+
+    report = run_benchmark("build_report", SIZES[bench_size], build_report, arrays)
+
+    assert report.transaction_count == SIZES[bench_size]
+
+
+@pytest.mark.parametrize("source", ["cents", "float"])
+def test_bench_aggregate_money(run_benchmark, synthetic_dir, bench_size, source):
+    """Agregação do histórico a partir de centavos inteiros vs. do float legado; os totais são exatos."""
+    path = _synthetic_csv(synthetic_dir, bench_size, CSV_PROFILES[0])
+    transactions = _statement_to_transactions(CSVBankParser().parse_file(path))
+    expected_spent = sum(-tx["value_cents"] for tx in transactions if tx["value_cents"] < 0)
+    if source == "float":
+        for tx in transactions:
+            del tx["value_cents"]
+
+    report = run_benchmark(f"aggregate_money[{source}]", SIZES[bench_size], report_from_transactions, transactions)
+
+    assert report.spent_cents == expected_spent
+    assert sum(row["spent_cents"] for row in report.by_category) == expected_spent
+
+
+def _format_per_row(amounts):
+    return [format_currency(amount) for amount in amounts]
+
+
+@pytest.mark.parametrize("mode", ["column", "per_row"])
+def test_bench_format_currency(run_benchmark, synthetic_dir, bench_size, mode):
+    """Formatação em lote a partir de centavos vs. `format_currency` linha a linha a partir do float."""
+    path = _synthetic_csv(synthetic_dir, bench_size, CSV_PROFILES[0])
+    transactions = _statement_to_transactions(CSVBankParser().parse_file(path))
+    if mode == "column":
+        fn, values = format_cents_column, [tx["value_cents"] for tx in transactions]
+    else:
+        fn, values = _format_per_row, [tx["value"] for tx in transactions]
+
+    formatted = run_benchmark(f"format_currency[{mode}]", SIZES[bench_size], fn, values)
+
+    assert formatted == format_cents_column(tx["value_cents"] for tx in transactions)
@@ -5,6 +5,7 @@ Configurações e fixtures compartilhadas para os testes
 import pytest
 import tempfile
 import os
+import re
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -316,4 +317,23 @@ def csv_content_with_negative_parentheses():
 01/03/2024,SUPERMERCADO XYZ LTDA,(150.50),Alimentação
 02/03/2024,POSTO COMBUSTIVEL ABC,(89.75),Transporte
 05/03/2024,SALARIO EMPRESA XYZ,2500.00,Renda
-07/03/2024,FARMACIA SAUDE TOTAL,(45.80),Saúde"""
\ No newline at end of file
+07/03/2024,FARMACIA SAUDE TOTAL,(45.80),Saúde"""
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limits():
+    """Recria os limitadores de taxa a cada teste (buckets cheios, ambiente atual)."""
+    from src.utils.rate_limit import reset_throttles
+
+    reset_throttles()
+    yield
+    reset_throttles()
+
+
+def pytest_collection_modifyitems(config, items):
+    """Benchmarks só rodam quando a expressão -m cita o marcador `benchmark`."""
+    if re.search(r"\bbenchmark\b", config.getoption("markexpr") or ""):
+        return
+    benchmarks = [item for item in items if item.get_closest_marker("benchmark") is not None]
+    if benchmarks:
+        config.hook.pytest_deselected(items=benchmarks)
+        items[:] = [item for item in items if item.get_closest_marker("benchmark") is None]
@@ -0,0 +1,3 @@
+"""
+Ferramentas de teste de carga ponta a ponta
+"""
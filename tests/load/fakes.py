@@ -0,0 +1,341 @@
+"""
+Serviços falsos para o teste de carga
+
+- FakeTelegramServer: servidor HTTP local que imita a Bot API do Telegram
+  (getMe, getFile, download de arquivos, sendMessage, sendDocument,
+  editMessageText), usado por um telegram.Bot real via base_url.
+- FakeGemini: substituto em processo do módulo google.generativeai com
+  perfis configuráveis de latência, erro e limite de requisições.
+- FakeS3: substituto do cliente boto3 S3 que grava objetos em disco local.
+"""
+
+import json
+from email.parser import BytesParser
+from email.policy import default as email_policy
+import random
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, unquote
+
+from src.domain.categories import Category
+
+
+# === TELEGRAM ===
+
+class FakeTelegramServer:
+    """Servidor HTTP local que responde como a Bot API do Telegram"""
+
+    def __init__(self, token: str = "123456:LOADTEST", latency_ms: float = 0.0):
+        self.token = token
+        self.latency_ms = latency_ms
+        self.files: Dict[str, bytes] = {}
+        self.sent_messages: List[dict] = []
+        self.sent_documents: List[dict] = []
+        self.edited_messages: List[dict] = []
+        self._lock = threading.Lock()
+        self._message_id = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    @property
+    def base_file_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/file/bot"
+
+    def add_file(self, file_id: str, content: bytes) -> None:
+        with self._lock:
+            self.files[file_id] = content
+
+    def next_message_id(self) -> int:
+        with self._lock:
+            self._message_id += 1
+            return self._message_id
+
+    def start(self) -> "FakeTelegramServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *_args):
+                pass
+
+            def _send_json(self, payload: dict, status: int = 200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server._delay()
+                prefix = f"/file/bot{server.token}/documents/"
+                path = unquote(self.path)
+                file_id = path[len(prefix):] if path.startswith(prefix) else None
+                content = server.files.get(file_id) if file_id else None
+                if content is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_POST(self):
+                server._delay()
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                method = self.path.rsplit("/", 1)[-1]
+                params = server._parse_params(self.headers.get("Content-Type", ""), raw)
+                self._send_json(server._dispatch(method, params, len(raw)))
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _delay(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    @staticmethod
+    def _parse_params(content_type: str, raw: bytes) -> dict:
+        if content_type.startswith("application/json"):
+            return json.loads(raw or b"{}")
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return {k: v[0] for k, v in parse_qs(raw.decode("utf-8")).items()}
+        if content_type.startswith("multipart/form-data"):
+            # Mantém apenas os campos simples (chat_id, caption); o arquivo é descartado
+            message = BytesParser(policy=email_policy).parsebytes(
+                b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + raw
+            )
+            params = {}
+            for part in message.iter_parts():
+                if part.get_filename():
+                    continue
+                name = part.get_param("name", header="content-disposition")
+                if name:
+                    params[name] = part.get_content().strip()
+            return params
+        return {}
+
+    def _message(self, chat_id) -> dict:
+        return {
+            "message_id": self.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id or 0), "type": "private"},
+        }
+
+    def _dispatch(self, method: str, params: dict, size: int) -> dict:
+        if method == "getMe":
+            return {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "LoadTest", "username": "loadtest_bot"}}
+        if method == "getFile":
+            file_id = params.get("file_id", "")
+            content = self.files.get(file_id)
+            if content is None:
+                return {"ok": False, "error_code": 400, "description": "Bad Request: file not found"}
+            return {"ok": True, "result": {
+                "file_id": file_id, "file_unique_id": file_id,
+                "file_size": len(content), "file_path": f"documents/{file_id}",
+            }}
+        if method == "sendMessage":
+            with self._lock:
+                self.sent_messages.append({"chat_id": params.get("chat_id"), "text": params.get("text", "")})
+            return {"ok": True, "result": self._message(params.get("chat_id"))}
+        if method == "sendDocument":
+            with self._lock:
+                self.sent_documents.append({"chat_id": params.get("chat_id"), "caption": params.get("caption", ""), "size": size})
+            return {"ok": True, "result": self._message(params.get("chat_id"))}
+        if method == "editMessageText":
+            with self._lock:
+                self.edited_messages.append({"chat_id": params.get("chat_id"), "text": params.get("text", "")})
+            result = self._message(params.get("chat_id"))
+            result["text"] = params.get("text", "")
+            return {"ok": True, "result": result}
+        return {"ok": False, "error_code": 404, "description": f"Not Found: method {method}"}
+
+
+# === GEMINI ===
+
+class FakeGeminiRateLimit(Exception):
+    """Imita o erro 429 (ResourceExhausted) da API do Gemini"""
+
+
+class FakeGeminiError(Exception):
+    """Imita uma falha transitória (ex.: 500/503) da API do Gemini"""
+
+
+class FakeGeminiProfile:
+    """Perfil de comportamento do Gemini falso"""
+
+    def __init__(self, latency_ms: float = 300.0, jitter_ms: float = 100.0,
+                 per_item_ms: float = 2.0, error_rate: float = 0.0,
+                 rpm_limit: int = 0, seed: int = 7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_item_ms = per_item_ms
+        self.error_rate = error_rate
+        self.rpm_limit = rpm_limit
+        self.seed = seed
+
+
+PROFILES = {
+    "fast": FakeGeminiProfile(latency_ms=20, jitter_ms=5, per_item_ms=0.1),
+    "typical": FakeGeminiProfile(latency_ms=800, jitter_ms=300, per_item_ms=5),
+    "slow": FakeGeminiProfile(latency_ms=3000, jitter_ms=1500, per_item_ms=15),
+    "flaky": FakeGeminiProfile(latency_ms=800, jitter_ms=300, per_item_ms=5, error_rate=0.2),
+    "free-tier": FakeGeminiProfile(latency_ms=800, jitter_ms=300, per_item_ms=5, rpm_limit=15),
+}
+
+_CATEGORY_VALUES = [c.value for c in Category]
+# Linhas de transação do prompt compacto: "<id curto>|<descrição>|<valor>"
+_ID_RE = re.compile(r"^(\d+)\|", re.MULTILINE)
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGemini:
+    """Substituto do módulo google.generativeai (atributo `client` do classificador)"""
+
+    def __init__(self, profile: FakeGeminiProfile):
+        self.profile = profile
+        self.calls = 0
+        self.items = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._recent = deque()
+        self._rng = random.Random(profile.seed)
+        self._lock = threading.Lock()
+
+    def GenerativeModel(self, _model_name: str, **_kwargs) -> "FakeGemini._Model":
+        return FakeGemini._Model(self)
+
+    def _admit(self) -> None:
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            if self.profile.rpm_limit:
+                while self._recent and now - self._recent[0] > 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.profile.rpm_limit:
+                    self.rate_limited += 1
+                    raise FakeGeminiRateLimit("429 Resource has been exhausted (e.g. check quota).")
+                self._recent.append(now)
+            if self.profile.error_rate and self._rng.random() < self.profile.error_rate:
+                self.errors += 1
+                raise FakeGeminiError("503 The service is currently unavailable.")
+
+    def _plan(self, prompt: str):
+        ids = _ID_RE.findall(prompt)
+        with self._lock:
+            self.items += len(ids)
+            jitter = self._rng.uniform(-1, 1) * self.profile.jitter_ms
+        first_ms = max(0.0, self.profile.latency_ms + jitter)
+        items = [
+            {"i": int(short_id), "c": _CATEGORY_VALUES[zlib.crc32(short_id.encode()) % len(_CATEGORY_VALUES)]}
+            for short_id in ids
+        ]
+        return first_ms, items
+
+    def _respond(self, prompt: str) -> str:
+        first_ms, items = self._plan(prompt)
+        time.sleep((first_ms + self.profile.per_item_ms * len(items)) / 1000)
+        return json.dumps({"r": items}, ensure_ascii=False, separators=(",", ":"))
+
+    def _respond_stream(self, prompt: str) -> Iterator[_FakeResponse]:
+        """Primeiro pedaço após a latência base; depois um item a cada per_item_ms"""
+        first_ms, items = self._plan(prompt)
+        time.sleep(first_ms / 1000)
+        yield _FakeResponse('{"r":[')
+        for index, item in enumerate(items):
+            if self.profile.per_item_ms:
+                time.sleep(self.profile.per_item_ms / 1000)
+            prefix = "," if index else ""
+            yield _FakeResponse(prefix + json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+        yield _FakeResponse("]}")
+
+    class _Model:
+        def __init__(self, fake: "FakeGemini"):
+            self._fake = fake
+
+        def generate_content(self, prompt, stream: bool = False, **_kwargs):
+            self._fake._admit()
+            if stream:
+                return self._fake._respond_stream(str(prompt))
+            return _FakeResponse(self._fake._respond(str(prompt)))
+
+
+# === S3 ===
+
+class _NotFound(Exception):
+    """Imita botocore.exceptions.ClientError (404)"""
+
+
+class FakeS3:
+    """Substituto do cliente boto3 S3 com armazenamento em disco local"""
+
+    def __init__(self, root: str, latency_ms: float = 0.0):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.latency_ms = latency_ms
+        self.uploads = 0
+        self.downloads = 0
+        self._lock = threading.Lock()
+
+    def _path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    def _delay(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def upload_file(self, filename: str, bucket: str, key: str) -> None:
+        self._delay()
+        target = self._path(bucket, key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(filename, target)
+        with self._lock:
+            self.uploads += 1
+
+    def download_file(self, bucket: str, key: str, filename: str) -> None:
+        self._delay()
+        shutil.copyfile(self._path(bucket, key), filename)
+        with self._lock:
+            self.downloads += 1
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        self._delay()
+        target = self._path(Bucket, Key)
+        if not target.exists():
+            raise _NotFound(f"404 Not Found: s3://{Bucket}/{Key}")
+        return {"ContentLength": target.stat().st_size}
+
+    def client(self, *_args, **_kwargs) -> "FakeS3":
+        """Permite usar a instância no lugar do módulo boto3 (boto3.client('s3'))."""
+        return self
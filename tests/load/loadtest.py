@@ -0,0 +1,322 @@
+"""
+Teste de carga ponta a ponta do handle_document
+
+Simula N usuários concorrentes enviando extratos para o bot. O handler real
+é executado com um telegram.Bot real apontado para um servidor local que
+imita a Bot API, com o Gemini e o S3 substituídos por implementações falsas
+(ver tests/load/fakes.py). Ao final, reporta vazão, percentis de latência
+por etapa e uso de memória.
+
+Uso:
+    python -m tests.load.loadtest --users 20 --docs-per-user 3 --rows 500 --gemini-profile typical
+    python -m tests.load.loadtest --users 50 --gemini-profile free-tier --json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import resource
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+from unittest.mock import patch
+
+from telegram import Bot, Update
+
+from src.ai.transaction_classifier import TransactionClassifier
+from src.handlers import handle_document as hd
+from src.utils.metrics import REGISTRY, STAGE_DURATION
+from src.utils.rate_limit import THROTTLE_WAIT, reset_throttles
+from src.storage.store import get_default_store
+from tests.benchmarks.synthetic import generate_csv, generate_ofx
+from tests.load.fakes import PROFILES, FakeGemini, FakeGeminiProfile, FakeS3, FakeTelegramServer
+
+
+# Etapas instrumentadas no handler (ver src/utils/metrics.py)
+STAGES = [
+    "download",
+    "upload_original",
+    "hash",
+    "cache_lookup",
+    "cache_download",
+    "parse",
+    "history_lookup",
+    "classify",
+    "history_save",
+    "report",
+    "write_results",
+    "upload_processed",
+    "reply",
+]
+
+
+class StageRecorder:
+    """Guarda as amostras brutas dos spans para calcular percentis exatos"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __call__(self, name: str, seconds: float, labels: dict) -> None:
+        if name == STAGE_DURATION:
+            key = labels.get("stage", "")
+        elif name == THROTTLE_WAIT:
+            key = f"throttle_{labels.get('limiter', '')}"
+        else:
+            return
+        with self._lock:
+            self.samples[key].append(seconds)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por posição mais próxima (nearest-rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p90_ms": round(percentile(values, 90) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+def _build_update(bot: Bot, update_id: int, user_id: int, file_id: str, file_name: str, size: int) -> Update:
+    data = {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Load{user_id}"},
+            "document": {
+                "file_id": file_id,
+                "file_unique_id": file_id,
+                "file_name": file_name,
+                "file_size": size,
+            },
+        },
+    }
+    return Update.de_json(data, bot)
+
+
+def _prepare_documents(telegram: FakeTelegramServer, work_dir: Path, users: int, docs_per_user: int,
+                       rows: int, file_format: str, duplicate_ratio: float) -> List[tuple]:
+    """Gera os arquivos de cada usuário e registra no servidor falso."""
+    plan = []
+    unique_docs = max(1, int(round(docs_per_user * (1 - duplicate_ratio))))
+    for user in range(users):
+        user_id = 10_000 + user
+        for doc in range(docs_per_user):
+            seed = user * 1000 + (doc % unique_docs)
+            file_name = f"extrato_{user_id}_{doc % unique_docs}.{file_format}"
+            path = work_dir / f"{user_id}_{doc}.{file_format}"
+            if file_format == "csv":
+                generate_csv(str(path), rows, delimiter=";", split_columns=bool(user % 2), seed=seed)
+            else:
+                generate_ofx(str(path), rows, version=1 + user % 2, seed=seed)
+            content = path.read_bytes()
+            file_id = f"f{user_id}x{doc}"
+            telegram.add_file(file_id, content)
+            plan.append((user_id, file_id, file_name, len(content)))
+    return plan
+
+
+async def run_load_test(users: int = 10, docs_per_user: int = 1, rows: int = 200, file_format: str = "csv",
+                        gemini_profile: FakeGeminiProfile = PROFILES["fast"], telegram_latency_ms: float = 0.0,
+                        s3_latency_ms: float = 0.0, duplicate_ratio: float = 0.0,
+                        trace_memory: bool = False) -> dict:
+    """
+    Executa o teste de carga e retorna o relatório
+
+    Args:
+        users: Número de usuários simulados concorrentes
+        docs_per_user: Documentos enviados em sequência por cada usuário
+        rows: Transações por documento
+        file_format: 'csv' ou 'ofx'
+        gemini_profile: Perfil de latência/erro/limite do Gemini falso
+        telegram_latency_ms: Latência adicionada a cada chamada da Bot API falsa
+        s3_latency_ms: Latência adicionada a cada operação do S3 falso
+        duplicate_ratio: Fração de reenvios do mesmo arquivo (exercita o cache)
+        trace_memory: Mede pico de alocações Python com tracemalloc (mais lento)
+    """
+    work_dir = Path(tempfile.mkdtemp(prefix="fin-cat-load-"))
+    telegram = FakeTelegramServer(latency_ms=telegram_latency_ms).start()
+    gemini = FakeGemini(gemini_profile)
+    s3 = FakeS3(str(work_dir / "s3"), latency_ms=s3_latency_ms)
+    recorder = StageRecorder()
+
+    docs_dir = work_dir / "docs"
+    docs_dir.mkdir()
+    plan = _prepare_documents(telegram, docs_dir, users, docs_per_user, rows, file_format, duplicate_ratio)
+
+    env = {
+        "GOOGLE_API_KEY": "loadtest",
+        "DATA_DIR": str(work_dir / "data"),
+        "S3_BUCKET_UPLOADS": "loadtest-bucket",
+        "APP_ENV": "production",
+        "DEBUG": "",
+    }
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict(os.environ, env))
+        # Limitadores e histórico recriados com o ambiente do teste e descartados ao final
+        reset_throttles()
+        stack.callback(reset_throttles)
+        get_default_store.cache_clear()
+        stack.callback(get_default_store.cache_clear)
+        stack.enter_context(patch.object(hd, "boto3", s3))
+        stack.enter_context(patch.object(
+            TransactionClassifier, "_initialize_client", lambda self: setattr(self, "client", gemini)
+        ))
+        stack.enter_context(patch.object(REGISTRY, "enabled", True))
+        REGISTRY.reset()
+        REGISTRY.add_listener(recorder)
+        stack.callback(REGISTRY.remove_listener, recorder)
+
+        bot = Bot(telegram.token, base_url=telegram.base_url, base_file_url=telegram.base_file_url)
+        await bot.initialize()
+        context = SimpleNamespace(bot=bot)
+
+        by_user: Dict[int, List[tuple]] = defaultdict(list)
+        for item in plan:
+            by_user[item[0]].append(item)
+
+        totals: List[float] = []
+        failures = 0
+
+        async def simulate_user(items: List[tuple]):
+            nonlocal failures
+            for user_id, file_id, file_name, size in items:
+                update = _build_update(bot, telegram.next_message_id(), user_id, file_id, file_name, size)
+                started = time.perf_counter()
+                try:
+                    await hd.handle_document(update, context)
+                except Exception:
+                    failures += 1
+                totals.append(time.perf_counter() - started)
+
+        if trace_memory:
+            tracemalloc.start()
+        wall_started = time.perf_counter()
+        await asyncio.gather(*(simulate_user(items) for items in by_user.values()))
+        wall = time.perf_counter() - wall_started
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+        await bot.shutdown()
+
+    telegram.stop()
+
+    error_replies = sum(1 for m in telegram.sent_messages if m["text"].startswith("❌"))
+    documents = len(plan)
+    return {
+        "config": {
+            "users": users, "docs_per_user": docs_per_user, "rows": rows, "format": file_format,
+            "gemini": vars(gemini_profile), "telegram_latency_ms": telegram_latency_ms,
+            "s3_latency_ms": s3_latency_ms, "duplicate_ratio": duplicate_ratio,
+        },
+        "wall_seconds": round(wall, 3),
+        "throughput": {
+            "documents_per_sec": round(documents / wall, 3) if wall else 0.0,
+            "rows_per_sec": round(documents * rows / wall, 1) if wall else 0.0,
+        },
+        "latency": {
+            "total": summarize(totals),
+            **{stage: summarize(recorder.samples[stage]) for stage in STAGES},
+            **{key: summarize(values) for key, values in sorted(recorder.samples.items()) if key.startswith("throttle_")},
+        },
+        "outcomes": {
+            "documents": documents,
+            "handler_exceptions": failures,
+            "error_replies": error_replies,
+            "documents_sent": len(telegram.sent_documents),
+            "text_messages_sent": len(telegram.sent_messages),
+            "progress_edits": len(telegram.edited_messages),
+            "gemini_calls": gemini.calls,
+            "gemini_errors": gemini.errors,
+            "gemini_rate_limited": gemini.rate_limited,
+            "s3_uploads": s3.uploads,
+            "s3_downloads": s3.downloads,
+        },
+        "counters": REGISTRY.snapshot()["counters"],
+        "memory": {
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "traced_peak_mb": round(traced_peak / (1024 * 1024), 1) if traced_peak is not None else None,
+        },
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = []
+    cfg = report["config"]
+    lines.append(f"Usuários: {cfg['users']} | docs/usuário: {cfg['docs_per_user']} | linhas/doc: {cfg['rows']} | formato: {cfg['format']}")
+    lines.append(f"Tempo total: {report['wall_seconds']}s | docs/s: {report['throughput']['documents_per_sec']} | linhas/s: {report['throughput']['rows_per_sec']}")
+    lines.append("")
+    lines.append(f"{'etapa':<18}{'n':>6}{'p50 ms':>12}{'p90 ms':>12}{'p99 ms':>12}{'max ms':>12}")
+    for stage, stats in report["latency"].items():
+        lines.append(f"{stage:<18}{stats['count']:>6}{stats['p50_ms']:>12}{stats['p90_ms']:>12}{stats['p99_ms']:>12}{stats['max_ms']:>12}")
+    lines.append("")
+    lines.append("Resultados: " + ", ".join(f"{k}={v}" for k, v in report["outcomes"].items()))
+    mem = report["memory"]
+    lines.append(f"Memória: max_rss={mem['max_rss_mb']}MB" + (f" | pico tracemalloc={mem['traced_peak_mb']}MB" if mem["traced_peak_mb"] is not None else ""))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do Financial Categorizer Bot")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--docs-per-user", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--format", choices=["csv", "ofx"], default="csv")
+    parser.add_argument("--gemini-profile", choices=sorted(PROFILES), default="typical")
+    parser.add_argument("--gemini-latency-ms", type=float, help="Sobrescreve a latência base do perfil")
+    parser.add_argument("--gemini-error-rate", type=float, help="Sobrescreve a taxa de erro do perfil")
+    parser.add_argument("--gemini-rpm", type=int, help="Sobrescreve o limite de requisições/minuto do perfil")
+    parser.add_argument("--telegram-latency-ms", type=float, default=0.0)
+    parser.add_argument("--s3-latency-ms", type=float, default=0.0)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0)
+    parser.add_argument("--trace-memory", action="store_true")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", action="store_true", help="Imprime o relatório em JSON")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    base = PROFILES[args.gemini_profile]
+    profile = FakeGeminiProfile(
+        latency_ms=base.latency_ms if args.gemini_latency_ms is None else args.gemini_latency_ms,
+        jitter_ms=base.jitter_ms,
+        per_item_ms=base.per_item_ms,
+        error_rate=base.error_rate if args.gemini_error_rate is None else args.gemini_error_rate,
+        rpm_limit=base.rpm_limit if args.gemini_rpm is None else args.gemini_rpm,
+        seed=base.seed,
+    )
+
+    report = asyncio.run(run_load_test(
+        users=args.users, docs_per_user=args.docs_per_user, rows=args.rows, file_format=args.format,
+        gemini_profile=profile, telegram_latency_ms=args.telegram_latency_ms,
+        s3_latency_ms=args.s3_latency_ms, duplicate_ratio=args.duplicate_ratio,
+        trace_memory=args.trace_memory,
+    ))
+    print(json.dumps(report, indent=2, ensure_ascii=False) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Teste de fumaça do harness de carga (poucos usuários, Gemini rápido)
+"""
+
+import pytest
+
+from tests.load.fakes import FakeGeminiProfile
+from tests.load.loadtest import percentile, run_load_test
+
+
+def test_percentile_nearest_rank():
+    values = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+
+    assert percentile(values, 50) == 0.5
+    assert percentile(values, 90) == 0.9
+    assert percentile(values, 99) == 1.0
+    assert percentile([], 50) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_load_test_smoke():
+    profile = FakeGeminiProfile(latency_ms=1, jitter_ms=0, per_item_ms=0)
+
+    report = await run_load_test(users=3, docs_per_user=2, rows=20, gemini_profile=profile, duplicate_ratio=0.5)
+
+    outcomes = report["outcomes"]
+    assert outcomes["documents"] == 6
+    assert outcomes["handler_exceptions"] == 0
+    assert outcomes["error_replies"] == 0
+    assert outcomes["documents_sent"] == 6
+    # Documentos processados (sem cache) atualizam a mensagem de progresso
+    assert outcomes["progress_edits"] >= 3
+    # Metade dos envios repete o arquivo anterior e deve sair do cache
+    assert outcomes["s3_downloads"] == 3
+    assert report["latency"]["parse"]["count"] == 3
+    assert report["latency"]["total"]["count"] == 6
@@ -6,6 +6,7 @@ import json
 import pytest
 
 from src.ai.transaction_classifier import TransactionClassifier
+from src.ai.rules import RuleEngine
 
 
 class DummyClient:
@@ -23,7 +24,8 @@ class DummyClient:
 
 
 def test_process_categorization_response_valid(monkeypatch):
-    classifier = TransactionClassifier(api_key="dummy")
+    # Sem regras, para exercitar o caminho do modelo
+    classifier = TransactionClassifier(api_key="dummy", rule_engine=RuleEngine([]))
 
     # Injeta client dummy (evita chamada real)
     monkeypatch.setattr(classifier, "client", DummyClient)
@@ -55,3 +57,123 @@ def test_process_categorization_response_invalid_json(monkeypatch):
     assert out[0]["categorization_confidence"] == 0.0
 
 
+def test_rules_skip_model_call(monkeypatch):
+    classifier = TransactionClassifier(api_key="dummy")
+
+    class FailingClient:
+        class GenerativeModel:
+            def __init__(self, *_args, **_kwargs):
+                raise AssertionError("modelo não deveria ser chamado")
+
+    monkeypatch.setattr(classifier, "client", FailingClient)
+
+    txs = [
+        {"id": 1, "name": "UBER *TRIP", "value": -12.3, "date": "2024-01-01"},
+        {"id": 2, "name": "SALÁRIO EMPRESA XYZ", "value": 2500.0, "date": "2024-01-05"},
+    ]
+    out = classifier.categorize_transactions(txs)
+
+    assert [tx["category"] for tx in out] == ["Transporte", "Renda"]
+    assert out[0]["categorization_confidence"] == 1.0
+
+
+def test_rules_and_model_results_are_merged_in_order(monkeypatch):
+    classifier = TransactionClassifier(api_key="dummy")
+    monkeypatch.setattr(classifier, "client", DummyClient)
+
+    txs = [
+        {"id": 0, "name": "IFOOD *RESTAURANTE", "value": -30.0, "date": "2024-01-01"},
+        {"id": 1, "name": "LOJA DESCONHECIDA", "value": -12.3, "date": "2024-01-02"},
+    ]
+    out = classifier.categorize_transactions(txs)
+
+    assert [tx["id"] for tx in out] == [0, 1]
+    assert out[0]["category"] == "Alimentação"
+    assert out[1]["category"] == "Transporte"
+
+
+def test_model_is_called_with_structured_output_schema(monkeypatch):
+    classifier = TransactionClassifier(api_key="dummy", rule_engine=RuleEngine([]))
+    seen = {}
+
+    class SchemaClient:
+        class GenerativeModel:
+            def __init__(self, _model_name, generation_config=None):
+                seen["config"] = generation_config
+
+            def generate_content(self, prompt):
+                return type("Resp", (), {"text": '{"r":[{"i":0,"c":"Saúde"}]}'})
+
+    monkeypatch.setattr(classifier, "client", SchemaClient)
+
+    out = classifier.categorize_transactions([{"id": "x", "name": "DROGARIA", "value": -20.0, "date": "2024-01-01"}])
+
+    assert out[0]["category"] == "Saúde"
+    assert seen["config"]["response_mime_type"] == "application/json"
+    category_schema = seen["config"]["response_schema"]["properties"]["r"]["items"]["properties"]["c"]
+    assert "Saúde" in category_schema["enum"]
+
+
+def test_streaming_yields_each_transaction_as_its_item_completes(monkeypatch):
+    classifier = TransactionClassifier(api_key="dummy", rule_engine=RuleEngine([]))
+    events = []
+
+    class StreamingClient:
+        class GenerativeModel:
+            def __init__(self, *_args, **_kwargs):
+                pass
+
+            def generate_content(self, prompt, stream=False):
+                assert stream is True
+                for piece in ('{"r":[{"i":1,"c":"Saúde"}', ',{"i":0,"c":"Transporte"}', "]}"):
+                    events.append(("chunk", piece))
+                    yield type("Chunk", (), {"text": piece})
+
+    monkeypatch.setattr(classifier, "client", StreamingClient)
+
+    txs = [
+        {"id": "a", "name": "UBER", "value": -10.0, "date": "2024-01-01"},
+        {"id": "b", "name": "DROGARIA", "value": -20.0, "date": "2024-01-01"},
+        {"id": "c", "name": "LOJA", "value": -5.0, "date": "2024-01-01"},
+    ]
+    for tx in classifier.iter_categorize_transactions(txs, stream=True):
+        events.append(("tx", tx["id"], tx["category"]))
+
+    assert events == [
+        ("chunk", '{"r":[{"i":1,"c":"Saúde"}'),
+        ("tx", "b", "Saúde"),
+        ("chunk", ',{"i":0,"c":"Transporte"}'),
+        ("tx", "a", "Transporte"),
+        ("chunk", "]}"),
+        ("tx", "c", "Outros"),
+    ]
+
+
+def test_categorize_with_gemini_reports_progress(monkeypatch):
+    from src.ai import transaction_classifier as tc
+
+    monkeypatch.setattr(tc.TransactionClassifier, "_initialize_client", lambda self: setattr(self, "client", None))
+    progress = []
+
+    txs = [
+        {"id": 1, "name": "UBER *TRIP", "value": -12.3, "date": "2024-01-01"},
+        {"id": 2, "name": "SALÁRIO EMPRESA XYZ", "value": 2500.0, "date": "2024-01-05"},
+    ]
+    out = tc.categorize_with_gemini(txs, api_key="dummy", on_progress=lambda done, total: progress.append((done, total)))
+
+    assert [tx["id"] for tx in out] == [1, 2]
+    assert progress == [(1, 2), (2, 2)]
+
+
+def test_model_calls_are_charged_to_the_user(monkeypatch):
+    from src.ai import transaction_classifier as tc
+
+    charged = []
+    monkeypatch.setattr(tc, "acquire_gemini_call",
+                        lambda tokens, user_id=None, user_shares=None: charged.append((user_id, user_shares)) or 0.0)
+    classifier = TransactionClassifier(api_key="dummy", rule_engine=RuleEngine([]))
+    monkeypatch.setattr(classifier, "client", DummyClient)
+
+    classifier.categorize_transactions([{"id": 1, "name": "Uber", "value": -12.3, "date": "2024-01-01"}], user_id=7)
+
+    assert charged == [(7, None)]
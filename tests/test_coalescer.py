@@ -0,0 +1,120 @@
+"""
+Testes para a coalescência de categorizações entre requisições simultâneas
+"""
+
+import threading
+
+from src.ai.coalescer import ClassificationCoalescer, coalesce_key, get_default_coalescer
+
+
+def _tx(tx_id, merchant, value=-10.0):
+    return {"id": tx_id, "name": merchant.upper(), "merchant": merchant, "value": value, "date": "2024-01-01"}
+
+
+class RecordingClassifier:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        with self._lock:
+            self.batches.append([rep["merchant"] for rep in batch])
+        if self.fail:
+            raise RuntimeError("Gemini indisponível")
+        for rep in batch:
+            yield {**rep, "category": f"cat-{rep['merchant']}", "categorization_confidence": 0.9,
+                   "categorization_reasoning": "ok"}
+
+
+def test_coalesce_key_uses_merchant_and_sign():
+    assert coalesce_key(_tx(1, "ifood")) == ("ifood", "debit")
+    assert coalesce_key(_tx(2, "ifood", 5.0)) == ("ifood", "credit")
+    assert coalesce_key({"name": "PADARIA CENTRAL", "value": -1.0})[1] == "debit"
+
+
+def test_concurrent_requests_share_one_call():
+    coalescer = ClassificationCoalescer(window_seconds=0.2)
+    classify = RecordingClassifier()
+    requests = [
+        [_tx(1, "ifood"), _tx(2, "netflix"), _tx(3, "ifood")],
+        [_tx(10, "ifood"), _tx(11, "padaria")],
+        [_tx(20, "netflix")],
+    ]
+    results = [None] * len(requests)
+
+    def run(index):
+        results[index] = list(coalescer.categorize(requests[index], classify))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(classify.batches) == 1
+    assert sorted(classify.batches[0]) == ["ifood", "netflix", "padaria"]
+    for request, result in zip(requests, results):
+        assert sorted(tx["id"] for tx in result) == sorted(tx["id"] for tx in request)
+        for tx in result:
+            assert tx["category"] == f"cat-{tx['merchant']}"
+            assert tx["categorization_confidence"] == 0.9
+
+
+def test_max_batch_size_dispatches_immediately():
+    coalescer = ClassificationCoalescer(window_seconds=60, max_batch_size=2)
+    classify = RecordingClassifier()
+
+    result = list(coalescer.categorize([_tx(1, "a"), _tx(2, "b")], classify))
+
+    assert len(result) == 2
+    assert classify.batches == [["a", "b"]]
+
+
+def test_failed_batch_resolves_with_default_category():
+    coalescer = ClassificationCoalescer(window_seconds=0.01)
+    classify = RecordingClassifier(fail=True)
+
+    result = list(coalescer.categorize([_tx(1, "ifood"), _tx(2, "ifood")], classify))
+
+    assert [tx["category"] for tx in result] == ["Outros", "Outros"]
+    assert all(tx["categorization_confidence"] == 0.0 for tx in result)
+    assert classify.batches == [["ifood"]]
+
+
+def test_resolved_keys_are_dispatched_again():
+    coalescer = ClassificationCoalescer(window_seconds=0.01)
+    classify = RecordingClassifier()
+
+    list(coalescer.categorize([_tx(1, "ifood")], classify))
+    list(coalescer.categorize([_tx(2, "ifood")], classify))
+
+    assert classify.batches == [["ifood"], ["ifood"]]
+
+
+def test_default_coalescer_can_be_disabled(monkeypatch):
+    get_default_coalescer.cache_clear()
+    monkeypatch.setenv("GEMINI_COALESCE_WINDOW_MS", "0")
+    try:
+        assert get_default_coalescer() is None
+    finally:
+        get_default_coalescer.cache_clear()
+
+
+class RecordingUsers:
+    def __init__(self):
+        self.users = []
+
+    def __call__(self, batch):
+        self.users.extend(rep["user_id"] for rep in batch)
+        return []
+
+
+def test_representatives_carry_the_requesting_user():
+    coalescer = ClassificationCoalescer(window_seconds=0.01)
+    classify = RecordingUsers()
+
+    list(coalescer.categorize([_tx(1, "ifood"), _tx(2, "netflix")], classify, user_id=42))
+
+    assert classify.users == [42, 42]
+
@@ -0,0 +1,114 @@
+"""
+Testes para o registro de layouts CSV por banco
+"""
+
+import csv
+
+import pytest
+
+from src.parsers.csv import CSVBankParser
+from src.parsers.layouts import (
+    BankLayout,
+    LayoutRegistry,
+    layout_fingerprint,
+    load_layout_registry,
+)
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def no_sniffer(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Sniffer não deveria ser usado")
+
+    monkeypatch.setattr(csv.Sniffer, "sniff", fail)
+
+
+def test_fingerprint_ignores_case_accents_and_spacing_but_not_delimiter():
+    assert layout_fingerprint(["Data", "Descrição", "Valor"], ";") == layout_fingerprint(["DATA ", "descricao", "valor"], ";")
+    assert layout_fingerprint(["Data", "Descrição", "Valor"], ";") != layout_fingerprint(["Data", "Descrição", "Valor"], ",")
+
+
+def test_default_layouts_load_with_unique_fingerprints():
+    registry = load_layout_registry()
+
+    assert len(registry) >= 5
+    assert registry.get(layout_fingerprint(["date", "title", "amount"], ",")).id == "nubank-cartao"
+
+
+def test_known_layout_skips_sniffer_and_applies_profile(tmp_path, no_sniffer):
+    path = _write(tmp_path, "nubank.csv", "date,title,amount\n2024-03-01,Padaria,12.50\n2024-03-02,Pagamento recebido,-100.00\n")
+
+    statement = CSVBankParser(layouts=load_layout_registry()).parse_file(path)
+
+    assert [(e.name, e.value) for e in statement.expenses] == [("Padaria", -12.5), ("Pagamento recebido", 100.0)]
+
+
+def test_profile_decimal_separator_is_not_guessed(tmp_path):
+    layout = BankLayout("banco", ";", ["Data", "Histórico", "Valor"], {"date": 0, "description": 1, "value": 2},
+                        date_format="%d/%m/%Y", decimal=",")
+    path = _write(tmp_path, "banco.csv", "Data;Histórico;Valor\n01/03/2024;TED;-1.000\n")
+
+    statement = CSVBankParser(layouts=LayoutRegistry([layout])).parse_file(path)
+
+    # Sem o perfil, "-1.000" seria lido como -1.0
+    assert statement.expenses[0].value == -1000.0
+
+
+def test_layout_with_preamble_lines(tmp_path, no_sniffer):
+    layout = BankLayout("banco", ";", ["Data", "Histórico", "Valor"], {"date": 0, "description": 1, "value": 2},
+                        skip_lines=2)
+    text = "Extrato Conta Corrente\nPeríodo;01/03/2024 a 31/03/2024\nData;Histórico;Valor\n01/03/2024;PIX;-10,00\n"
+    path = _write(tmp_path, "preambulo.csv", text)
+
+    for workers in (1, 2):
+        statement = CSVBankParser(layouts=LayoutRegistry([layout])).parse_file(path, workers=workers)
+        assert [(e.name, e.value) for e in statement.expenses] == [("PIX", -10.0)]
+
+
+def test_unknown_layout_is_learned(tmp_path, monkeypatch):
+    parser = CSVBankParser(layouts=LayoutRegistry([]))
+    path = _write(tmp_path, "novo.csv", "Data|Descrição|Valor\n01/03/2024|Mercado|-30,00\n")
+
+    learned = parser.detect_csv_format(path)["layout"]
+    assert learned.learned
+
+    monkeypatch.setattr(csv.Sniffer, "sniff", lambda *args, **kwargs: pytest.fail("Sniffer usado"))
+    monkeypatch.setattr(parser, "_map_columns", lambda headers: pytest.fail("Mapeamento refeito"))
+    again = parser.detect_csv_format(path)
+
+    assert again["layout"] is learned
+    assert again["delimiter"] == "|"
+    assert again["column_mapping"] == {"date": 0, "description": 1, "value": 2}
+
+
+def test_unusable_header_is_not_learned(tmp_path):
+    registry = LayoutRegistry([])
+    path = _write(tmp_path, "sem_data.csv", "Quando|Lançamento|Quantia\n01/03/2024|Mercado|-30,00\n")
+
+    assert CSVBankParser(layouts=registry).detect_csv_format(path)["layout"] is None
+    assert len(registry) == 0
+
+
+def test_learn_rejects_single_column_and_evicts_oldest():
+    registry = LayoutRegistry([], max_learned=1)
+    mapping = {"date": 0, "value": 1}
+
+    assert registry.learn(["Data;Valor"], ",", {"date": 0, "value": 0}) is None
+    first = registry.learn(["Data", "Valor"], ";", mapping)
+    registry.learn(["Data", "Quantia"], ";", mapping)
+
+    assert registry.get(first.fingerprint) is None
+    assert len(registry) == 1
+
+
+def test_invalid_layout_is_rejected():
+    with pytest.raises(ValueError):
+        BankLayout("banco", ";", ["Data", "Valor"], {"date": 0}, sign="invertido")
+    with pytest.raises(ValueError):
+        BankLayout("banco", ";", ["Descrição"], {"description": 0})
@@ -670,3 +670,223 @@ class TestEdgeCases:
             
         finally:
             os.unlink(temp_file)
+
+
+class TestParallelParsing:
+    """Testes para o parse paralelo em blocos"""
+
+    @staticmethod
+    def _signature(statement):
+        return [(e.id, e.name, e.value, e.date, e.merchant, e.category) for e in statement.expenses]
+
+    def test_split_records_respects_quoted_newlines(self):
+        """Fronteiras de bloco nunca caem dentro de campos entre aspas"""
+        from src.parsers.csv import _split_records
+
+        data = b'h1,h2\n1,"a\nb\nc"\n2,"x ""y""\nz"\n3,ok\n'
+        chunks = _split_records(data, 6, 8)
+
+        assert chunks[0][0] == 6 and chunks[-1][1] == len(data)
+        for start, end, _line in chunks:
+            assert data[start:end].count(b'"') % 2 == 0
+        assert [line for _s, _e, line in chunks][0] == 2
+
+    def test_parallel_matches_sequential(self, tmp_path):
+        """Modo paralelo produz as mesmas transações, na mesma ordem e com os mesmos ids"""
+        lines = ["﻿Data;Descrição;Valor"]
+        for i in range(400):
+            description = f'"LOJA {i}\r\nFILIAL ""{i % 7}"""' if i % 50 == 0 else f"PAG*IFOOD {i}"
+            lines.append(f"{(i % 28) + 1:02d}/03/2024;{description};-{i},{i % 100:02d}")
+        lines.insert(120, "data inválida;LINHA RUIM;1,00")
+        path = tmp_path / "grande.csv"
+        path.write_bytes("\r\n".join(lines).encode("utf-8"))
+
+        sequential = CSVBankParser().parse_file(str(path), workers=1)
+        parallel = CSVBankParser().parse_file(str(path), workers=3)
+
+        assert len(sequential.expenses) == 400
+        assert self._signature(parallel) == self._signature(sequential)
+        assert parallel.expenses[0].name == "LOJA 0\r\nFILIAL \"0\""
+
+    def test_parallel_and_sequential_report_the_same_physical_lines(self, tmp_path):
+        """Diagnósticos usam a linha física do arquivo nos dois modos"""
+        lines = ["Data;Descrição;Valor"]
+        for i in range(300):
+            description = f'"LOJA {i}\nFILIAL"' if i % 40 == 0 else f"LOJA {i}"
+            lines.append(f"01/03/2024;{description};-1,00")
+        lines.insert(150, "data inválida;LINHA RUIM;1,00")
+        lines.append("31/02/2024;DATA INEXISTENTE;1,00")
+        path = tmp_path / "linhas.csv"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        # Linha física: as descrições com quebra ocupam duas linhas cada
+        physical = path.read_text(encoding="utf-8").splitlines()
+        bad_lines = [n for n, line in enumerate(physical, start=1) if "LINHA RUIM" in line or "INEXISTENTE" in line]
+
+        sequential = CSVBankParser().parse_file(str(path), workers=1).diagnostics
+        parallel = CSVBankParser().parse_file(str(path), workers=3).diagnostics
+
+        assert sorted(n for rows in sequential.samples.values() for n in rows) == bad_lines
+        assert parallel.samples == sequential.samples
+        assert parallel.counts == sequential.counts
+
+    def test_parallel_mode_follows_environment(self, tmp_path, monkeypatch):
+        """Arquivos abaixo do tamanho mínimo seguem no modo sequencial"""
+        from src.parsers.csv import _parallel_workers
+
+        path = tmp_path / "pequeno.csv"
+        path.write_text("Data,Descrição,Valor\n01/03/2024,X,1.00\n", encoding="utf-8")
+        monkeypatch.setenv("CSV_PARALLEL_MIN_BYTES", "10")
+        monkeypatch.delenv("CSV_PARALLEL_WORKERS", raising=False)
+        # Opcional: desligado sem CSV_PARALLEL_WORKERS
+        assert _parallel_workers(str(path)) == 1
+        monkeypatch.setenv("CSV_PARALLEL_WORKERS", "4")
+
+        monkeypatch.setenv("CSV_PARALLEL_MIN_BYTES", "1000000")
+        assert _parallel_workers(str(path)) == 1
+        monkeypatch.setenv("CSV_PARALLEL_MIN_BYTES", "10")
+        assert _parallel_workers(str(path)) == 4
+        monkeypatch.setenv("CSV_PARALLEL_WORKERS", "1")
+        assert _parallel_workers(str(path)) == 1
+
+    def test_parallel_parses_share_one_pool_without_fork(self, tmp_path):
+        from src.parsers import csv as csv_module
+
+        path = tmp_path / "pool.csv"
+        path.write_text("Data;Descrição;Valor\n" + "01/03/2024;LOJA;-1,00\n" * 50, encoding="utf-8")
+
+        CSVBankParser().parse_file(str(path), workers=2)
+        pool = csv_module._get_parse_pool(2)
+        statement = CSVBankParser().parse_file(str(path), workers=2)
+
+        assert len(statement.expenses) == 50
+        assert csv_module._get_parse_pool(2) is pool
+        assert csv_module._pool_context().get_start_method() != "fork"
+
+
+class TestPreambleAndFooter:
+    """Testes para cabeçalho após linhas de metadados e rodapé de saldos"""
+
+    CONTENT = (
+        "Extrato Conta Corrente\n"
+        "Agência;0001;Conta;12345-6\n"
+        "Período;01/03/2024 a 31/03/2024\n"
+        "\n"
+        "Data;Histórico;Valor;Saldo\n"
+        "01/03/2024;PIX RECEBIDO;1.500,00;1.500,00\n"
+        "02/03/2024;SALDO APLICADO;-200,00;1.300,00\n"
+        "03/03/2024;PADARIA;-12,50;1.287,50\n"
+        "\n"
+        "31/03/2024;SALDO DO DIA;;1.287,50\n"
+        "Total de lançamentos;3\n"
+    )
+
+    def _parser(self):
+        from src.parsers.layouts import LayoutRegistry
+
+        return CSVBankParser(layouts=LayoutRegistry([]))
+
+    def test_header_found_after_preamble(self):
+        lines = self.CONTENT.split("\n")
+
+        assert self._parser()._find_header(lines) == (4, ";")
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_preamble_and_footer_are_skipped_and_counted(self, tmp_path, caplog, workers):
+        from src.parsers.csv import REASON_FOOTER_ROW
+
+        path = tmp_path / "extrato.csv"
+        path.write_text(self.CONTENT, encoding="utf-8")
+
+        with caplog.at_level("WARNING"):
+            statement = self._parser().parse_file(str(path), workers=workers)
+
+        assert [(e.name, e.value) for e in statement.expenses] == [
+            ("PIX RECEBIDO", 1500.0), ("SALDO APLICADO", -200.0), ("PADARIA", -12.5)
+        ]
+        assert statement.diagnostics.counts == {REASON_FOOTER_ROW: 2}
+        assert statement.diagnostics.samples[REASON_FOOTER_ROW] == [10, 11]
+        # Um único aviso agregado, sem avisos por linha
+        assert len([r for r in caplog.records if r.levelname == "WARNING"]) == 1
+
+    def test_transactions_starting_with_footer_words_are_kept(self, tmp_path):
+        from src.parsers.csv import REASON_FOOTER_ROW
+
+        path = tmp_path / "extrato.csv"
+        path.write_text(
+            "Data;Descrição;Valor\n"
+            "01/03/2024;PADARIA;-10,00\n"
+            "02/03/2024;TOTALPASS ACADEMIA;-99,90\n"
+            '03/03/2024;"SALDO RESGATE CDB";500,00\n'
+            "31/03/2024;SALDO FINAL;390,10\n"
+            "31/03/2024;TOTAL;\n",
+            encoding="utf-8",
+        )
+
+        statement = self._parser().parse_file(str(path))
+
+        assert [e.name for e in statement.expenses] == ["PADARIA", "TOTALPASS ACADEMIA", "SALDO RESGATE CDB"]
+        assert statement.diagnostics.counts == {REASON_FOOTER_ROW: 2}
+
+    def test_footer_scan_stops_at_quoted_line(self, tmp_path):
+        path = tmp_path / "aspas.csv"
+        path.write_text('Data;Descrição;Valor\n01/03/2024;"LOJA\nCENTRO";-1,00\n', encoding="utf-8")
+        parser = self._parser()
+
+        csv_format = parser.detect_csv_format(str(path))
+
+        assert csv_format['body_end'] == path.stat().st_size
+        assert parser.parse_file(str(path)).expenses[0].name == "LOJA\nCENTRO"
+
+
+class TestParseDiagnostics:
+    """Testes para a agregação de linhas problemáticas"""
+
+    def _write(self, tmp_path):
+        lines = ["Data;Descrição;Valor"]
+        for i in range(60):
+            if i % 10 == 3:
+                lines.append(f"99/99/2024;RUIM {i};-1,00")
+            elif i % 10 == 7:
+                lines.append(f"01/03/2024;VALOR RUIM {i};abc")
+            else:
+                lines.append(f"01/03/2024;LOJA {i};-{i},00")
+        lines.insert(20, "SEM COLUNAS")
+        path = tmp_path / "ruim.csv"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return str(path)
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_problems_are_aggregated_into_one_log_record(self, tmp_path, caplog, workers):
+        from src.parsers.csv import REASON_INCOMPLETE_ROW, REASON_INVALID_DATE, REASON_INVALID_VALUE
+
+        with caplog.at_level("WARNING"):
+            statement = CSVBankParser().parse_file(self._write(tmp_path), workers=workers)
+
+        diagnostics = statement.diagnostics
+        assert diagnostics.counts == {REASON_INVALID_DATE: 6, REASON_INVALID_VALUE: 6, REASON_INCOMPLETE_ROW: 1}
+        assert diagnostics.to_dict()[REASON_INVALID_DATE]["sample_rows"] == [5, 15, 26]
+        # Valores inválidos mantêm a linha, com valor 0
+        assert len(statement.expenses) == 54
+        assert [e.value for e in statement.expenses if e.name == "VALOR RUIM 7"] == [0.0]
+        warnings = [r for r in caplog.records if r.levelname in ("WARNING", "ERROR")]
+        assert len(warnings) == 1
+        assert "Data inválida: 6" in warnings[0].getMessage()
+
+    def test_clean_file_has_empty_diagnostics(self, tmp_path):
+        path = tmp_path / "ok.csv"
+        path.write_text("Data,Descrição,Valor\n01/03/2024,X,1.00\n", encoding="utf-8")
+
+        assert CSVBankParser().parse_file(str(path)).diagnostics.total == 0
+
+    def test_merge_keeps_sample_limit(self):
+        from src.parsers.models import ParseDiagnostics
+
+        first, second = ParseDiagnostics(), ParseDiagnostics()
+        for row in (2, 3):
+            first.add("Data inválida", row)
+        for row in (10, 11, 12):
+            second.add("Data inválida", row)
+        first.merge(second)
+
+        assert first.total == 5
+        assert first.summary() == "Data inválida: 5 (linhas 2, 3, 10)"
@@ -0,0 +1,55 @@
+"""
+Testes para a detecção de codificação de extratos CSV
+"""
+
+import codecs
+
+from src.parsers.csv import CSVBankParser, parse_csv_bank_statement
+from src.parsers.encoding import FALLBACK_ERRORS, detect_encoding
+
+
+CONTENT = "Data;Descrição;Valor\n01/03/2024;AÇOUGUE SÃO JOÃO;-45,90\n02/03/2024;PÃO DE AÇÚCAR;-120,00\n"
+
+
+def test_detects_bom_ascii_and_utf8():
+    assert detect_encoding(codecs.BOM_UTF8 + b"Data") == "utf-8-sig"
+    assert detect_encoding(b"Data;Valor\n") == "utf-8"
+    assert detect_encoding(CONTENT.encode("utf-8")) == "utf-8"
+    # Caractere multibyte cortado no fim do prefixo continua sendo UTF-8
+    assert detect_encoding(CONTENT.encode("utf-8")[:-len("\n")] + "ç".encode("utf-8")[:1]) == "utf-8"
+
+
+def test_detects_single_byte_brazilian_exports():
+    assert detect_encoding(CONTENT.encode("cp1252")) == "cp1252"
+    assert detect_encoding(CONTENT.encode("cp850")) == "cp850"
+    assert detect_encoding(CONTENT.encode("latin-1") + b"\x81") == "latin-1"
+
+
+def test_fallback_errors_recover_invalid_bytes_in_place():
+    mixed = "AÇÃO".encode("utf-8") + " CAFÉ".encode("cp1252")
+
+    assert mixed.decode("utf-8", FALLBACK_ERRORS) == "AÇÃO CAFÉ"
+
+
+def test_parse_latin1_csv_without_explicit_encoding(tmp_path):
+    path = tmp_path / "latin1.csv"
+    path.write_bytes(CONTENT.encode("cp1252"))
+
+    statement = parse_csv_bank_statement(str(path))
+
+    assert [e.name for e in statement.expenses] == ["AÇOUGUE SÃO JOÃO", "PÃO DE AÇÚCAR"]
+
+
+def test_invalid_bytes_after_prefix_are_recovered(tmp_path, monkeypatch):
+    from src.parsers import mapped
+
+    # Prefixo (cabeçalho + 7 linhas) só com UTF-8; a linha em CP1252 aparece depois dele
+    monkeypatch.setattr(mapped, "PREFIX_BYTES", 23 + 24 * 7)
+    lines = ["Data;Descrição;Valor"] + [f"01/03/2024;LOJA {i};-1,00" for i in range(10)]
+    lines.append("02/03/2024;CAFÉ;-5,00")
+    path = tmp_path / "misto.csv"
+    path.write_bytes(("\n".join(lines) + "\n").encode("utf-8").replace("CAFÉ".encode("utf-8"), "CAFÉ".encode("cp1252")))
+
+    for workers in (1, 2):
+        statement = CSVBankParser().parse_file(str(path), workers=workers)
+        assert statement.expenses[-1].name == "CAFÉ"
@@ -28,7 +28,7 @@ def test_ai_fallback_on_exception(monkeypatch):
 
     calls = {"count": 0}
 
-    def fake_categorize_with_gemini(_tx):
+    def fake_categorize_with_gemini(_tx, user_id=None):
         calls["count"] += 1
         raise RuntimeError("AI error")
 
@@ -46,3 +46,93 @@ def test_ai_fallback_on_exception(monkeypatch):
 def test_max_file_size_constant_reasonable():
     assert isinstance(MAX_FILE_SIZE_MB, int)
     assert 1 <= MAX_FILE_SIZE_MB <= 100
+
+
+@pytest.mark.asyncio
+async def test_categorize_with_progress_edits_status_message(monkeypatch):
+    from src.handlers import handle_document as hd
+
+    def fake_categorize_with_gemini(transactions, on_progress=None, user_id=None):
+        for done in range(1, len(transactions) + 1):
+            on_progress(done, len(transactions))
+        return [{**tx, "category": "Outros"} for tx in transactions]
+
+    monkeypatch.setattr(hd, "categorize_with_gemini", fake_categorize_with_gemini)
+
+    class DummyMessage:
+        def __init__(self):
+            self.edits = []
+
+        async def edit_text(self, text):
+            self.edits.append(text)
+
+    message = DummyMessage()
+    txs = [{"id": i, "name": "Teste", "value": -1.0, "date": "2024-01-01"} for i in range(5)]
+    progress = hd._ProgressMessage(message, "Analisando", len(txs), interval=60)
+
+    result, ai_ok = await hd._categorize_with_progress(txs, progress)
+
+    assert ai_ok is True
+    assert len(result) == 5
+    # Intervalo longo: apenas a edição final, com o total
+    assert message.edits == ["Analisando\n\n🤖 5/5 categorizadas"]
+
+
+def test_reupload_only_classifies_new_rows(tmp_path, monkeypatch):
+    from src.handlers import handle_document as hd
+    from src.storage.store import get_default_store
+
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    get_default_store.cache_clear()
+    try:
+        first = [{"id": i, "name": f"LOJA {i}", "value": -1.0 * i, "date": "2024-01-01"} for i in range(3)]
+        reused, new = hd._split_known_transactions(7, first)
+        assert reused == {} and len(new) == 3
+        categorized = [{**tx, "category": "Outros", "categorization_confidence": 0.8} for tx in new]
+        hd._remember_statement(7, "extrato.csv", "csv", "abc", categorized)
+
+        second = [{"id": i, "name": f"LOJA {i}", "value": -1.0 * i, "date": "2024-01-01"} for i in range(4)]
+        reused, new = hd._split_known_transactions(7, second)
+        merged = hd._merge_categorized(second, reused, [{**new[0], "category": "Saúde"}])
+
+        assert [tx["id"] for tx in new] == [3]
+        assert [tx["category"] for tx in merged] == ["Outros", "Outros", "Outros", "Saúde"]
+    finally:
+        get_default_store.cache_clear()
+
+
+def test_diagnostics_caption_line():
+    from src.handlers.handle_document import _build_result_payload, _diagnostics_caption_line
+    from src.parsers.models import ParseDiagnostics
+
+    diagnostics = ParseDiagnostics()
+    assert _diagnostics_caption_line(diagnostics) is None
+
+    for row in (4, 9):
+        diagnostics.add("Data inválida", row)
+    diagnostics.add("Linha incompleta", 12)
+
+    line = _diagnostics_caption_line(diagnostics)
+    assert "3" in line and "Data inválida: 2" in line
+    payload = _build_result_payload("a.csv", "csv", diagnostics=diagnostics)
+    assert payload["parse_diagnostics"]["Data inválida"] == {"count": 2, "sample_rows": [4, 9]}
+
+
+def test_incremental_switch_keeps_recording_statements(tmp_path, monkeypatch):
+    from src.handlers import handle_document as hd
+    from src.storage.store import get_default_store
+
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("INCREMENTAL_PROCESSING", "0")
+    get_default_store.cache_clear()
+    try:
+        txs = [{"id": i, "name": f"LOJA {i}", "value": -1.0, "date": "2024-01-01"} for i in range(2)]
+        hd._split_known_transactions(7, txs)
+        hd._remember_statement(7, "extrato.csv", "csv", "abc",
+                               [{**tx, "category": "Outros", "categorization_confidence": 0.8} for tx in txs])
+
+        reused, new = hd._split_known_transactions(7, txs)
+        assert reused == {} and len(new) == 2
+        assert get_default_store().monthly_totals(7)[1][0]["count"] == 2
+    finally:
+        get_default_store.cache_clear()
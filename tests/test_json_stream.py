@@ -0,0 +1,74 @@
+"""
+Testes para o parser JSON incremental das respostas de categorização
+"""
+
+import json
+
+from src.ai.json_stream import JsonItemStream, iter_json_items
+
+
+RESPONSE = json.dumps({"r": [
+    {"i": 0, "c": "Transporte"},
+    {"i": 1, "c": "Saúde", "m": "texto com } e \" e {"},
+    {"i": 2, "c": "Outros"},
+]}, ensure_ascii=False)
+
+
+def test_feed_whole_response():
+    stream = JsonItemStream()
+
+    items = stream.feed(RESPONSE)
+
+    assert [item["i"] for item in items] == [0, 1, 2]
+    assert items[1]["m"] == 'texto com } e " e {'
+    assert stream.finished
+
+
+def test_items_are_emitted_as_soon_as_they_close_across_any_split():
+    for size in (1, 2, 3, 7, 16):
+        chunks = [RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)]
+        stream = JsonItemStream()
+        seen_at = []
+        for index, chunk in enumerate(chunks):
+            for item in stream.feed(chunk):
+                seen_at.append((index, item["i"]))
+
+        assert [i for _, i in seen_at] == [0, 1, 2]
+        # O primeiro item chega antes do fim da resposta
+        assert seen_at[0][0] < len(chunks) - 1
+
+
+def test_ignores_markdown_fences_and_trailing_text():
+    text = "```json\n" + RESPONSE + "\n```\nObrigado!"
+
+    assert len(list(iter_json_items([text]))) == 3
+
+
+def test_truncated_response_keeps_completed_items():
+    stream = JsonItemStream()
+
+    items = stream.feed('{"r":[{"i":0,"c":"Transporte"},{"i":1,"c":"Sa')
+
+    assert items == [{"i": 0, "c": "Transporte"}]
+    assert not stream.finished
+
+
+def test_malformed_item_is_skipped():
+    stream = JsonItemStream()
+
+    items = stream.feed('{"r":[{"i":0,"c":"Transporte"},{"i":1,"c":Saude},{"i":2,"c":"Outros"}]}')
+
+    assert [item["i"] for item in items] == [0, 2]
+    assert stream.items_invalid == 1
+
+
+def test_only_items_of_known_keys_are_emitted():
+    stream = JsonItemStream()
+
+    items = stream.feed('{"meta":[{"x":1}],"categorizations":[{"id":5,"category":"Renda"}]}')
+
+    assert items == [{"id": 5, "category": "Renda"}]
+
+
+def test_non_json_text_yields_nothing():
+    assert JsonItemStream().feed("not-json") == []
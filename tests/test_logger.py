@@ -0,0 +1,59 @@
+"""
+Testes para o registro econômico de payloads
+"""
+
+import logging
+
+from src.utils import logger as logger_module
+from src.utils.logger import log_payload, enable_payload_capture, stop_logging, PAYLOAD_LOGGER_NAME
+
+
+def test_log_payload_is_capped(caplog, monkeypatch):
+    monkeypatch.setenv("LOG_PAYLOAD_MAX_CHARS", "10")
+    log = logging.getLogger("tests.payload")
+
+    with caplog.at_level(logging.DEBUG, logger="tests.payload"):
+        log_payload(log, "resposta", "x" * 100)
+
+    assert len(caplog.records) == 1
+    message = caplog.records[0].getMessage()
+    assert "tamanho=100" in message
+    assert "x" * 11 not in message
+    assert "(+90 caracteres)" in message
+
+
+def test_log_payload_skipped_when_level_disabled(caplog):
+    log = logging.getLogger("tests.payload.disabled")
+    log.setLevel(logging.INFO)
+
+    with caplog.at_level(logging.INFO, logger="tests.payload.disabled"):
+        log_payload(log, "resposta", "conteúdo")
+
+    assert caplog.records == []
+
+
+def test_log_payload_sampling(caplog, monkeypatch):
+    monkeypatch.setenv("LOG_PAYLOAD_SAMPLE_RATE", "0")
+    log = logging.getLogger("tests.payload.sampled")
+
+    with caplog.at_level(logging.DEBUG, logger="tests.payload.sampled"):
+        log_payload(log, "resposta", "conteúdo")
+        log_payload(log, "erro", "conteúdo", level=logging.ERROR, sample=False)
+
+    assert [r.levelno for r in caplog.records] == [logging.ERROR]
+
+
+def test_full_payload_capture_to_file(tmp_path, monkeypatch):
+    payload_file = tmp_path / "payloads.log"
+    payload_logger = logging.getLogger(PAYLOAD_LOGGER_NAME)
+    monkeypatch.setattr(payload_logger, "handlers", [])
+    monkeypatch.setattr(logger_module, "_listeners", [])
+
+    enable_payload_capture(str(payload_file))
+    try:
+        log_payload(logging.getLogger("tests.payload.file"), "prompt", "y" * 2000)
+    finally:
+        stop_logging()
+        payload_logger.setLevel(logging.CRITICAL + 1)
+
+    assert "y" * 2000 in payload_file.read_text(encoding="utf-8")
@@ -0,0 +1,59 @@
+"""
+Testes para a leitura de arquivos mapeados em memória
+"""
+
+import codecs
+
+from src.parsers.csv import CSVBankParser
+from src.parsers.mapped import MappedInput, count_bytes, detect_bom
+
+
+CSV_CONTENT = "Data;Descrição;Valor\n01/03/2024;PADARIA SÃO JOÃO;-12,50\n02/03/2024;SALÁRIO;3000,00\n"
+
+
+def test_detect_bom():
+    assert detect_bom(codecs.BOM_UTF8 + b"Data") == ("utf-8-sig", 3)
+    assert detect_bom(codecs.BOM_UTF16_LE + b"D\x00") == ("utf-16", 2)
+    assert detect_bom(b"Data") == (None, 0)
+
+
+def test_mapped_input_slices_and_counts(tmp_path):
+    path = tmp_path / "dados.bin"
+    path.write_bytes(b'a"b\nc"d\n' * 1000)
+
+    with MappedInput(str(path)) as source:
+        assert len(source) == 8000
+        assert source.decode(0, 3, "ascii") == 'a"b'
+        assert source.count(b'"') == 2000
+        assert count_bytes(source.buffer, b"\n", 0, 8) == 2
+        assert source.stream().read(4) == b'a"b\n'
+
+
+def test_empty_file_is_supported(tmp_path):
+    path = tmp_path / "vazio.csv"
+    path.write_bytes(b"")
+
+    with MappedInput(str(path)) as source:
+        assert len(source) == 0 and source.prefix() == b""
+
+    assert CSVBankParser().parse_file(str(path)).expenses == []
+
+
+def test_csv_with_utf16_bom_is_detected(tmp_path):
+    path = tmp_path / "utf16.csv"
+    path.write_bytes(CSV_CONTENT.encode("utf-16"))
+
+    statement = CSVBankParser().parse_file(str(path))
+
+    assert [e.name for e in statement.expenses] == ["PADARIA SÃO JOÃO", "SALÁRIO"]
+    assert statement.expenses[0].value == -12.5
+
+
+def test_csv_with_utf8_bom_skips_bom_in_header(tmp_path):
+    path = tmp_path / "bom.csv"
+    path.write_bytes(codecs.BOM_UTF8 + CSV_CONTENT.encode("utf-8"))
+
+    csv_format = CSVBankParser().detect_csv_format(str(path))
+
+    assert csv_format["headers"][0] == "Data"
+    assert csv_format["body_start"] == len(codecs.BOM_UTF8) + len("Data;Descrição;Valor\n".encode("utf-8"))
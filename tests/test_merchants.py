@@ -0,0 +1,48 @@
+"""
+Testes para a normalização e canonicalização de comerciantes
+"""
+
+import pytest
+from datetime import date
+
+from src.domain.merchants import MerchantIndex, normalize_merchant_name, canonical_merchant
+from src.parsers.csv import CSVBankParser
+
+
+@pytest.mark.parametrize("raw", ["PAG*IFOOD 1234", "IFOOD *SAO PAULO", "IFD*IFOOD.COM", "Ifood"])
+def test_ifood_variants_share_the_same_id(raw):
+    assert canonical_merchant(raw) == "ifood"
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("UBER *TRIP HELP.UBER.COM", "UBER"),
+    ("PIX ENVIADO - João da Silva", "JOAO DA SILVA"),
+    ("COMPRA CARTAO 12/03 NETFLIX.COM", "NETFLIX"),
+    ("DROGASIL 1234 SAO PAULO SP", "DROGASIL"),
+    ("SUPERMERCADO XYZ LTDA", "SUPERMERCADO XYZ"),
+    ("Farmácia São João", "FARMACIA SAO JOAO"),
+])
+def test_normalize_merchant_name(raw, expected):
+    assert normalize_merchant_name(raw) == expected
+
+
+def test_unknown_merchant_gets_compact_slug():
+    assert canonical_merchant("MP*LOJA DO ZE 0042 CURITIBA PR") == "loja-do-ze"
+    assert canonical_merchant("") == ""
+
+
+def test_index_matches_longest_known_prefix():
+    index = MerchantIndex({"uber": ["UBER"], "uber-eats": ["UBER EATS"]})
+
+    assert index.resolve("UBER EATS PEDIDO 55") == "uber-eats"
+    assert index.resolve("UBER VIAGEM") == "uber"
+
+
+def test_parsers_fill_merchant_once(tmp_path):
+    csv_file = tmp_path / "extrato.csv"
+    csv_file.write_text("Data,Descrição,Valor\n01/03/2024,PAG*IFOOD 1234,-35.90\n", encoding="utf-8")
+
+    statement = CSVBankParser().parse_file(str(csv_file))
+
+    assert statement.expenses[0].merchant == "ifood"
+    assert statement.expenses[0].date == date(2024, 3, 1)
@@ -0,0 +1,83 @@
+"""
+Testes para a instrumentação de etapas e exportação de métricas
+"""
+
+import urllib.request
+
+import pytest
+
+from src.utils.metrics import MetricsRegistry, span, start_http_server, timed, STAGE_DURATION
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+
+    with span("parse", registry):
+        pass
+    registry.inc("documents_total")
+
+    assert registry.snapshot() == {"counters": {}, "histograms": {}}
+
+
+def test_span_records_histogram_and_outcome():
+    registry = MetricsRegistry(enabled=True)
+
+    with span("parse", registry):
+        pass
+    with pytest.raises(ValueError):
+        with span("parse", registry):
+            raise ValueError("boom")
+
+    snapshot = registry.snapshot()
+    assert snapshot["histograms"][STAGE_DURATION]['{stage="parse"}']["count"] == 2
+    assert snapshot["counters"]["stage_total"]['{outcome="ok",stage="parse"}'] == 1
+    assert snapshot["counters"]["stage_total"]['{outcome="error",stage="parse"}'] == 1
+
+
+@pytest.mark.asyncio
+async def test_timed_decorator_supports_sync_and_async():
+    registry = MetricsRegistry(enabled=True)
+    seen = []
+    registry.add_listener(lambda name, value, labels: seen.append(labels["stage"]))
+
+    @timed("hash", registry)
+    def compute():
+        return 1
+
+    @timed("download", registry)
+    async def fetch():
+        return 2
+
+    assert compute() == 1
+    assert await fetch() == 2
+    assert seen == ["hash", "download"]
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry(enabled=True)
+    registry.inc("documents_total", labels={"file_type": "csv", "outcome": "processed"})
+    registry.observe(STAGE_DURATION, 0.02, {"stage": "parse"})
+
+    text = registry.render_prometheus()
+
+    assert '# TYPE fincat_documents_total counter' in text
+    assert 'fincat_documents_total{file_type="csv",outcome="processed"} 1' in text
+    assert 'fincat_stage_duration_seconds_bucket{stage="parse",le="0.01"} 0' in text
+    assert 'fincat_stage_duration_seconds_bucket{stage="parse",le="0.025"} 1' in text
+    assert 'fincat_stage_duration_seconds_bucket{stage="parse",le="+Inf"} 1' in text
+    assert 'fincat_stage_duration_seconds_count{stage="parse"} 1' in text
+
+
+def test_http_endpoint_serves_metrics():
+    registry = MetricsRegistry(enabled=True)
+    registry.inc("documents_total")
+    server = start_http_server(0, registry=registry)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "fincat_documents_total 1" in body
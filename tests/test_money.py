@@ -0,0 +1,90 @@
+"""
+Testes para valores monetários em centavos inteiros
+"""
+
+from datetime import date
+from decimal import Decimal
+from unittest.mock import Mock
+
+import pytest
+
+from src.domain.money import cents_from_decimal, cents_from_str, cents_to_str, transaction_cents
+from src.parsers.csv import CSVBankParser
+from src.parsers.models import Expense
+from src.parsers.ofx import _convert_transaction_to_expense
+from src.utils import format_cents, format_cents_column, format_currency
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("-1234.56", -123456), ("10", 1000), ("0.5", 50), (".99", 99), ("+7.1", 710),
+    ("1.005", 101), ("-2.345", -235), ("1e3", 100000),
+])
+def test_cents_from_str(text, cents):
+    assert cents_from_str(text) == cents
+
+
+@pytest.mark.parametrize("text", ["", "-", ".", "abc", "1.2.3", "nan", "inf"])
+def test_cents_from_str_rejects_non_numbers(text):
+    assert cents_from_str(text) is None
+
+
+def test_decimal_and_text_conversions_are_exact():
+    assert cents_from_decimal(Decimal("-100.505")) == -10051
+    assert cents_to_str(-4590) == "-45.90"
+    assert cents_to_str(5) == "0.05"
+    assert transaction_cents({"value": 0.1 + 0.2}) == 30
+    assert transaction_cents({"value": 99.0, "value_cents": 12345}) == 12345
+
+
+def test_format_cents_matches_format_currency():
+    for cents in (0, 5, -5, 123456, -123456789, 100000000):
+        assert format_cents(cents) == format_currency(cents / 100)
+    assert format_currency(-45.9) == "-R$ 45,90"
+
+
+def test_format_uses_the_currency_symbol():
+    assert format_cents(-4590, "USD") == "-US$ 45,90"
+    assert format_currency(1234.5, "eur") == "€ 1.234,50"
+    assert format_cents(100, "ARS") == "ARS 1,00"
+
+
+@pytest.mark.parametrize("cents, text", [
+    (0, "R$ 0,00"), (5, "R$ 0,05"), (-4590, "-R$ 45,90"), (99999, "R$ 999,99"),
+    (100000, "R$ 1.000,00"), (-123456789, "-R$ 1.234.567,89"),
+])
+def test_format_cents_uses_brazilian_grouping(cents, text):
+    assert format_cents(cents) == text
+
+
+def test_format_cents_column_matches_single_value_and_csv_text():
+    values = [0, 5, -4590, 123456, -123456789]
+
+    assert format_cents_column(values) == [format_cents(cents) for cents in values]
+    assert format_cents_column(values, symbol="", decimal=".", thousands="") == [cents_to_str(c) for c in values]
+
+
+def test_expense_keeps_float_compatible_value():
+    expense = Expense(id=1, name="X", value=None, cents=-4590, category="Outros", date=date(2024, 3, 1))
+
+    assert expense.value == -45.90
+    assert expense.currency == "BRL"
+    expense.value = 12.3
+    assert expense.cents == 1230
+
+
+def test_csv_rows_are_summed_exactly(tmp_path):
+    path = tmp_path / "centavos.csv"
+    path.write_text("Data;Descrição;Valor\n" + "01/03/2024;CAFE;-0,10\n" * 1000, encoding="utf-8")
+
+    expenses = CSVBankParser().parse_file(str(path)).expenses
+
+    assert sum(e.cents for e in expenses) == -10000
+    assert sum(e.value for e in expenses) != -100.0  # o float acumula erro
+
+
+def test_ofx_amount_goes_straight_to_cents():
+    transaction = Mock(memo="PIX", payee=None, trnamt=Decimal("-1234.57"), dtposted=None)
+
+    expense = _convert_transaction_to_expense(transaction, 0, "USD")
+
+    assert (expense.cents, expense.currency) == (-123457, "USD")
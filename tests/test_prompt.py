@@ -0,0 +1,113 @@
+"""
+Testes para o construtor de prompts compactos e a estimativa de tokens
+"""
+
+from src.ai.prompt import PromptBuilder, estimate_tokens
+from src.domain.categories import Category
+
+
+CATEGORIES = [c.value for c in Category]
+
+
+def _tx(tx_id, name="LOJA EXEMPLO", value=-10.0, date="2024-01-01"):
+    return {"id": tx_id, "name": name, "value": value, "date": date}
+
+
+def test_estimate_tokens_counts_digits_individually():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("1234") == 4
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_build_uses_short_ids_and_compact_lines():
+    builder = PromptBuilder(CATEGORIES)
+    encoded = builder.build([
+        _tx("FITID-0001", "  PADARIA   PAO | QUENTE  ", -12.5),
+        _tx("FITID-0002", "SALARIO", 3500.0),
+    ])
+
+    assert "0|PADARIA PAO / QUENTE|-12.5\n" in encoded.text
+    assert "1|SALARIO|3500\n" in encoded.text
+    assert "2024-01-01" not in encoded.text
+    assert "FITID" not in encoded.text
+    assert encoded.id_map == {"0": "FITID-0001", "1": "FITID-0002"}
+    assert encoded.estimated_input_tokens > 0
+    assert encoded.estimated_output_tokens > 0
+
+
+def test_build_truncates_names_and_optionally_includes_date():
+    builder = PromptBuilder(CATEGORIES, include_date=True, max_name_chars=10)
+    encoded = builder.build([_tx(7, "SUPERMERCADO BOM PRECO LTDA", -99.9, "2024-03-05")])
+
+    assert "0|SUPERMERCA|-99.9|2024-03-05" in encoded.text
+
+
+def test_decode_maps_lean_response_to_original_ids():
+    builder = PromptBuilder(CATEGORIES)
+    encoded = builder.build([_tx("a"), _tx("b"), _tx("c")])
+
+    decoded = encoded.decode({"r": [
+        {"i": 0, "c": CATEGORIES.index("Transporte")},
+        {"i": "1", "c": "Saúde"},
+        {"i": 2, "c": 99},
+        {"i": 9, "c": 0},
+    ]})
+
+    assert decoded["a"]["category"] == "Transporte"
+    assert decoded["a"]["confidence"] == 0.5
+    assert decoded["b"]["category"] == "Saúde"
+    assert "c" not in decoded
+    assert len(decoded) == 2
+
+
+def test_decode_accepts_legacy_response_with_original_ids():
+    encoded = PromptBuilder(CATEGORIES).build([_tx(1)])
+
+    decoded = encoded.decode({"categorizations": [
+        {"id": 1, "category": "Transporte", "confidence": 0.9, "reasoning": "Uber"},
+    ]})
+
+    assert decoded[1] == {"category": "Transporte", "confidence": 0.9, "reasoning": "Uber"}
+
+
+def test_reasoning_mode_costs_more_output_tokens():
+    transactions = [_tx(i) for i in range(50)]
+
+    lean = PromptBuilder(CATEGORIES).build(transactions)
+    verbose = PromptBuilder(CATEGORIES, reasoning=True).build(transactions)
+
+    assert verbose.estimated_output_tokens > lean.estimated_output_tokens
+    assert '"m":' in verbose.text
+
+
+def test_chunk_respects_token_budgets():
+    builder = PromptBuilder(CATEGORIES)
+    transactions = [_tx(i, f"COMPRA NUMERO {i}") for i in range(500)]
+
+    chunks = builder.chunk(transactions, max_input_tokens=2000, max_output_tokens=1000)
+
+    assert sum(len(chunk) for chunk in chunks) == 500
+    assert [tx["id"] for chunk in chunks for tx in chunk] == list(range(500))
+    for chunk in chunks:
+        encoded = builder.build(chunk)
+        assert encoded.estimated_input_tokens <= 2000
+        assert encoded.estimated_output_tokens <= 1000
+
+
+def test_chunk_keeps_oversized_transaction_alone():
+    builder = PromptBuilder(CATEGORIES)
+
+    chunks = builder.chunk([_tx(1), _tx(2)], max_input_tokens=1, max_output_tokens=1)
+
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+
+
+def test_response_schema_restricts_category_to_enum():
+    schema = PromptBuilder(CATEGORIES).response_schema()
+
+    item = schema["properties"]["r"]["items"]
+    assert item["properties"]["c"]["enum"] == CATEGORIES
+    assert item["required"] == ["i", "c"]
+
+    verbose_item = PromptBuilder(CATEGORIES, reasoning=True).response_schema()["properties"]["r"]["items"]
+    assert set(verbose_item["required"]) == {"i", "c", "p", "m"}
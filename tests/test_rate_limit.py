@@ -0,0 +1,139 @@
+"""
+Testes para a limitação de taxa por token bucket
+"""
+
+import asyncio
+import pytest
+
+from src.utils import rate_limit
+from src.utils.metrics import MetricsRegistry
+from src.utils.rate_limit import Throttle, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_queues_by_reservation():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=clock)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Reservas seguintes enfileiram em ordem: 0.5s, 1.0s, ...
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now = 10.0
+    assert bucket.reserve() == 0.0
+
+
+def test_bucket_rejects_invalid_configuration():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
+
+
+def test_throttle_combines_global_and_per_key_limits():
+    clock = FakeClock()
+    throttle = Throttle("test", TokenBucket(10.0, 10, clock=clock),
+                        per_key_rate=1.0, per_key_capacity=1, clock=clock)
+
+    assert throttle.reserve("chat-1") == 0.0
+    assert throttle.reserve("chat-2") == 0.0
+    # O mesmo chat espera pelo seu bucket, mesmo com folga global
+    assert throttle.reserve("chat-1") == pytest.approx(1.0)
+
+
+def test_throttle_prunes_idle_keys():
+    clock = FakeClock()
+    throttle = Throttle("test", per_key_rate=1.0, per_key_capacity=1, max_keys=2, clock=clock)
+
+    throttle.reserve("a")
+    throttle.reserve("b")
+    clock.now = 5.0
+    throttle.reserve("c")
+
+    assert set(throttle._buckets) == {"c"}
+
+
+def test_disabled_throttle_never_waits():
+    throttle = Throttle("off")
+
+    assert not throttle.enabled
+    assert throttle.wait("user") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_wait_async_delays_and_records_metrics(monkeypatch):
+    registry = MetricsRegistry(enabled=True)
+    monkeypatch.setattr(rate_limit, "REGISTRY", registry)
+    throttle = Throttle("telegram", per_key_rate=50.0, per_key_capacity=1)
+
+    first = await throttle.wait_async(1)
+    started = asyncio.get_running_loop().time()
+    second = await throttle.wait_async(1)
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert first == 0.0
+    assert second > 0
+    assert elapsed >= second * 0.9
+    snapshot = registry.snapshot()
+    assert snapshot["histograms"]["throttle_wait_seconds"]['{limiter="telegram"}']["count"] == 2
+    assert snapshot["counters"]["throttled_total"]['{limiter="telegram"}'] == 1
+
+
+def test_throttles_follow_environment(monkeypatch):
+    monkeypatch.setenv("GEMINI_RPM", "0")
+    monkeypatch.setenv("GEMINI_USER_RPM", "6")
+    monkeypatch.setenv("TELEGRAM_CHAT_BURST", "2")
+    rate_limit.reset_throttles()
+
+    assert not rate_limit.gemini_request_throttle().enabled
+    user = rate_limit.gemini_user_throttle()
+    assert user.per_key_rate == pytest.approx(0.1)
+    assert user.per_key_capacity == 6
+    assert rate_limit.telegram_throttle().per_key_capacity == 2
+
+
+def test_per_user_limits_are_on_by_default(monkeypatch):
+    monkeypatch.delenv("GEMINI_USER_RPM", raising=False)
+    monkeypatch.delenv("GEMINI_USER_TPM", raising=False)
+    rate_limit.reset_throttles()
+
+    assert rate_limit.gemini_user_throttle().per_key_capacity == 5
+    assert rate_limit.gemini_user_token_throttle().per_key_capacity == 250_000
+
+
+def _isolated_gemini_limits(monkeypatch, user_tpm):
+    monkeypatch.setenv("GEMINI_RPM", "0")
+    monkeypatch.setenv("GEMINI_TPM", "1000000")
+    monkeypatch.setenv("GEMINI_USER_RPM", "0")
+    monkeypatch.setenv("GEMINI_USER_TPM", str(user_tpm))
+    rate_limit.reset_throttles()
+    sleeps = []
+    monkeypatch.setattr(rate_limit.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_one_user_exhausting_token_quota_does_not_block_another(monkeypatch):
+    sleeps = _isolated_gemini_limits(monkeypatch, user_tpm=6000)
+
+    assert rate_limit.acquire_gemini_call(6000, user_id="grande") == 0.0
+    # O mesmo usuário espera o seu bucket encher de novo (~6000 tokens a 100/s)...
+    assert rate_limit.acquire_gemini_call(3000, user_id="grande") == pytest.approx(30.0, rel=0.01)
+    # ...enquanto outro usuário segue sem espera, com folga global
+    assert rate_limit.acquire_gemini_call(3000, user_id="pequeno") == 0.0
+    assert sleeps == [pytest.approx(30.0, rel=0.01)]
+
+
+def test_shared_batch_splits_cost_between_users(monkeypatch):
+    _isolated_gemini_limits(monkeypatch, user_tpm=6000)
+
+    rate_limit.acquire_gemini_call(6000, user_shares={"a": 2, "b": 1})
+
+    tokens = rate_limit.gemini_user_token_throttle()._buckets
+    assert tokens["a"]._tokens == pytest.approx(2000, abs=1)
+    assert tokens["b"]._tokens == pytest.approx(4000, abs=1)
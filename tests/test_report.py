@@ -0,0 +1,69 @@
+"""
+Testes para o relatório estatístico vetorizado
+"""
+
+from src.handlers.handle_document import MAX_CAPTION_CHARS, _fit_caption
+from src.reports.statistics import TransactionArrays, build_report, format_report_lines, report_from_transactions
+
+
+def _tx(value, date, category, merchant):
+    return {"value": value, "date": date, "category": category, "merchant": merchant}
+
+
+TRANSACTIONS = [
+    _tx(-30.10, "2024-08-03", "Alimentação", "ifood"),
+    _tx(-19.90, "2024-09-03", "Alimentação", "ifood"),
+    _tx(-120.00, "2024-09-10", "Transporte", "uber"),
+    _tx(5000.00, "2024-09-05", "Renda", "empresa"),
+    _tx(-5.00, "", None, "padaria"),
+]
+
+
+def test_arrays_use_cents_dates_and_codes():
+    arrays = TransactionArrays.from_transactions(TRANSACTIONS)
+
+    assert arrays.cents.tolist() == [-3010, -1990, -12000, 500000, -500]
+    assert str(arrays.dates[0]) == "2024-08-03"
+    assert arrays.categories == ["Alimentação", "Transporte", "Renda", "Outros"]
+    assert arrays.category_codes.tolist() == [0, 0, 1, 2, 3]
+
+
+def test_build_report_totals_trends_and_merchants():
+    report = build_report(TransactionArrays.from_transactions(TRANSACTIONS), top_n=2)
+
+    assert (report.spent_cents, report.income_cents, report.net_cents) == (17500, 500000, 482500)
+    assert [row["category"] for row in report.by_category] == ["Transporte", "Alimentação", "Outros", "Renda"]
+    assert report.by_category[1] == {"category": "Alimentação", "spent_cents": 5000, "income_cents": 0, "count": 2}
+    # Transações sem data ficam fora da tendência mensal
+    assert report.monthly == [
+        {"month": "2024-08", "spent_cents": 3010, "income_cents": 0, "count": 1},
+        {"month": "2024-09", "spent_cents": 13990, "income_cents": 500000, "count": 3},
+    ]
+    assert report.top_merchants == [
+        {"merchant": "uber", "spent_cents": 12000, "count": 1},
+        {"merchant": "ifood", "spent_cents": 5000, "count": 2},
+    ]
+
+
+def test_empty_history_produces_empty_report():
+    report = report_from_transactions([])
+
+    assert report.spent_cents == 0
+    assert report.by_category == [] and report.monthly == [] and report.top_merchants == []
+
+
+def test_caption_includes_report_within_telegram_limit():
+    report = report_from_transactions(TRANSACTIONS)
+    lines = format_report_lines(report)
+
+    assert lines[0] == "💸 Gastos: R$ 175,00 | 💰 Entradas: R$ 5.000,00"
+    assert "Por mês: 2024-08 R$ 30,10, 2024-09 R$ 139,90" in lines
+    assert _fit_caption(["✅ Processamento concluído!"], report).startswith("✅ Processamento concluído!\n💸")
+    assert len(_fit_caption(["x" * 1000], report)) <= MAX_CAPTION_CHARS
+
+
+def test_report_is_formatted_in_the_statement_currency():
+    report = report_from_transactions([{**tx, "currency": "USD"} for tx in TRANSACTIONS])
+
+    assert report.currency == "USD"
+    assert format_report_lines(report)[0] == "💸 Gastos: US$ 175,00 | 💰 Entradas: US$ 5.000,00"
@@ -0,0 +1,132 @@
+"""
+Testes para a escrita em fluxo dos arquivos de resultado
+"""
+
+import csv
+import json
+
+import pytest
+
+from src.reports import writers
+from src.reports.writers import RESULT_COLUMNS, resolve_artifact_formats, write_artifacts, write_results
+
+
+def _transactions(count):
+    for index in range(count):
+        yield {
+            "id": index,
+            "name": f"Compra {index}",
+            "merchant": None,
+            "value": -(index + 0.5),
+            "value_cents": -(index * 100 + 50),
+            "date": "2024-03-01",
+            "category": "Alimentação",
+            "categorization_confidence": 0.9,
+            "categorization_reasoning": "",
+        }
+
+
+def test_csv_and_json_are_written_in_one_pass_from_a_generator(tmp_path):
+    csv_path, json_path = tmp_path / "r.csv", tmp_path / "r.json"
+    metadata = {"original_file": "extrato.csv", "file_type": "csv"}
+
+    count = write_results(_transactions(300), str(csv_path), str(json_path), metadata=metadata)
+
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert count == 300
+    assert tuple(rows[0]) == RESULT_COLUMNS
+    assert rows[1] == ["0", "Compra 0", "", "-0.50", "2024-03-01", "Alimentação", "0.9", ""]
+    assert rows[-1][3] == "-299.50"
+
+    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    assert payload["original_file"] == "extrato.csv"
+    assert payload["total_transactions"] == 300
+    assert payload["transactions"] == list(_transactions(300))
+
+
+def test_ndjson_writes_one_transaction_per_line(tmp_path):
+    json_path = tmp_path / "r.ndjson"
+
+    write_results(_transactions(3), json_path=str(json_path), json_format="ndjson", metadata={"file_type": "csv"})
+
+    lines = json_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [0, 1, 2]
+
+
+def test_empty_input_produces_valid_json(tmp_path):
+    json_path = tmp_path / "r.json"
+
+    assert write_results([], json_path=str(json_path)) == 0
+    assert json.loads(json_path.read_text(encoding="utf-8")) == {"transactions": [], "total_transactions": 0}
+
+
+def test_unknown_json_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_results([], json_path=str(tmp_path / "r.xml"), json_format="xml")
+
+
+def test_production_writes_only_the_delivered_csv(tmp_path, monkeypatch):
+    from src.handlers.handle_document import _artifact_formats, _write_results
+
+    monkeypatch.delenv("RESULT_ARTIFACTS", raising=False)
+    monkeypatch.delenv("DEBUG", raising=False)
+    monkeypatch.setenv("APP_ENV", "production")
+
+    csv_path = _write_results(str(tmp_path), "extrato", list(_transactions(5)), _artifact_formats())
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["extrato_categorized.csv"]
+    assert csv_path.endswith("extrato_categorized.csv")
+
+
+@pytest.mark.parametrize("value, debug, expected", [
+    ("", False, ("csv",)),
+    ("", True, ("csv", "json")),
+    ("ndjson, JSON,ndjson", False, ("csv", "ndjson", "json")),
+    ("csv,xml", True, ("csv", "json")),
+])
+def test_resolve_artifact_formats(value, debug, expected):
+    assert resolve_artifact_formats(value, debug=debug) == expected
+
+
+def test_formats_without_their_library_are_skipped(monkeypatch):
+    monkeypatch.setitem(writers._OPTIONAL_MODULES, "xlsx", "biblioteca_inexistente")
+
+    assert resolve_artifact_formats("xlsx,json") == ("csv", "json")
+
+
+def test_all_text_formats_share_one_pass(tmp_path):
+    paths = {fmt: str(tmp_path / f"r.{fmt}") for fmt in ("csv", "json", "ndjson")}
+    consumed = []
+
+    def transactions():
+        for tx in _transactions(200):
+            consumed.append(tx["id"])
+            yield tx
+
+    assert write_artifacts(transactions(), paths) == 200
+    assert consumed == list(range(200))
+    assert json.loads((tmp_path / "r.json").read_text(encoding="utf-8"))["total_transactions"] == 200
+    assert len((tmp_path / "r.ndjson").read_text(encoding="utf-8").splitlines()) == 200
+
+
+def test_xlsx_keeps_numeric_values(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path / "r.xlsx"
+
+    write_artifacts(_transactions(3), {"xlsx": str(path)})
+
+    rows = list(openpyxl.load_workbook(path, read_only=True).active.iter_rows(values_only=True))
+    assert rows[0] == RESULT_COLUMNS
+    assert [row[3] for row in rows[1:]] == [-0.5, -1.5, -2.5]
+
+
+def test_parquet_stores_exact_cents(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "r.parquet"
+
+    write_artifacts(_transactions(3), {"parquet": str(path)})
+
+    table = pq.read_table(path)
+    assert table.column("value_cents").to_pylist() == [-50, -150, -250]
+    assert table.column("currency").to_pylist() == ["BRL"] * 3
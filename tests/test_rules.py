@@ -0,0 +1,133 @@
+"""
+Testes para o motor de regras determinísticas
+"""
+
+import json
+import pytest
+
+from src.ai.rules import KeywordAutomaton, Rule, RuleEngine, load_rules, fold_text
+from src.domain.categories import Category
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton([("HE", 1), ("SHE", 2), ("HERS", 3), ("HIS", 4)])
+
+    found = sorted((start, end, payload) for start, end, payload in automaton.iter_matches("USHERS"))
+
+    assert found == [(1, 4, 2), (2, 4, 1), (2, 6, 3)]
+
+
+def test_fold_text_removes_accents():
+    assert fold_text("Farmácia São João") == "FARMACIA SAO JOAO"
+
+
+def test_match_respects_word_boundaries():
+    engine = RuleEngine([Rule("uber", Category.TRANSPORTE, keywords=["UBER"])])
+
+    assert engine.match("UBER *TRIP HELP.UBER.COM", -10.0).id == "uber"
+    assert engine.match("PAG*UBERLANDIA", -10.0) is None
+
+
+def test_match_respects_sign_and_priority():
+    engine = RuleEngine([
+        Rule("mercado", Category.ALIMENTACAO, keywords=["MERCADO"], sign="debit"),
+        Rule("salario", Category.RENDA, keywords=["SALARIO"], sign="credit", priority=10),
+        Rule("mercado-salario", Category.OUTROS, keywords=["MERCADO SALARIO"]),
+    ])
+
+    assert engine.match("Salário mensal", 100.0).id == "salario"
+    assert engine.match("Salário mensal", -100.0) is None
+    # Prioridade maior vence; sem ela, vence a palavra-chave mais longa
+    assert engine.match("MERCADO SALARIO", 100.0).id == "salario"
+    assert engine.match("MERCADO SALARIO", -100.0).id == "mercado-salario"
+
+
+def test_match_with_regex_patterns():
+    engine = RuleEngine([Rule("pix-aluguel", Category.MORADIA, patterns=[r"PIX .*ALUGUEL"])])
+
+    assert engine.match("Pix enviado - aluguel março", -1500.0).id == "pix-aluguel"
+    assert engine.match("Pix enviado", -1500.0) is None
+
+
+def test_apply_splits_and_counts_hits():
+    engine = RuleEngine([Rule("ifood", Category.ALIMENTACAO, keywords=["IFOOD"])])
+    txs = [
+        {"id": 1, "name": "PAG*IFOOD 1234", "value": -30.0},
+        {"id": 2, "name": "LOJA X", "value": -10.0},
+        {"id": 3, "name": "IFOOD *SAO PAULO", "value": -25.0},
+    ]
+
+    categorized, pending = engine.apply(txs)
+
+    assert set(categorized) == {1, 3}
+    assert categorized[1]["category"] == "Alimentação"
+    assert [tx["id"] for tx in pending] == [2]
+    assert engine.hit_counts() == {"ifood": 2}
+
+
+def test_load_default_rules():
+    engine = load_rules()
+
+    assert engine.version
+    for name, value in [("UBER *TRIP", -20.0), ("99APP *CORRIDA", -15.0), ("IFOOD", -40.0),
+                        ("FARMACIA SAO JOAO", -35.0), ("SALARIO EMPRESA XYZ", 3000.0)]:
+        assert engine.match(name, value) is not None, name
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("MERCADO LIVRE*ELETRONICOS", None),
+    ("PAG*MERCADO PAGO", None),
+    ("MERCADOPAGO*SUPERMERCADO BOM", None),
+    ("SUPERMERCADO XYZ LTDA", "alimentacao-mercado"),
+    ("UBER EATS *PEDIDO", "alimentacao-delivery"),
+    ("UBER *TRIP", "transporte-apps"),
+    ("POSTO DE SAUDE VILA NOVA", None),
+    ("AUTO POSTO SAO JORGE", "transporte-combustivel"),
+    ("DROGARIA IPIRANGA", "saude-farmacia"),
+    ("POSTO IPIRANGA 123", "transporte-combustivel"),
+    ("SHELL BOX*ABASTECIMENTO", "transporte-combustivel"),
+    ("METROPOLE MODAS", None),
+    ("CAMILA AMIL DOCES", None),
+    ("HBO MAX", "entretenimento-streaming"),
+])
+def test_default_rules_avoid_generic_keyword_collisions(name, expected):
+    rule = load_rules().match(name, -30.0)
+
+    assert (rule.id if rule else None) == expected
+
+
+def test_equal_length_tie_between_categories_defers_to_the_model():
+    engine = RuleEngine([
+        Rule("combustivel", Category.TRANSPORTE, keywords=["IPIRANGA"]),
+        Rule("farmacia", Category.SAUDE, keywords=["DROGARIA"]),
+        Rule("farmacia-rede", Category.SAUDE, keywords=["FARMACIA"]),
+    ])
+
+    assert engine.match("DROGARIA IPIRANGA", -10.0) is None
+    # Empate na mesma categoria não é ambíguo
+    assert engine.match("DROGARIA FARMACIA", -10.0).category == Category.SAUDE
+
+
+def test_exclude_keywords_cancel_the_rule():
+    engine = RuleEngine([
+        Rule("apps", Category.TRANSPORTE, keywords=["UBER"], exclude=["UBER EATS"]),
+        Rule("generico", Category.OUTROS, keywords=["EATS"]),
+    ])
+
+    assert engine.match("UBER EATS", -10.0).id == "generico"
+    assert engine.match("UBER *TRIP", -10.0).id == "apps"
+
+
+def test_load_rules_rejects_invalid_files(tmp_path):
+    bad_schema = tmp_path / "schema.json"
+    bad_schema.write_text(json.dumps({"schema": 99, "rules": []}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_rules(str(bad_schema))
+
+    bad_category = tmp_path / "category.json"
+    bad_category.write_text(json.dumps({
+        "schema": 1,
+        "rules": [{"id": "x", "category": "Inexistente", "keywords": ["X"]}],
+    }), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_rules(str(bad_category))
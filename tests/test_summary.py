@@ -0,0 +1,90 @@
+"""
+Testes para o comando /resumo
+"""
+
+import types
+from datetime import date
+
+import pytest
+
+from src.handlers import summary
+from src.handlers.summary import _build_summary_text, _parse_summary_args
+from src.storage.fingerprint import assign_fingerprints
+from src.storage.store import get_default_store
+
+
+TODAY = date(2024, 10, 15)
+
+
+def test_parse_summary_args():
+    assert _parse_summary_args([], TODAY).month is None
+    assert _parse_summary_args(["setembro"], TODAY).month == "2024-09"
+    assert _parse_summary_args(["dezembro"], TODAY).month == "2023-12"
+    assert _parse_summary_args(["MARÇO", "2023"], TODAY).month == "2023-03"
+    assert _parse_summary_args(["09/2024"], TODAY).month == "2024-09"
+
+    query = _parse_summary_args(["alimentacao", "em", "set"], TODAY)
+    assert (query.category, query.month) == ("Alimentação", "2024-09")
+
+    assert _parse_summary_args(["viagens"], TODAY) is None
+    assert _parse_summary_args(["13/2024"], TODAY) is None
+
+
+def test_build_summary_text_filters_category():
+    totals = [
+        {"category": "Alimentação", "spent_cents": 3000, "received_cents": 0, "count": 2},
+        {"category": "Renda", "spent_cents": 0, "received_cents": 500000, "count": 1},
+    ]
+
+    text = _build_summary_text("2024-09", totals)
+    assert "setembro/2024" in text
+    assert "Alimentação: R$ 30,00 (2)" in text
+    assert "Renda:" not in text
+
+    assert "Nenhum gasto" in _build_summary_text("2024-09", totals, "Saúde")
+
+
+def test_build_summary_text_totals_each_currency_separately():
+    totals = [
+        {"category": "Alimentação", "currency": "BRL", "spent_cents": 3000, "received_cents": 0, "count": 2},
+        {"category": "Compras", "currency": "USD", "spent_cents": 2000, "received_cents": 0, "count": 1},
+    ]
+
+    text = _build_summary_text("2024-09", totals)
+
+    assert "Compras: US$ 20,00 (1)" in text
+    assert "R$ 30,00" in text.split("\n\n")[-1]
+    assert "US$ 20,00" in text.split("\n\n")[-1]
+    assert "R$ 50,00" not in text
+
+
+class FakeMessage:
+    def __init__(self):
+        self.from_user = types.SimpleNamespace(id=7)
+        self.chat_id = 7
+        self.replies = []
+
+    async def reply_text(self, text):
+        self.replies.append(text)
+
+
+@pytest.mark.asyncio
+async def test_handle_summary_reads_aggregates(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    get_default_store.cache_clear()
+    try:
+        txs = assign_fingerprints([
+            {"id": 1, "name": "IFOOD", "value": -30.0, "date": "2024-09-03",
+             "category": "Alimentação", "categorization_confidence": 0.9},
+        ])
+        get_default_store().record_statement(7, "extrato.csv", "csv", "abc", txs)
+
+        message = FakeMessage()
+        update = types.SimpleNamespace(message=message)
+        await summary.handle_summary(update, types.SimpleNamespace(args=["alimentação", "09/2024"]))
+        await summary.handle_summary(update, types.SimpleNamespace(args=["01/2020"]))
+
+        assert "Alimentação: R$ 30,00 (1)" in message.replies[0]
+        assert "janeiro/2020" in message.replies[1]
+    finally:
+        get_default_store.cache_clear()
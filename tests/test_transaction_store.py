@@ -0,0 +1,86 @@
+"""
+Testes para impressões digitais de transações e o histórico por usuário
+"""
+
+import json
+
+from src.storage.fingerprint import assign_fingerprints
+from src.storage.store import JsonTransactionStore, partition_known
+
+
+def _tx(tx_id, name, value, date="2024-03-01"):
+    return {"id": tx_id, "name": name, "value": value, "date": date}
+
+
+def _categorized(tx, category="Alimentação", confidence=0.9):
+    return {**tx, "category": category, "categorization_confidence": confidence,
+            "categorization_reasoning": "teste"}
+
+
+def test_fingerprint_is_stable_across_exports():
+    first = assign_fingerprints([_tx(1, "Padaria  Pão Quente", -12.5)])
+    second = assign_fingerprints([_tx("x", "PADARIA PAO QUENTE", -12.50)])
+
+    assert first[0]["fingerprint"] == second[0]["fingerprint"]
+
+
+def test_fingerprint_distinguishes_identical_rows_by_occurrence():
+    txs = assign_fingerprints([_tx(1, "CAFE", -5.0), _tx(2, "CAFE", -5.0), _tx(3, "CAFE", -5.0, "2024-03-02")])
+
+    assert len({tx["fingerprint"] for tx in txs}) == 3
+
+
+def test_store_roundtrip_and_partition(tmp_path):
+    store = JsonTransactionStore(tmp_path)
+    previous = assign_fingerprints([_tx(1, "IFOOD", -30.0), _tx(2, "CAFE", -5.0)])
+    saved = store.save(42, [_categorized(previous[0]), _categorized(previous[1], "Outros", 0.0)])
+
+    reupload = assign_fingerprints([_tx(10, "IFOOD", -30.0), _tx(11, "CAFE", -5.0), _tx(12, "NOVA LOJA", -7.0)])
+    reused, new = partition_known(store, 42, reupload)
+
+    # Falhas (confiança 0) ficam gravadas, mas voltam para o classificador
+    assert saved == 2
+    assert [tx["id"] for tx in new] == [11, 12]
+    assert list(reused.values())[0]["id"] == 10
+    assert list(reused.values())[0]["category"] == "Alimentação"
+    assert partition_known(store, 99, reupload)[0] == {}
+
+
+def test_json_store_records_statements_and_monthly_totals(tmp_path):
+    store = JsonTransactionStore(tmp_path)
+    txs = assign_fingerprints([
+        _categorized(_tx(1, "IFOOD", -30.0, "2024-09-03")),
+        _categorized(_tx(2, "MERCADO", -70.5, "2024-09-10")),
+        _categorized(_tx(3, "SALARIO", 5000.0, "2024-09-05"), "Renda"),
+        _categorized(_tx(4, "IFOOD", -12.0, "2024-08-20")),
+    ])
+
+    assert store.record_statement(1, "extrato.csv", "csv", "abc", txs) == 1
+    assert store.record_statement(1, "extrato.csv", "csv", "abc", txs[:1]) == 2
+    # Recategorização move o valor; uma falha não apaga a categoria salva
+    store.save(1, [{**txs[1], "category": "Moradia"}, _categorized(txs[0], "Outros", 0.0)])
+
+    month, totals = store.monthly_totals(1)
+    by_category = {row["category"]: row for row in totals}
+
+    assert month == "2024-09"
+    assert by_category["Alimentação"] == {"category": "Alimentação", "currency": "BRL", "spent_cents": 3000,
+                                          "received_cents": 0, "count": 1}
+    assert by_category["Moradia"]["spent_cents"] == 7050
+    assert by_category["Renda"]["received_cents"] == 500000
+    assert [row["category"] for row in totals] == ["Moradia", "Alimentação", "Renda"]
+    assert store.monthly_totals(1, "2024-08")[1][0]["spent_cents"] == 1200
+    assert store.monthly_totals(2) == (None, [])
+
+
+def test_json_store_reads_files_in_the_previous_format(tmp_path):
+    tx = assign_fingerprints([_categorized(_tx(1, "IFOOD", -30.0))])[0]
+    entry = {"name": "IFOOD", "value": -30.0, "date": "2024-03-01", "category": "Alimentação",
+             "categorization_confidence": 0.9, "categorization_reasoning": "teste"}
+    (tmp_path / "42.json").write_text(json.dumps({tx["fingerprint"]: entry}), encoding="utf-8")
+    store = JsonTransactionStore(tmp_path)
+
+    assert store.lookup(42, [tx["fingerprint"]])[tx["fingerprint"]]["category"] == "Alimentação"
+    assert store.monthly_totals(42)[1][0]["spent_cents"] == 3000
+    assert store.record_statement(42, "novo.csv", "csv", "def", []) == 1
+    assert store.lookup(42, [tx["fingerprint"]]) != {}